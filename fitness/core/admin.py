@@ -1,12 +1,14 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.safestring import mark_safe
 
+from .admin_utils import PrefixSearchMixin
 from .forms import ServiceAdminForm
 from .models import Service, Trainer
 
 
 @admin.register(Trainer)
-class TrainerAdmin(admin.ModelAdmin):
+class TrainerAdmin(PrefixSearchMixin, admin.ModelAdmin):
     list_display = ("username", "full_name", "email", "phone_number", "photo_preview")
     autocomplete_fields = ("user",)
     readonly_fields = ("photo_preview",)
@@ -33,7 +35,9 @@ class TrainerAdmin(admin.ModelAdmin):
         "user__last_name",
         "user__middle_name",
     )
-    search_help_text = "Поиск по: логину, email, телефону, имени, фамилии, отчеству"
+    search_help_text = (
+        "Поиск по началу: логина, email, телефона, имени, фамилии, отчества"
+    )
     save_on_top = True
     list_per_page = 20
     list_max_show_all = 50
@@ -111,9 +115,9 @@ class ServiceAdmin(admin.ModelAdmin):
     def duration_minutes(self, service: Service):
         return service.duration_min
 
-    @admin.display(description="Кол-во тренеров")
+    @admin.display(description="Кол-во тренеров", ordering="trainer_count")
     def trainer_count(self, service: Service):
-        return service.trainers.count()
+        return service.trainer_count
 
     @admin.display(description="Цвет", ordering="color")
     def color_preview(self, service: Service):
@@ -122,4 +126,4 @@ class ServiceAdmin(admin.ModelAdmin):
         )
 
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related("trainers")
+        return super().get_queryset(request).annotate(trainer_count=Count("trainers"))
@@ -0,0 +1,95 @@
+from collections.abc import Iterable
+
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import HttpRequest
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+
+ESTIMATED_COUNT_LIMIT = 10_000
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list.order_by()
+        connection = connections[queryset.db]
+
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+
+            if row and row[0] > ESTIMATED_COUNT_LIMIT:
+                return row[0]
+
+        return queryset.count()
+
+
+def get_prefix_bound(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def get_prefix_condition(fields: Iterable[str], term: str) -> Q:
+    condition = Q()
+
+    for field in fields:
+        for prefix in {term, term.lower(), term.capitalize()}:
+            condition |= Q(
+                **{
+                    f"{field}__gte": prefix,
+                    f"{field}__lt": get_prefix_bound(prefix),
+                }
+            )
+
+    return condition
+
+
+class PrefixSearchMixin:
+    def get_search_results(self, request: HttpRequest, queryset, search_term: str):
+        term = search_term.strip()
+
+        if not term:
+            return queryset, False
+
+        search_fields = self.get_search_fields(request)
+        condition = Q()
+        words = 0
+
+        for bit in smart_split(term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+
+            if bit:
+                condition &= get_prefix_condition(search_fields, bit)
+                words += 1
+
+        if not words:
+            return queryset, False
+
+        if words > 1:
+            condition |= get_prefix_condition(search_fields, term)
+
+        return queryset.filter(condition), False
+
+
+class LargeTableAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/bounded_change_list.html"
+
+
+class UserRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    def field_choices(self, field, request: HttpRequest, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        objs = field.related_model._default_manager.select_related("user")
+
+        if ordering:
+            objs = objs.order_by(*ordering)
+
+        return [(obj.pk, str(obj)) for obj in objs]
@@ -1,7 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
     verbose_name = "Основные данные"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.LAZY_LOAD_TRIPWIRE:
+            from .lazy_loads import install_lazy_load_tripwire
+
+            install_lazy_load_tripwire()
@@ -0,0 +1,63 @@
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions
+from users.authentication import AsyncJWTAuthentication
+
+jwt_authentication = AsyncJWTAuthentication()
+
+
+def api_response(data, status: int = 200) -> JsonResponse:
+    return JsonResponse(
+        data,
+        status=status,
+        safe=False,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+    )
+
+
+def exception_response(exc: exceptions.APIException) -> JsonResponse:
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+
+    response = api_response(data, status=exc.status_code)
+
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response.headers["WWW-Authenticate"] = jwt_authentication.authenticate_header(
+            None
+        )
+
+    return response
+
+
+async def authenticate(request: HttpRequest) -> None:
+    result = await jwt_authentication.aauthenticate(request)
+
+    if result is not None:
+        request.user, request.auth = result
+        return
+
+    user = await request.auser()
+
+    if not user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+
+    request.user = user
+
+
+def async_api_view(view):
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs):
+        try:
+            await authenticate(request)
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return exception_response(exc)
+
+    return csrf_exempt(require_safe(wrapper))
@@ -0,0 +1,133 @@
+import json
+import statistics
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPException
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+BenchmarkRequest = tuple[str, str, dict | None, dict[str, str]]
+BenchmarkResult = tuple[float, int | None]
+
+
+def get_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ("git", "rev-parse", "--short", "HEAD"),
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+
+    return result.stdout.strip() or None
+
+
+def get_bearer(user: User) -> dict[str, str]:
+    return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+
+def client_sender():
+    client = Client(raise_request_exception=False)
+
+    def send(method: str, path: str, data: dict | None, headers: dict) -> int:
+        if method == "GET":
+            return client.get(path, headers=headers).status_code
+
+        return client.post(
+            path, json.dumps(data), content_type="application/json", headers=headers
+        ).status_code
+
+    return send
+
+
+def http_sender(address: tuple[str, int], timeout: float = 30):
+    def factory():
+        http = HTTPConnection(*address, timeout=timeout)
+
+        def send(method: str, path: str, data: dict | None, headers: dict) -> int:
+            body = None
+
+            if data is not None:
+                body = json.dumps(data)
+                headers = {**headers, "Content-Type": "application/json"}
+
+            try:
+                http.request(method, path, body=body, headers=headers)
+                response = http.getresponse()
+                response.read()
+            except (OSError, HTTPException):
+                http.close()
+                raise
+
+            return response.status
+
+        return send
+
+    return factory
+
+
+def send_requests(
+    sender_factory, requests: list[BenchmarkRequest], concurrency: int
+) -> tuple[list[BenchmarkResult], float]:
+    def worker(chunk: list[BenchmarkRequest]) -> list[BenchmarkResult]:
+        send = sender_factory()
+        results = []
+
+        for request in chunk:
+            start = time.perf_counter()
+
+            try:
+                status = send(*request)
+            except (OSError, HTTPException):
+                status = None
+
+            results.append((time.perf_counter() - start, status))
+
+        return results
+
+    chunks = [requests[i::concurrency] for i in range(concurrency)]
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = [item for chunk in executor.map(worker, chunks) for item in chunk]
+
+    return results, time.perf_counter() - started
+
+
+def get_stats(results: list[BenchmarkResult], elapsed: float) -> dict:
+    latencies = [latency * 1000 for latency, _ in results]
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+
+    return {
+        "requests": len(results),
+        "errors": sum(status is None or status >= 400 for _, status in results),
+        "statuses": dict(Counter(str(status) for _, status in results)),
+        "rps": round(len(results) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(quantiles[49], 2),
+        "p95_ms": round(quantiles[94], 2),
+        "p99_ms": round(quantiles[98], 2),
+    }
+
+
+def get_stats_header(label: str, width: int = 20) -> str:
+    return (
+        f"{label:<{width}} {'запр/с':>9} {'p50, мс':>9} {'p95, мс':>9} "
+        f"{'p99, мс':>9} {'ошибки':>7}"
+    )
+
+
+def get_stats_line(label: str, stats: dict, width: int = 20) -> str:
+    return (
+        f"{label:<{width}} {stats['rps']:>9.1f} {stats['p50_ms']:>9.1f} "
+        f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['errors']:>7}"
+    )
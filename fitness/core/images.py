@@ -0,0 +1,181 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, models, transaction
+from django.db.models.fields.files import FieldFile
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = ("JPEG", "PNG", "WEBP")
+IMAGE_MIN_SIDE = 64
+IMAGE_MAX_SIDE = 12_000
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_JPEG_QUALITY = 85
+IMAGE_WEBP_QUALITY = 80
+IMAGE_PROCESSED_PREFIX = "optimized/"
+
+IMAGE_FIELDS = {
+    "users.User": ("photo", 512),
+    "core.Trainer": ("photo", 1200),
+    "core.Service": ("photo", 1200),
+}
+
+image_ingested = Signal()
+
+image_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS, thread_name_prefix="images"
+)
+
+
+def check_image(image: Image.Image) -> None:
+    width, height = image.size
+
+    if image.format not in IMAGE_FORMATS:
+        raise ValidationError("Поддерживаются только изображения JPEG, PNG и WebP")
+
+    if min(width, height) < IMAGE_MIN_SIDE:
+        raise ValidationError(
+            f"Изображение должно быть не меньше {IMAGE_MIN_SIDE}×{IMAGE_MIN_SIDE} px"
+        )
+
+    if max(width, height) > IMAGE_MAX_SIDE or width * height > IMAGE_MAX_PIXELS:
+        raise ValidationError("Изображение слишком большое")
+
+
+def validate_image(file: FieldFile) -> None:
+    if getattr(file, "_committed", True):
+        return
+
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            check_image(image)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Загрузите корректное изображение")
+    finally:
+        file.seek(position)
+
+
+def is_processed(name: str) -> bool:
+    return name.startswith(IMAGE_PROCESSED_PREFIX)
+
+
+def get_webp_name(name: str) -> str:
+    return posixpath.splitext(name)[0] + ".webp"
+
+
+def get_image_url(name: str) -> str:
+    if is_processed(name):
+        name = get_webp_name(name)
+
+    return default_storage.url(name)
+
+
+def encode_image(image: Image.Image, image_format: str) -> ContentFile:
+    buffer = BytesIO()
+
+    if image_format == "JPEG":
+        image.save(
+            buffer, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True
+        )
+    elif image_format == "WEBP":
+        image.save(buffer, "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, image_format, optimize=True)
+
+    return ContentFile(buffer.getvalue())
+
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def process_image(name: str, max_side: int) -> str:
+    with default_storage.open(name) as file, Image.open(file) as source:
+        check_image(source)
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        if has_alpha(image):
+            image, image_format, extension = image.convert("RGBA"), "PNG", ".png"
+        else:
+            image, image_format, extension = image.convert("RGB"), "JPEG", ".jpg"
+
+    stem = posixpath.splitext(name)[0]
+    new_name = default_storage.save(
+        f"{IMAGE_PROCESSED_PREFIX}{stem}{extension}", encode_image(image, image_format)
+    )
+    webp_name = get_webp_name(new_name)
+
+    if default_storage.exists(webp_name):
+        default_storage.delete(webp_name)
+
+    default_storage.save(webp_name, encode_image(image, "WEBP"))
+    return new_name
+
+
+def delete_image(name: str) -> None:
+    default_storage.delete(name)
+
+    if is_processed(name):
+        default_storage.delete(get_webp_name(name))
+
+
+def ingest_image(model: type[models.Model], pk: int) -> str | None:
+    field, max_side = IMAGE_FIELDS[model._meta.label]
+    name = model.objects.filter(pk=pk).values_list(field, flat=True).first()
+
+    if not name or is_processed(name):
+        return None
+
+    new_name = process_image(name, max_side)
+
+    if model.objects.filter(pk=pk, **{field: name}).update(**{field: new_name}):
+        if not settings.IMAGE_KEEP_ORIGINAL:
+            default_storage.delete(name)
+
+        image_ingested.send(sender=model, pk=pk, name=new_name)
+        return new_name
+
+    delete_image(new_name)
+    return None
+
+
+def run_ingest_image(model: type[models.Model], pk: int) -> None:
+    try:
+        ingest_image(model, pk)
+    except Exception:
+        logger.exception("Не удалось обработать фото %s #%s", model._meta.label, pk)
+    finally:
+        connections.close_all()
+
+
+def schedule_image_ingestion(
+    instance: models.Model, update_fields: frozenset[str] | None = None
+) -> None:
+    field, _ = IMAGE_FIELDS[instance._meta.label]
+    name = getattr(instance, field).name
+
+    if not name or is_processed(name):
+        return
+
+    if update_fields is not None and field not in update_fields:
+        return
+
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: image_executor.submit(run_ingest_image, model, pk))
+
+
+def get_image_models() -> list[type[models.Model]]:
+    return [apps.get_model(label) for label in IMAGE_FIELDS]
@@ -0,0 +1,204 @@
+import logging
+from collections.abc import Iterable
+from contextlib import contextmanager
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Model, QuerySet
+from django.db.models.fields import related_descriptors
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor,
+    ReverseManyToOneDescriptor,
+    ReverseOneToOneDescriptor,
+)
+from django.db.models.query_utils import DeferredAttribute
+
+logger = logging.getLogger(__name__)
+
+LAZY_LOAD_MODES = ("warn", "raise")
+RELATED_MANAGER_FACTORIES = (
+    "create_reverse_many_to_one_manager",
+    "create_forward_many_to_many_manager",
+)
+
+
+class LazyLoadError(RuntimeError):
+    pass
+
+
+def mark_fetched_many(objs: Iterable) -> None:
+    for obj in objs:
+        if isinstance(obj, Model) and not getattr(obj._state, "fetched_many", False):
+            obj._state.fetched_many = True
+            mark_fetched_many(obj._state.fields_cache.values())
+
+
+def report_lazy_load(instance: Model, name: str) -> None:
+    mode = settings.LAZY_LOAD_TRIPWIRE
+
+    if mode not in LAZY_LOAD_MODES:
+        return
+
+    if not getattr(instance._state, "fetched_many", False):
+        return
+
+    message = (
+        f"Ленивая загрузка {instance._meta.label}.{name} у объекта из списка: "
+        "добавьте поле в only(), select_related() или prefetch_related()"
+    )
+
+    if mode == "raise":
+        raise LazyLoadError(message)
+
+    logger.warning(message, stack_info=True)
+
+
+def patch_fetch_all() -> None:
+    fetch_all = QuerySet._fetch_all
+
+    @wraps(fetch_all)
+    def _fetch_all(self):
+        fetched = self._result_cache is None
+        fetch_all(self)
+
+        if fetched and len(self._result_cache) > 1:
+            mark_fetched_many(self._result_cache)
+
+    QuerySet._fetch_all = _fetch_all
+
+
+def patch_deferred_attribute() -> None:
+    get = DeferredAttribute.__get__
+
+    @wraps(get)
+    def __get__(self, instance, cls=None):
+        if (
+            instance is not None
+            and self.field.attname not in instance.__dict__
+            and self._check_parent_chain(instance) is None
+        ):
+            report_lazy_load(instance, self.field.attname)
+
+        return get(self, instance, cls)
+
+    DeferredAttribute.__get__ = __get__
+
+
+def patch_forward_relation() -> None:
+    get = ForwardManyToOneDescriptor.__get__
+
+    @wraps(get)
+    def __get__(self, instance, cls=None):
+        if (
+            instance is not None
+            and not self.field.is_cached(instance)
+            and None not in self.field.get_local_related_value(instance)
+        ):
+            report_lazy_load(instance, self.field.name)
+
+        return get(self, instance, cls)
+
+    ForwardManyToOneDescriptor.__get__ = __get__
+
+
+def patch_reverse_relation() -> None:
+    get = ReverseOneToOneDescriptor.__get__
+
+    @wraps(get)
+    def __get__(self, instance, cls=None):
+        if (
+            instance is not None
+            and not self.related.is_cached(instance)
+            and instance._is_pk_set()
+        ):
+            report_lazy_load(instance, self.related.get_accessor_name())
+
+        return get(self, instance, cls)
+
+    ReverseOneToOneDescriptor.__get__ = __get__
+
+
+def reset_related_managers() -> None:
+    for model in apps.get_models():
+        for descriptor in vars(model).values():
+            if isinstance(descriptor, ReverseManyToOneDescriptor):
+                descriptor.__dict__.pop("related_manager_cls", None)
+
+
+def patch_related_managers() -> None:
+    for name in RELATED_MANAGER_FACTORIES:
+        create_manager = getattr(related_descriptors, name)
+
+        @wraps(create_manager)
+        def create_tripwire_manager(
+            superclass, rel, *args, create_manager=create_manager, **kwargs
+        ):
+            manager_cls = create_manager(superclass, rel, *args, **kwargs)
+            accessor = (
+                rel.get_accessor_name()
+                if kwargs.get("reverse", True)
+                else rel.field.name
+            )
+
+            class TripwireRelatedManager(manager_cls):
+                def get_queryset(self):
+                    queryset = super().get_queryset()
+
+                    if queryset._result_cache is None:
+                        report_lazy_load(self.instance, accessor)
+
+                    return queryset
+
+            return TripwireRelatedManager
+
+        setattr(related_descriptors, name, create_tripwire_manager)
+
+    reset_related_managers()
+
+
+def is_lazy_load_tripwire_installed() -> bool:
+    return hasattr(QuerySet._fetch_all, "__wrapped__")
+
+
+def install_lazy_load_tripwire() -> None:
+    if is_lazy_load_tripwire_installed():
+        return
+
+    patch_fetch_all()
+    patch_deferred_attribute()
+    patch_forward_relation()
+    patch_reverse_relation()
+    patch_related_managers()
+
+
+def uninstall_lazy_load_tripwire() -> None:
+    if not is_lazy_load_tripwire_installed():
+        return
+
+    QuerySet._fetch_all = QuerySet._fetch_all.__wrapped__
+
+    for descriptor in (
+        DeferredAttribute,
+        ForwardManyToOneDescriptor,
+        ReverseOneToOneDescriptor,
+    ):
+        descriptor.__get__ = descriptor.__get__.__wrapped__
+
+    for name in RELATED_MANAGER_FACTORIES:
+        create_manager = getattr(related_descriptors, name)
+        setattr(related_descriptors, name, create_manager.__wrapped__)
+
+    reset_related_managers()
+
+
+@contextmanager
+def lazy_load_tripwire():
+    installed = is_lazy_load_tripwire_installed()
+    install_lazy_load_tripwire()
+
+    try:
+        yield
+    finally:
+        if not installed:
+            uninstall_lazy_load_tripwire()
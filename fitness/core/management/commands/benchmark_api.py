@@ -0,0 +1,115 @@
+import json
+from urllib.parse import urlsplit
+
+from core.benchmark import (
+    get_bearer,
+    get_commit,
+    get_stats,
+    get_stats_header,
+    get_stats_line,
+    http_sender,
+    send_requests,
+)
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+User = get_user_model()
+
+DEFAULT_PATHS = ("/api/schedule/", "/api/services/", "/api/trainers/", "/api/bookings/")
+
+
+class Command(BaseCommand):
+    help = "Нагрузочный тест API: сравнивает WSGI и ASGI серверы"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            metavar="NAME=URL",
+            help="Сервер, например wsgi=http://127.0.0.1:8000 (можно несколько раз)",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Путь API (можно указать несколько раз)",
+        )
+        parser.add_argument("--user", required=True, help="Имя пользователя")
+        parser.add_argument("--concurrency", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--output", help="Файл JSON с результатами")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Количество запросов должно быть не меньше двух")
+
+        if options["concurrency"] < 1:
+            raise CommandError("Количество соединений должно быть больше нуля")
+
+        targets = []
+
+        for target in options["target"] or []:
+            name, _, url = target.partition("=")
+            parts = urlsplit(url)
+
+            if parts.scheme != "http" or not parts.hostname:
+                raise CommandError(f"Неверный адрес сервера: '{target}'")
+
+            targets.append((name, (parts.hostname, parts.port or 80)))
+
+        if not targets:
+            raise CommandError("Укажите хотя бы один сервер через --target")
+
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь '{options['user']}' не найден")
+
+        headers = get_bearer(user)
+        paths = options["path"] or DEFAULT_PATHS
+        width = max(len(f"{name} {path}") for name, _ in targets for path in paths)
+
+        results = {name: {} for name, _ in targets}
+
+        self.stdout.write(get_stats_header("сервер и путь", width))
+
+        for path in paths:
+            requests = [("GET", path, None, headers)] * options["requests"]
+            baseline = None
+
+            for name, address in targets:
+                stats = get_stats(
+                    *send_requests(
+                        http_sender(address, options["timeout"]),
+                        requests,
+                        options["concurrency"],
+                    )
+                )
+                results[name][path] = stats
+                line = get_stats_line(f"{name} {path}", stats, width)
+
+                if baseline is None:
+                    baseline = stats
+                elif baseline["rps"]:
+                    line += f"  x{stats['rps'] / baseline['rps']:.2f}"
+
+                self.stdout.write(line)
+
+        if options["output"]:
+            report = {
+                "created_at": timezone.now().isoformat(),
+                "commit": get_commit(),
+                "concurrency": options["concurrency"],
+                "targets": {
+                    name: f"http://{host}:{port}" for name, (host, port) in targets
+                },
+                "results": results,
+            }
+
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+            self.stdout.write(
+                self.style.SUCCESS(f"Результаты сохранены в {options['output']}")
+            )
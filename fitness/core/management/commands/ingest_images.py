@@ -0,0 +1,39 @@
+from core.images import IMAGE_FIELDS, get_image_models, ingest_image, is_processed
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+
+class Command(BaseCommand):
+    help = "Перекодирует уже загруженные фотографии и создаёт WebP-варианты"
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+
+        for model in get_image_models():
+            field, _ = IMAGE_FIELDS[model._meta.label]
+            rows = (
+                model.objects.exclude(**{f"{field}__isnull": True})
+                .exclude(**{field: ""})
+                .values_list("pk", field)
+                .order_by("pk")
+            )
+
+            for pk, name in rows.iterator():
+                if is_processed(name):
+                    continue
+
+                try:
+                    if ingest_image(model, pk):
+                        processed += 1
+                except (OSError, ValidationError, Image.DecompressionBombError) as e:
+                    failed += 1
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"{model._meta.verbose_name} #{pk} ({name}): {e}"
+                        )
+                    )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработано фотографий: {processed}, ошибок: {failed}")
+        )
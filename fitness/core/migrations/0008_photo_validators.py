@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 04:54
+
+import core.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_alter_service_description_alter_trainer_achievements"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="service",
+            name="photo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="services/",
+                validators=[core.images.validate_image],
+                verbose_name="Фото",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="trainer",
+            name="photo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="trainers/",
+                validators=[core.images.validate_image],
+                verbose_name="Фото",
+            ),
+        ),
+    ]
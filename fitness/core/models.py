@@ -6,6 +6,8 @@ from django.urls import reverse
 
 from fitness.settings import DEFAULT_SERVICE_IMAGE, DEFAULT_TRAINER_IMAGE
 
+from .images import get_image_url, validate_image
+
 User = get_user_model()
 
 trainer_short_fields = (
@@ -13,6 +15,7 @@ trainer_short_fields = (
     "user__first_name",
     "user__last_name",
     "user__middle_name",
+    "user__username",
 )
 
 trainer_detail_fields = (
@@ -23,6 +26,7 @@ trainer_detail_fields = (
     "user__first_name",
     "user__last_name",
     "user__middle_name",
+    "user__username",
     "user__email",
     "user__phone_number",
 )
@@ -48,7 +52,11 @@ class Trainer(models.Model):
     achievements = models.TextField(blank=True, default="", verbose_name="Достижения")
     experience_since = models.DateField(blank=True, null=True, verbose_name="Стаж с")
     photo = models.ImageField(
-        upload_to="trainers/", blank=True, null=True, verbose_name="Фото"
+        upload_to="trainers/",
+        blank=True,
+        null=True,
+        validators=(validate_image,),
+        verbose_name="Фото",
     )
 
     class Meta:
@@ -62,7 +70,7 @@ class Trainer(models.Model):
     @property
     def avatar(self) -> str:
         if self.photo and hasattr(self.photo, "url"):
-            return self.photo.url
+            return get_image_url(self.photo.name)
         return DEFAULT_TRAINER_IMAGE
 
     @property
@@ -114,7 +122,11 @@ class Service(models.Model):
         max_digits=8, decimal_places=2, verbose_name="Стоимость"
     )
     photo = models.ImageField(
-        upload_to="services/", blank=True, null=True, verbose_name="Фото"
+        upload_to="services/",
+        blank=True,
+        null=True,
+        validators=(validate_image,),
+        verbose_name="Фото",
     )
     trainers = models.ManyToManyField(
         Trainer, blank=True, related_name="services", verbose_name="Тренеры"
@@ -135,7 +147,7 @@ class Service(models.Model):
     @property
     def avatar(self) -> str:
         if self.photo and hasattr(self.photo, "url"):
-            return self.photo.url
+            return get_image_url(self.photo.name)
         return DEFAULT_SERVICE_IMAGE
 
     @property
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .images import image_ingested, schedule_image_ingestion
+from .models import Service, Trainer
+from .versions import SERVICES_VERSION, TRAINERS_VERSION, invalidate
+
+User = get_user_model()
+
+trainer_user_fields = {
+    "first_name",
+    "last_name",
+    "middle_name",
+    "email",
+    "phone_number",
+}
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(image_ingested, sender=Service)
+@receiver(m2m_changed, sender=Service.trainers.through)
+def service_changed(sender, **kwargs):
+    invalidate(SERVICES_VERSION)
+
+
+@receiver(post_save, sender=Trainer)
+@receiver(post_delete, sender=Trainer)
+@receiver(image_ingested, sender=Trainer)
+def trainer_changed(sender, **kwargs):
+    invalidate(TRAINERS_VERSION, SERVICES_VERSION)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or (
+        update_fields is not None and not trainer_user_fields & set(update_fields)
+    ):
+        return
+
+    if Trainer.objects.filter(user_id=instance.pk).exists():
+        invalidate(TRAINERS_VERSION)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Trainer)
+@receiver(post_save, sender=Service)
+def photo_saved(sender, instance, update_fields=None, **kwargs):
+    schedule_image_ingestion(instance, update_fields)
@@ -0,0 +1,130 @@
+from datetime import date
+
+from django import template
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.contrib.admin.utils import get_fields_from_path
+from django.db import models
+from django.db.models import Max, Min
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+register = template.Library()
+
+
+def get_date_range(cl, field_name: str) -> tuple[date, date] | tuple[None, None]:
+    date_range = cl.queryset.aggregate(first=Min(field_name), last=Max(field_name))
+    first, last = date_range["first"], date_range["last"]
+
+    if first is None or last is None:
+        return None, None
+
+    field = get_fields_from_path(cl.model, field_name)[-1]
+
+    if isinstance(field, models.DateTimeField):
+        if timezone.is_aware(first):
+            first, last = timezone.localtime(first), timezone.localtime(last)
+
+        first, last = first.date(), last.date()
+
+    return first, last
+
+
+def bounded_date_hierarchy(cl) -> dict:
+    field_name = cl.date_hierarchy
+    year_field = f"{field_name}__year"
+    month_field = f"{field_name}__month"
+    day_field = f"{field_name}__day"
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    day_lookup = cl.params.get(day_field)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f"{field_name}__"])
+
+    if year_lookup and month_lookup and day_lookup:
+        day = date(int(year_lookup), int(month_lookup), int(day_lookup))
+        return {
+            "show": True,
+            "back": {
+                "link": link({year_field: year_lookup, month_field: month_lookup}),
+                "title": capfirst(formats.date_format(day, "YEAR_MONTH_FORMAT")),
+            },
+            "choices": [
+                {"title": capfirst(formats.date_format(day, "MONTH_DAY_FORMAT"))}
+            ],
+        }
+
+    first, last = get_date_range(cl, field_name)
+
+    if first is not None and not (year_lookup or month_lookup):
+        if first.year == last.year:
+            year_lookup = first.year
+            if first.month == last.month:
+                month_lookup = first.month
+
+    if year_lookup and month_lookup:
+        days = (
+            [first.replace(day=d) for d in range(first.day, last.day + 1)]
+            if first is not None
+            else []
+        )
+        return {
+            "show": True,
+            "back": {
+                "link": link({year_field: year_lookup}),
+                "title": str(year_lookup),
+            },
+            "choices": [
+                {
+                    "link": link(
+                        {
+                            year_field: year_lookup,
+                            month_field: month_lookup,
+                            day_field: day.day,
+                        }
+                    ),
+                    "title": capfirst(formats.date_format(day, "MONTH_DAY_FORMAT")),
+                }
+                for day in days
+            ],
+        }
+
+    if year_lookup:
+        months = (
+            [first.replace(month=m, day=1) for m in range(first.month, last.month + 1)]
+            if first is not None
+            else []
+        )
+        return {
+            "show": True,
+            "back": {"link": link({}), "title": _("All dates")},
+            "choices": [
+                {
+                    "link": link({year_field: year_lookup, month_field: month.month}),
+                    "title": capfirst(formats.date_format(month, "YEAR_MONTH_FORMAT")),
+                }
+                for month in months
+            ],
+        }
+
+    years = range(first.year, last.year + 1) if first is not None else ()
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {"link": link({year_field: str(year)}), "title": str(year)}
+            for year in years
+        ],
+    }
+
+
+@register.tag(name="bounded_date_hierarchy")
+def bounded_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=bounded_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
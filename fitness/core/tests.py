@@ -1,3 +1,478 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+from schedule.models import (
+    Booking,
+    Notification,
+    Schedule,
+    WaitlistEntry,
+    rebuild_occupancy,
+    rebuild_popularity,
+)
+from schedule.views import booking_list_async_view
+
+from .admin_utils import EstimatedCountPaginator
+from .images import (
+    get_image_url,
+    get_webp_name,
+    ingest_image,
+    is_processed,
+    run_ingest_image,
+)
+from .lazy_loads import (
+    LazyLoadError,
+    install_lazy_load_tripwire,
+    is_lazy_load_tripwire_installed,
+    lazy_load_tripwire,
+    uninstall_lazy_load_tripwire,
+)
+from .models import Service, Trainer
+from .versions import TRAINERS_VERSION, get_version
+from .views import trainer_list_async_view
+
+User = get_user_model()
+
+
+@override_settings(
+    LAZY_LOAD_TRIPWIRE="raise",
+    DEBUG_TOOLBAR_CONFIG={"SHOW_TOOLBAR_CALLBACK": lambda r: False},
+)
+class LazyLoadTripwireTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.enterClassContext(lazy_load_tripwire())
+
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(3)
+        ]
+        cls.trainers = [
+            Trainer.objects.create(
+                user=User.objects.create_user(
+                    f"trainer{i}", f"trainer{i}@example.com", last_name=f"Тренер{i}"
+                ),
+                slug=f"trainer-{i}",
+                specialization="Йога",
+            )
+            for i in range(2)
+        ]
+        cls.trainers.append(
+            Trainer.objects.create(
+                user=User.objects.create_user("nameless", "nameless@example.com"),
+                slug="nameless",
+                specialization="Йога",
+            )
+        )
+        cls.services = [
+            Service.objects.create(
+                name=f"Йога {i}",
+                slug=f"yoga-{i}",
+                duration=timedelta(hours=1),
+                price=100,
+                max_participants=2,
+            )
+            for i in range(2)
+        ]
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        schedules = []
+
+        for service in cls.services:
+            service.trainers.set(cls.trainers)
+
+            for i, trainer in enumerate(cls.trainers):
+                schedules += Schedule.objects.bulk_create(
+                    Schedule(
+                        service=service,
+                        trainer=trainer,
+                        start_time=start + timedelta(days=day, hours=i + service.pk),
+                    )
+                    for day in (-3, 1, 2)
+                )
+
+        bookings = Booking.objects.bulk_create(
+            Booking(schedule=schedule, client=client, canceled=client is cls.clients[1])
+            for schedule in schedules
+            for client in cls.clients[:2]
+        )
+        Schedule.objects.all().recount_bookings()
+        Booking.objects.filter(schedule=schedules[1], canceled=True).update(
+            canceled=False
+        )
+        WaitlistEntry.objects.create(client=cls.clients[2], schedule=schedules[1])
+        Notification.objects.bulk_create(
+            Notification(
+                client=cls.clients[0],
+                booking=booking,
+                kind=Notification.Kind.choices[0][0],
+                message="Место освободилось",
+            )
+            for booking in bookings[:4]
+        )
+        rebuild_popularity()
+        rebuild_occupancy()
+
+    def setUp(self):
+        cache.clear()
+
+    def assertPagesOk(self, user: User, urls: list[str], api: bool = False) -> None:
+        headers = {}
+
+        if api:
+            headers["Authorization"] = f"Bearer {AccessToken.for_user(user)}"
+        else:
+            self.client.force_login(user)
+
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, headers=headers)
+                self.assertEqual(response.status_code, 200)
+
+    def test_tripwire_raises_on_lazy_relation(self):
+        schedules = list(Schedule.objects.all())
+
+        with self.assertRaises(LazyLoadError):
+            schedules[0].service
+
+    def test_tripwire_raises_on_deferred_field(self):
+        schedules = list(Schedule.objects.only("start_time"))
+
+        with self.assertRaises(LazyLoadError):
+            schedules[0].booked_count
+
+    def test_tripwire_raises_on_related_manager(self):
+        schedules = list(Schedule.objects.all())
+        services = list(Service.objects.all())
+
+        for manager in (schedules[0].bookings, services[0].trainers):
+            with self.assertRaises(LazyLoadError):
+                list(manager.all())
+
+        schedules = list(Schedule.objects.prefetch_related("bookings"))
+        self.assertEqual(len(schedules[0].bookings.all()), 2)
+
+    def test_uninstall(self):
+        uninstall_lazy_load_tripwire()
+        self.addCleanup(install_lazy_load_tripwire)
+        schedules = list(Schedule.objects.all())
+
+        self.assertFalse(is_lazy_load_tripwire_installed())
+        self.assertEqual(len(schedules[0].bookings.all()), 2)
+        self.assertEqual(schedules[0].service.max_participants, 2)
+
+    def test_pages(self):
+        self.assertPagesOk(
+            self.clients[0],
+            [
+                reverse("home"),
+                reverse("trainers"),
+                reverse("trainer", kwargs={"trainer_slug": self.trainers[0].slug}),
+                reverse("services"),
+                reverse("service", kwargs={"service_slug": self.services[0].slug}),
+                reverse("schedule:schedule"),
+                reverse("schedule:bookings"),
+                reverse("users:profile"),
+            ],
+        )
+        self.assertPagesOk(
+            self.trainers[0].user, [reverse("schedule:trainer_schedule")]
+        )
+
+    def test_api(self):
+        self.assertPagesOk(
+            self.clients[0],
+            [
+                "/api/trainers/",
+                "/api/services/",
+                "/api/schedule/",
+                "/api/bookings/",
+                "/api/waitlist/",
+                "/api/notifications/",
+                "/api/users/me/",
+            ],
+            api=True,
+        )
+        self.assertPagesOk(self.clients[2], ["/api/waitlist/"], api=True)
+        self.assertPagesOk(self.trainers[0].user, ["/api/schedule/my/"], api=True)
+        self.assertPagesOk(
+            self.admin,
+            ["/api/analytics/occupancy/?group_by=service,trainer,weekday"],
+            api=True,
+        )
+
+    def test_admin(self):
+        urls = [
+            reverse(
+                f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist"
+            )
+            for model in admin.site._registry
+        ]
+        urls.append(
+            reverse(
+                "admin:schedule_schedule_change",
+                args=(Schedule.objects.values_list("pk", flat=True)[0],),
+            )
+        )
+
+        self.assertPagesOk(self.admin, urls)
+
+
+class ImageIngestionTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+    def upload(self, name: str) -> SimpleUploadedFile:
+        buffer = BytesIO()
+        Image.new("RGB", (100, 100), "white").save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+    def test_upload_named_like_processed_image(self):
+        user = User.objects.create_user("trainer", "trainer@example.com")
+        trainer = Trainer.objects.create(
+            user=user,
+            slug="trainer",
+            specialization="Йога",
+            photo=self.upload("face_opt_abcdefg.jpg"),
+        )
+
+        self.assertFalse(is_processed(trainer.photo.name))
+        self.assertEqual(
+            get_image_url(trainer.photo.name), default_storage.url(trainer.photo.name)
+        )
+
+        name = ingest_image(Trainer, trainer.pk)
+
+        self.assertTrue(is_processed(name))
+        self.assertEqual(get_image_url(name), default_storage.url(get_webp_name(name)))
+        self.assertTrue(default_storage.exists(get_webp_name(name)))
+        self.assertIsNone(ingest_image(Trainer, trainer.pk))
+
+    def create_trainer(self, photo: SimpleUploadedFile) -> Trainer:
+        user = User.objects.create_user("trainer", "trainer@example.com")
+        return Trainer.objects.create(
+            user=user, slug="trainer", specialization="Йога", photo=photo
+        )
+
+    def assertIngestionFails(self, trainer: Trainer) -> None:
+        with mock.patch("core.images.connections"):
+            with self.assertLogs("core.images", "ERROR"):
+                run_ingest_image(Trainer, trainer.pk)
+
+        self.assertEqual(
+            Trainer.objects.values_list("photo", flat=True).get(pk=trainer.pk),
+            trainer.photo.name,
+        )
+
+    def test_decompression_bomb_is_logged(self):
+        trainer = self.create_trainer(self.upload("bomb.jpg"))
+
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            self.assertIngestionFails(trainer)
+
+    def test_corrupt_image_is_logged(self):
+        trainer = self.create_trainer(
+            SimpleUploadedFile("broken.jpg", b"not an image", "image/jpeg")
+        )
+
+        self.assertIngestionFails(trainer)
+
+    def test_unexpected_error_is_logged(self):
+        trainer = self.create_trainer(self.upload("face.jpg"))
+
+        with mock.patch("core.images.ingest_image", side_effect=RuntimeError):
+            self.assertIngestionFails(trainer)
+
+    def test_exif_is_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x013B] = "Фотограф"
+        buffer = BytesIO()
+        Image.new("RGB", (160, 90), "white").save(buffer, "JPEG", exif=exif)
+        trainer = self.create_trainer(
+            SimpleUploadedFile("face.jpg", buffer.getvalue(), "image/jpeg")
+        )
+
+        name = ingest_image(Trainer, trainer.pk)
+
+        for processed in (name, get_webp_name(name)):
+            with default_storage.open(processed) as file, Image.open(file) as image:
+                self.assertEqual(image.size, (90, 160))
+                self.assertFalse(image.getexif())
+
+
+class PrefixSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ivanov = User.objects.create_user(
+            "ivanov", "ivanov@example.com", first_name="Иван", last_name="Иванов"
+        )
+        User.objects.create_user(
+            "petrov", "petrov@example.com", first_name="Иван", last_name="Петров"
+        )
+        User.objects.create_user(
+            "ivanova", "ivanova@example.com", first_name="Анна", last_name="Иванова"
+        )
+
+    def search(self, term: str) -> list[str]:
+        model_admin = admin.site._registry[User]
+        queryset, _ = model_admin.get_search_results(
+            RequestFactory().get("/"), User.objects.order_by("username"), term
+        )
+        return list(queryset.values_list("username", flat=True))
+
+    def test_single_word(self):
+        self.assertEqual(self.search("иванов"), ["ivanov", "ivanova"])
+
+    def test_words_match_across_fields(self):
+        self.assertEqual(self.search("Иванов Иван"), ["ivanov", "ivanova"])
+        self.assertEqual(self.search("Иванов Анна"), ["ivanova"])
+        self.assertEqual(self.search("иван петров"), ["petrov"])
+
+    def test_quoted_phrase(self):
+        self.assertEqual(self.search('"petrov@"'), ["petrov"])
+
+    def test_phone_and_middle_name(self):
+        User.objects.filter(username="petrov").update(
+            middle_name="Сергеевич", phone_number="+7 (999) 123-45-67"
+        )
+
+        self.assertEqual(self.search("сергеев"), ["petrov"])
+        self.assertEqual(self.search('"+7 (999) 123"'), ["petrov"])
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(username=f"client{i}", email=f"client{i}@example.com")
+            for i in range(5)
+        )
+
+    @mock.patch("core.admin_utils.ESTIMATED_COUNT_LIMIT", 2)
+    def test_rows_past_limit_are_reachable(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by("pk"), 2)
+
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual(len(paginator.page(3)), 1)
+
+
+class TrainerVersionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user("client", "client@example.com")
+        cls.trainer = Trainer.objects.create(
+            user=User.objects.create_user("trainer", "trainer@example.com"),
+            slug="trainer",
+            specialization="Йога",
+        )
+
+    def save_name(self, user: User) -> bool:
+        version = get_version(TRAINERS_VERSION)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = "Иван"
+            user.save()
+
+        return get_version(TRAINERS_VERSION) != version
+
+    def test_only_trainer_users_bump_version(self):
+        self.assertFalse(self.save_name(self.client_user))
+        self.assertTrue(self.save_name(self.trainer.user))
+
+
+class AsyncApiViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("client", "client@example.com")
+        cls.trainer = Trainer.objects.create(
+            user=User.objects.create_user("trainer", "trainer@example.com"),
+            slug="trainer",
+            specialization="Йога",
+        )
+
+    def get_request(self, path: str = "/api/trainers/", user=None, **kwargs):
+        request = AsyncRequestFactory().generic(
+            kwargs.pop("method", "GET"), path, **kwargs
+        )
+
+        async def auser():
+            return user or AnonymousUser()
+
+        request.auser = auser
+        return request
+
+    def get_bearer(self, token) -> dict[str, str]:
+        return {"headers": {"Authorization": f"Bearer {token}"}}
+
+    async def test_requires_authentication(self):
+        response = await trainer_list_async_view(self.get_request())
+
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response["WWW-Authenticate"].startswith("Bearer"))
+        self.assertIn("detail", json.loads(response.content))
+
+    async def test_invalid_token(self):
+        request = self.get_request(**self.get_bearer("broken"))
+        response = await trainer_list_async_view(request)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content)["code"], "token_not_valid")
+
+    async def test_unsafe_method(self):
+        request = self.get_request(method="POST", **self.get_bearer("broken"))
+        response = await trainer_list_async_view(request)
+
+        self.assertEqual(response.status_code, 405)
+
+    async def test_token_and_session_auth(self):
+        token = AccessToken.for_user(self.user)
+
+        for request in (
+            self.get_request(**self.get_bearer(token)),
+            self.get_request(user=self.user),
+        ):
+            response = await trainer_list_async_view(request)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                [trainer["id"] for trainer in json.loads(response.content)],
+                [self.trainer.pk],
+            )
+
+        request = self.get_request(
+            user=self.user, headers={"If-None-Match": response["ETag"]}
+        )
+        response = await trainer_list_async_view(request)
+
+        self.assertEqual(response.status_code, 304)
+
+    async def test_view_error_is_rendered(self):
+        request = self.get_request(
+            "/api/bookings/", user=self.user, QUERY_STRING="cursor=broken"
+        )
+        response = await booking_list_async_view(request)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {"detail": "Неверный курсор"})
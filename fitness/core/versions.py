@@ -0,0 +1,48 @@
+import time
+from datetime import UTC, datetime
+
+from django.core.cache import caches
+from django.db import transaction
+from django.views.decorators.http import condition
+
+SERVICES_VERSION = "services"
+TRAINERS_VERSION = "trainers"
+
+
+def _version_key(name: str) -> str:
+    return f"version:{name}"
+
+
+def get_version(name: str) -> int:
+    cache = caches["shared"]
+    key = _version_key(name)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def get_version_time(name: str) -> datetime:
+    return datetime.fromtimestamp(get_version(name) / 1e9, tz=UTC)
+
+
+def bump_version(name: str) -> None:
+    caches["shared"].set(_version_key(name), time.time_ns(), timeout=None)
+
+
+def invalidate(*names: str) -> None:
+    for name in names:
+        transaction.on_commit(lambda name=name: bump_version(name))
+
+
+def version_condition(name: str):
+    def etag(request, *args, **kwargs) -> str:
+        return f"{name}-{get_version(name)}"
+
+    def last_modified(request, *args, **kwargs) -> datetime:
+        return get_version_time(name)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
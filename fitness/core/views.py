@@ -1,11 +1,14 @@
-from dateutil.relativedelta import relativedelta
-from django.db.models import Count, Prefetch, Q
+from django.db.models import Prefetch
 from django.shortcuts import render
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import DetailView, ListView
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
+from schedule.models import ServicePopularity, TrainerPopularity
+from schedule.utils import month_start
 
+from .async_api import api_response, async_api_view
 from .models import (
     Service,
     Trainer,
@@ -15,57 +18,37 @@ from .models import (
     trainer_short_fields,
 )
 from .serializers import ServiceSerializer, TrainerSerializer
+from .versions import SERVICES_VERSION, TRAINERS_VERSION, version_condition
 
 
 def home(request):
-    start_date = timezone.localdate(timezone.now()).replace(day=1)
-    end_date = start_date + relativedelta(months=1)
-    date_range = (start_date, end_date)
-
-    popular_trainers = (
-        Trainer.objects.annotate(
-            count_distinct_clients=Count(
-                "schedule__bookings__client",
-                filter=Q(schedule__bookings__canceled=False)
-                & Q(schedule__start_time__date__range=date_range),
-                distinct=True,
-            ),
-            count_clients=Count(
-                "schedule__bookings__client",
-                filter=Q(schedule__bookings__canceled=False)
-                & Q(schedule__start_time__date__range=date_range),
-            ),
+    month = month_start(timezone.now())
+
+    popular_trainers = [
+        stats.trainer
+        for stats in TrainerPopularity.objects.filter(
+            month=month, distinct_clients__gt=0, bookings_count__gt=0
         )
-        .filter(count_distinct_clients__gt=0, count_clients__gt=0)
-        .select_related("user")
-        .only("slug", *trainer_short_fields)
+        .select_related("trainer__user")
+        .only("trainer__slug", *(f"trainer__{field}" for field in trainer_short_fields))
         .order_by(
-            "-count_distinct_clients",
-            "-count_clients",
-            "user__last_name",
-            "user__first_name",
-            "user__middle_name",
+            "-distinct_clients",
+            "-bookings_count",
+            "trainer__user__last_name",
+            "trainer__user__first_name",
+            "trainer__user__middle_name",
+        )[:3]
+    ]
+
+    popular_services = [
+        stats.service
+        for stats in ServicePopularity.objects.filter(
+            month=month, distinct_clients__gt=0, bookings_count__gt=0
         )
-    )[:3]
-
-    popular_services = (
-        Service.objects.annotate(
-            count_distinct_clients=Count(
-                "schedule__bookings__client",
-                filter=Q(schedule__bookings__canceled=False)
-                & Q(schedule__start_time__date__range=date_range),
-                distinct=True,
-            ),
-            count_clients=Count(
-                "schedule__bookings__client",
-                filter=Q(schedule__bookings__canceled=False)
-                & Q(schedule__start_time__date__range=date_range),
-            ),
-        )
-        .filter(count_distinct_clients__gt=0, count_clients__gt=0)
-        .only("slug", *service_short_fields)
-        .order_by("-count_distinct_clients", "-count_clients", "name")
-    )[:3]
+        .select_related("service")
+        .only("service__slug", *(f"service__{field}" for field in service_short_fields))
+        .order_by("-distinct_clients", "-bookings_count", "service__name")[:3]
+    ]
 
     context = {
         "title": "Главная",
@@ -121,6 +104,7 @@ class ServiceListView(ListView):
     extra_context = {"title": "Занятия"}
 
 
+@method_decorator(version_condition(TRAINERS_VERSION), name="get")
 class TrainerListAPIView(ListAPIView):
     queryset = (
         Trainer.objects.select_related("user")
@@ -131,9 +115,38 @@ class TrainerListAPIView(ListAPIView):
     permission_classes = (IsAuthenticated,)
 
 
+@method_decorator(version_condition(SERVICES_VERSION), name="get")
 class ServiceListAPIView(ListAPIView):
     queryset = Service.objects.prefetch_related(
         Prefetch("trainers", queryset=Trainer.objects.only("id"))
     ).order_by("id")
     serializer_class = ServiceSerializer
     permission_classes = (IsAuthenticated,)
+
+
+@async_api_view
+@version_condition(TRAINERS_VERSION)
+async def trainer_list_async_view(request):
+    trainers = [
+        trainer
+        async for trainer in TrainerListAPIView.queryset.all().aiterator(
+            chunk_size=2000
+        )
+    ]
+    serializer = TrainerSerializer(trainers, many=True, context={"request": request})
+
+    return api_response(serializer.data)
+
+
+@async_api_view
+@version_condition(SERVICES_VERSION)
+async def service_list_async_view(request):
+    services = [
+        service
+        async for service in ServiceListAPIView.queryset.all().aiterator(
+            chunk_size=2000
+        )
+    ]
+    serializer = ServiceSerializer(services, many=True, context={"request": request})
+
+    return api_response(serializer.data)
@@ -84,6 +84,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "fitness.wsgi.application"
+ASGI_APPLICATION = "fitness.asgi.application"
+ASYNC_API_VIEWS = os.getenv("ASYNC_API_VIEWS") == "True"
 
 
 # Database
@@ -93,10 +95,70 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# "shared" holds data versions and token revocations, which every worker process
+# must see. The in-process fallback only suits a single worker: with several
+# workers set SHARED_CACHE_URL to a Redis server that does not evict keys
+# (maxmemory-policy noeviction, requires the redis package).
+
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": SHARED_CACHE_URL,
+        }
+        if SHARED_CACHE_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "shared",
+        }
+    ),
+}
+
+
+# Schedule seat events
+# "local" broadcasts within one process, "database" polls a change table
+# and works across several worker processes.
+
+SCHEDULE_EVENTS_BACKEND = "local"
+
+
+# Login throttling
+# Token buckets per client IP and per account: (capacity, seconds per token).
+# "memory" keeps buckets in the process, "cache" shares them through CACHES.
+
+LOGIN_THROTTLE_STORE = "memory"
+
+LOGIN_THROTTLE_RATES = {
+    "ip": (30, 2),
+    "account": (5, 60),
+}
+
+# Number of reverse proxies in front of the app. When set, the client IP is
+# taken from TRUSTED_PROXY_HEADER as the address added by the outermost proxy.
+
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
+TRUSTED_PROXY_HEADER = "HTTP_X_FORWARDED_FOR"
+
+
+# Lazy-load tripwire
+# Reports deferred fields and unloaded relations read from objects that were
+# fetched as part of a list (N+1): "warn" logs with a stack trace, "raise" fails.
+
+LAZY_LOAD_TRIPWIRE = os.getenv("LAZY_LOAD_TRIPWIRE", "warn" if DEBUG else "")
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +198,12 @@ STATICFILES_DIRS = [
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
 
+# Uploaded photos are re-encoded in a background thread pool; the uploaded
+# original is deleted unless IMAGE_KEEP_ORIGINAL is set.
+
+IMAGE_KEEP_ORIGINAL = os.getenv("IMAGE_KEEP_ORIGINAL") == "True"
+IMAGE_PROCESSING_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -167,9 +235,11 @@ DEFAULT_USER_IMAGE = MEDIA_URL + "users/default.png"
 DEFAULT_TRAINER_IMAGE = MEDIA_URL + "trainers/default.svg"
 DEFAULT_SERVICE_IMAGE = MEDIA_URL + "services/default.svg"
 
+JWT_TOKEN_USER = os.getenv("JWT_TOKEN_USER") == "True"
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.TokenUserAuthentication',
         'rest_framework.authentication.SessionAuthentication'
     )
 }
@@ -205,7 +275,7 @@ SIMPLE_JWT = {
     "JTI_CLAIM": "jti",
 
     "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
-    "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "users.serializers.TokenBlacklistSerializer",
 }
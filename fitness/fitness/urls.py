@@ -15,46 +15,91 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from core.views import ServiceListAPIView, TrainerListAPIView
+from core.views import (
+    ServiceListAPIView,
+    TrainerListAPIView,
+    service_list_async_view,
+    trainer_list_async_view,
+)
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 from rest_framework_simplejwt.views import TokenBlacklistView, TokenRefreshView
 from schedule.views import (
+    BookingBatchCancelAPIView,
+    BookingBatchCreateAPIView,
     BookingCancelAPIView,
     BookingListCreateAPIView,
+    NotificationListAPIView,
+    NotificationReadAPIView,
+    OccupancyAnalyticsAPIView,
     ScheduleListAPIView,
     TrainerScheduleListAPIView,
+    WaitlistJoinAPIView,
+    WaitlistLeaveAPIView,
+    WaitlistListAPIView,
+    booking_list_async_view,
+    schedule_list_async_view,
+    seat_events_view,
 )
 from users.views import (
     CreateUserAPIView,
     DeleteUserPhotoAPIView,
+    LoginThrottleAPIView,
     TokensObtainView,
     UserAPIView,
 )
 
 from fitness import settings
 
+if settings.ASYNC_API_VIEWS:
+    trainer_list_view = trainer_list_async_view
+    service_list_view = service_list_async_view
+    schedule_list_view = schedule_list_async_view
+    booking_list_view = booking_list_async_view
+else:
+    trainer_list_view = TrainerListAPIView.as_view()
+    service_list_view = ServiceListAPIView.as_view()
+    schedule_list_view = ScheduleListAPIView.as_view()
+    booking_list_view = BookingListCreateAPIView.as_view()
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("core.urls")),
     path("users/", include("users.urls", namespace="users")),
     path("schedule/", include("schedule.urls", namespace="schedule")),
     path("__debug__/", include("debug_toolbar.urls")),
-    path("api/trainers/", TrainerListAPIView.as_view()),
-    path("api/services/", ServiceListAPIView.as_view()),
-    path("api/schedule/", ScheduleListAPIView.as_view()),
-    path("api/bookings/", BookingListCreateAPIView.as_view()),
+    path("api/trainers/", trainer_list_view),
+    path("api/services/", service_list_view),
+    path("api/schedule/", schedule_list_view),
+    path("api/bookings/", booking_list_view),
     path("api/bookings/<int:booking_id>/cancel/", BookingCancelAPIView.as_view()),
+    path("api/bookings/batch/", BookingBatchCreateAPIView.as_view()),
+    path("api/bookings/batch/cancel/", BookingBatchCancelAPIView.as_view()),
     path("api/schedule/my/", TrainerScheduleListAPIView.as_view()),
+    path("api/schedule/<int:schedule_id>/waitlist/", WaitlistJoinAPIView.as_view()),
+    path(
+        "api/schedule/<int:schedule_id>/waitlist/leave/",
+        WaitlistLeaveAPIView.as_view(),
+    ),
+    path("api/waitlist/", WaitlistListAPIView.as_view()),
+    path("api/notifications/", NotificationListAPIView.as_view()),
+    path("api/notifications/read/", NotificationReadAPIView.as_view()),
+    path("api/analytics/occupancy/", OccupancyAnalyticsAPIView.as_view()),
     path("api/users/", CreateUserAPIView.as_view()),
     path("api/users/me/", UserAPIView.as_view()),
     path("api/users/me/photo/", DeleteUserPhotoAPIView.as_view()),
+    path("api/users/login-throttle/", LoginThrottleAPIView.as_view()),
     path("api/token/", TokensObtainView.as_view(), name="tokens_obtain"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/token/blacklist/", TokenBlacklistView.as_view(), name="token_blacklist"),
 ]
 
+if settings.ASYNC_API_VIEWS:
+    urlpatterns.append(
+        path("api/schedule/events/", seat_events_view, name="seat_events")
+    )
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
@@ -1,11 +1,52 @@
 from datetime import timedelta
 
+from core.admin_utils import (
+    LargeTableAdminMixin,
+    PrefixSearchMixin,
+    UserRelatedFieldListFilter,
+)
 from django.contrib import admin, messages
-from django.db import IntegrityError
-from django.db.models import Count, Q, QuerySet
+from django.db.models import QuerySet
 from django.http import HttpRequest
+from django.utils import timezone
 
-from .models import Booking, Schedule
+from .export import export_csv_response
+from .forms import BookingAdminForm
+from .models import (
+    Booking,
+    Notification,
+    Schedule,
+    ScheduleTemplate,
+    WaitlistEntry,
+    create_schedule,
+    track_occupancy_many,
+    track_popularity_many,
+)
+from .views import release_seat, reserve_seat
+
+TEMPLATE_MATERIALIZE_WEEKS = 4
+CONFLICTS_REPORT_LIMIT = 10
+
+
+def report_schedule_creation(
+    modeladmin: admin.ModelAdmin,
+    request: HttpRequest,
+    created: list[Schedule],
+    conflicts: list[tuple[Schedule, str]],
+) -> None:
+    modeladmin.message_user(request, f"Добавлено записей - {len(created)}.")
+
+    for obj, reason in conflicts[:CONFLICTS_REPORT_LIMIT]:
+        modeladmin.message_user(
+            request, f"Пропущено '{obj}' ({obj.trainer}): {reason}", messages.WARNING
+        )
+
+    if len(conflicts) > CONFLICTS_REPORT_LIMIT:
+        modeladmin.message_user(
+            request,
+            f"И ещё пропущено записей - {len(conflicts) - CONFLICTS_REPORT_LIMIT}.",
+            messages.WARNING,
+        )
 
 
 class BookingInline(admin.TabularInline):
@@ -24,7 +65,7 @@ class BookingInline(admin.TabularInline):
 
 
 @admin.register(Schedule)
-class ScheduleAdmin(admin.ModelAdmin):
+class ScheduleAdmin(LargeTableAdminMixin, PrefixSearchMixin, admin.ModelAdmin):
     inlines = (BookingInline,)
     list_display = (
         "service",
@@ -38,9 +79,10 @@ class ScheduleAdmin(admin.ModelAdmin):
     autocomplete_fields = ("service", "trainer")
     date_hierarchy = "start_time"
     readonly_fields = ("bookings_count", "count_remained_seats")
-    search_fields = ("start_time__gte",)
-    list_filter = ("service", "trainer")
-    actions = ("duplicate_schedule",)
+    search_fields = ("service__name", "trainer__user__last_name")
+    search_help_text = "Поиск по началу названия занятия или фамилии тренера"
+    list_filter = ("service", ("trainer", UserRelatedFieldListFilter))
+    actions = ("duplicate_schedule", "export_csv")
     save_as = True
     save_on_top = True
 
@@ -52,7 +94,7 @@ class ScheduleAdmin(admin.ModelAdmin):
     def max_participants(self, schedule: Schedule) -> int:
         return schedule.service.max_participants
 
-    @admin.display(description="Записано")
+    @admin.display(description="Записано", ordering="booked_count")
     def bookings_count(self, schedule: Schedule) -> int:
         return schedule.bookings_count
 
@@ -61,39 +103,80 @@ class ScheduleAdmin(admin.ModelAdmin):
         return schedule.count_remained_seats
 
     def get_queryset(self, request: HttpRequest):
-        return (
-            super()
-            .get_queryset(request)
-            .select_related("service", "trainer__user")
-            .annotate(
-                not_canceled_bookings_count=Count("bookings", Q(bookings__canceled=False))
-            )
+        return super().get_queryset(request).select_related("service", "trainer__user")
+
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+
+        if formset.model is not Booking:
+            return
+
+        changed = [
+            booking
+            for booking, fields in formset.changed_objects
+            if "canceled" in fields
+        ]
+
+        if not changed:
+            return
+
+        Schedule.objects.filter(pk=form.instance.pk).recount_bookings()
+        track_popularity_many(
+            (form.instance, booking.client_id, -1 if booking.canceled else 1)
+            for booking in changed
+        )
+        track_occupancy_many(
+            (form.instance, -1, 1) if booking.canceled else (form.instance, 1, -1)
+            for booking in changed
         )
 
     @admin.action(description="Создать копию на следующую неделю")
     def duplicate_schedule(self, request: HttpRequest, queryset: QuerySet):
         new_schedule = [
             Schedule(
-                service_id=obj.service_id,
-                trainer_id=obj.trainer_id,
+                service=obj.service,
+                trainer=obj.trainer,
                 start_time=obj.start_time + timedelta(days=7),
             )
             for obj in queryset
         ]
 
-        try:
-            Schedule.objects.bulk_create(new_schedule)
-            self.message_user(request, f"Добавлено записей - {len(new_schedule)}.")
-        except IntegrityError:
-            self.message_user(
-                request,
-                "Найдены дубликаты расписания! Проверьте данные и попробуйте ещё раз!",
-                messages.ERROR,
-            )
+        created, conflicts = create_schedule(new_schedule)
+        report_schedule_creation(self, request, created, conflicts)
+
+    @admin.action(description="Выгрузить в CSV")
+    def export_csv(self, request: HttpRequest, queryset: QuerySet):
+        return export_csv_response(request, "schedule", queryset)
+
+
+@admin.register(ScheduleTemplate)
+class ScheduleTemplateAdmin(admin.ModelAdmin):
+    list_display = (
+        "service",
+        "trainer",
+        "weekday",
+        "start_time",
+        "valid_from",
+        "valid_to",
+    )
+    list_filter = ("weekday", "service", ("trainer", UserRelatedFieldListFilter))
+    list_select_related = ("service", "trainer__user")
+    autocomplete_fields = ("service", "trainer")
+    actions = ("materialize",)
+    save_as = True
+
+    @admin.action(
+        description=f"Создать расписание на {TEMPLATE_MATERIALIZE_WEEKS} недели вперёд"
+    )
+    def materialize(self, request: HttpRequest, queryset: QuerySet):
+        created, conflicts = queryset.materialize(
+            timezone.localdate(), TEMPLATE_MATERIALIZE_WEEKS
+        )
+        report_schedule_creation(self, request, created, conflicts)
 
 
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(LargeTableAdminMixin, PrefixSearchMixin, admin.ModelAdmin):
     list_display = (
         "client_name",
         "service_name",
@@ -102,12 +185,17 @@ class BookingAdmin(admin.ModelAdmin):
         "booked_at",
         "canceled",
     )
-    list_filter = ("canceled", "schedule__trainer", "schedule__service")
+    list_filter = (
+        "canceled",
+        ("schedule__trainer", UserRelatedFieldListFilter),
+        "schedule__service",
+    )
     fieldsets = (
         ("Информация о клиенте", {"fields": ("client",)}),
         ("Детали занятия", {"fields": ("schedule",)}),
         ("Статус и время", {"fields": ("canceled", "booked_at")}),
     )
+    form = BookingAdminForm
     readonly_fields = ("client", "schedule", "booked_at")
     date_hierarchy = "booked_at"
     list_editable = ("canceled",)
@@ -115,11 +203,12 @@ class BookingAdmin(admin.ModelAdmin):
         "client__username",
         "client__first_name",
         "client__last_name",
-        "client__middle_name",
     )
+    search_help_text = "Поиск по началу логина, имени или фамилии клиента"
     save_on_top = True
     list_per_page = 20
     list_max_show_all = 50
+    actions = ("set_canceled", "set_not_canceled", "export_csv")
 
     @admin.display(description="Клиент", ordering="client__last_name")
     def client_name(self, booking: Booking):
@@ -143,3 +232,56 @@ class BookingAdmin(admin.ModelAdmin):
             .get_queryset(request)
             .select_related("client", "schedule__service", "schedule__trainer__user")
         )
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault("form", BookingAdminForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def save_model(self, request, obj: Booking, form, change):
+        if not change or "canceled" not in form.changed_data:
+            super().save_model(request, obj, form, change)
+
+        elif obj.canceled:
+            release_seat(obj)
+
+        elif reserve_seat(obj.schedule, obj.client_id, obj) is None:
+            self.message_user(
+                request,
+                f"На занятие '{obj.schedule}' нет свободных мест",
+                messages.ERROR,
+            )
+
+    @admin.action(description="Отменить записи")
+    def set_canceled(self, request: HttpRequest, queryset: QuerySet) -> None:
+        count = queryset.set_canceled(True)
+        self.message_user(
+            request, f"Количество изменённых записей: {count}", messages.WARNING
+        )
+
+    @admin.action(description="Восстановить записи")
+    def set_not_canceled(self, request: HttpRequest, queryset: QuerySet) -> None:
+        count = queryset.set_canceled(False)
+        self.message_user(request, f"Количество изменённых записей: {count}")
+
+    @admin.action(description="Выгрузить в CSV")
+    def export_csv(self, request: HttpRequest, queryset: QuerySet):
+        return export_csv_response(request, "bookings", queryset)
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ("client", "schedule", "created_at")
+    list_select_related = ("client", "schedule__service")
+    readonly_fields = ("created_at",)
+    autocomplete_fields = ("schedule",)
+    raw_id_fields = ("client",)
+    list_per_page = 20
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("client", "kind", "message", "created_at", "is_read")
+    list_filter = ("kind", "is_read")
+    list_select_related = ("client",)
+    readonly_fields = ("client", "booking", "kind", "message", "created_at")
+    list_per_page = 20
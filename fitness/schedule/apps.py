@@ -5,3 +5,6 @@ class ScheduleConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "schedule"
     verbose_name = "Расписание"
+
+    def ready(self):
+        from . import signals  # noqa: F401
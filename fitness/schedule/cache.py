@@ -0,0 +1,41 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from core.versions import get_version, invalidate
+from django.core.cache import cache
+
+SCHEDULE_VERSION = "schedule"
+SCHEDULE_CACHE_TIMEOUT = 60 * 10
+
+
+def invalidate_schedule() -> None:
+    invalidate(SCHEDULE_VERSION)
+
+
+def _schedule_key(name: str, params: dict[str, Any]) -> str:
+    params_key = ":".join(f"{key}={value}" for key, value in sorted(params.items()))
+    return f"schedule:{name}:{get_version(SCHEDULE_VERSION)}:{params_key}"
+
+
+def get_cached_schedule(name: str, load: Callable[[], Any], **params) -> Any:
+    key = _schedule_key(name, params)
+    result = cache.get(key)
+
+    if result is None:
+        result = load()
+        cache.set(key, result, SCHEDULE_CACHE_TIMEOUT)
+
+    return result
+
+
+async def aget_cached_schedule(
+    name: str, load: Callable[[], Awaitable[Any]], **params
+) -> Any:
+    key = _schedule_key(name, params)
+    result = await cache.aget(key)
+
+    if result is None:
+        result = await load()
+        await cache.aset(key, result, SCHEDULE_CACHE_TIMEOUT)
+
+    return result
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import Schedule, SeatChangeEvent
+
+SEAT_EVENTS_POLL_INTERVAL = 1
+SEAT_EVENTS_RETENTION = timedelta(hours=1)
+SEAT_EVENTS_PRUNE_INTERVAL = 60
+
+SeatEvent = tuple[int, dict[str, int]]
+
+
+class LocalSubscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue[SeatEvent] = asyncio.Queue()
+
+    def put(self, events: list[SeatEvent]) -> None:
+        for event in events:
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> list[SeatEvent]:
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except TimeoutError:
+            return []
+
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+
+        return events
+
+
+class LocalSeatEvents:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: set[LocalSubscription] = set()
+        self._last_id = 0
+
+    def publish(self, changes: list[dict[str, int]]) -> None:
+        with self._lock:
+            events = []
+            for change in changes:
+                self._last_id += 1
+                events.append((self._last_id, change))
+
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, events)
+            except RuntimeError:
+                self._discard(subscription)
+
+    def _discard(self, subscription: LocalSubscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @asynccontextmanager
+    async def subscribe(self, last_event_id: int | None = None):
+        subscription = LocalSubscription(asyncio.get_running_loop())
+
+        with self._lock:
+            self._subscriptions.add(subscription)
+
+        try:
+            yield subscription
+        finally:
+            self._discard(subscription)
+
+
+class DatabaseSubscription:
+    def __init__(self, last_id: int):
+        self.last_id = last_id
+
+    async def get(self, timeout: float) -> list[SeatEvent]:
+        deadline = time.monotonic() + timeout
+
+        while True:
+            events = [
+                (pk, {"schedule_id": schedule_id, "remaining_seats": remaining})
+                async for pk, schedule_id, remaining in SeatChangeEvent.objects.filter(
+                    pk__gt=self.last_id
+                )
+                .order_by("pk")
+                .values_list("pk", "schedule_id", "remaining_seats")[:100]
+            ]
+
+            if events:
+                self.last_id = events[-1][0]
+                return events
+
+            if time.monotonic() >= deadline:
+                return []
+
+            await asyncio.sleep(SEAT_EVENTS_POLL_INTERVAL)
+
+
+class DatabaseSeatEvents:
+    def __init__(self):
+        self._pruned_at = 0.0
+
+    def publish(self, changes: list[dict[str, int]]) -> None:
+        SeatChangeEvent.objects.bulk_create(
+            SeatChangeEvent(**change) for change in changes
+        )
+
+        if time.monotonic() - self._pruned_at > SEAT_EVENTS_PRUNE_INTERVAL:
+            self._pruned_at = time.monotonic()
+            SeatChangeEvent.objects.filter(
+                created_at__lt=timezone.now() - SEAT_EVENTS_RETENTION
+            ).delete()
+
+    @asynccontextmanager
+    async def subscribe(self, last_event_id: int | None = None):
+        if last_event_id is None:
+            stats = await SeatChangeEvent.objects.aaggregate(last_id=Max("pk"))
+            last_event_id = stats["last_id"] or 0
+
+        yield DatabaseSubscription(last_event_id)
+
+
+SEAT_EVENTS_BACKENDS = {
+    "local": LocalSeatEvents,
+    "database": DatabaseSeatEvents,
+}
+
+seat_events = SEAT_EVENTS_BACKENDS[settings.SCHEDULE_EVENTS_BACKEND]()
+
+
+def publish_seat_changes(schedule_ids: Iterable[int]) -> None:
+    changes = [
+        {"schedule_id": pk, "remaining_seats": remaining}
+        for pk, remaining in Schedule.objects.filter(pk__in=schedule_ids).values_list(
+            "pk", F("service__max_participants") - F("booked_count")
+        )
+    ]
+
+    if changes:
+        seat_events.publish(changes)
+
+
+def notify_seats_changed(*schedule_ids: int) -> None:
+    transaction.on_commit(lambda: publish_seat_changes(schedule_ids))
@@ -0,0 +1,194 @@
+import csv
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import QuerySet
+from django.http import HttpRequest, StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+booking_export_fields = (
+    "pk",
+    "client__username",
+    "client__last_name",
+    "client__first_name",
+    "client__middle_name",
+    "client__email",
+    "client__phone_number",
+    "schedule__service__name",
+    "schedule__trainer__user__last_name",
+    "schedule__trainer__user__first_name",
+    "schedule__trainer__user__middle_name",
+    "schedule__start_time",
+    "booked_at",
+    "canceled",
+)
+
+schedule_export_fields = (
+    "pk",
+    "service__name",
+    "trainer__user__last_name",
+    "trainer__user__first_name",
+    "trainer__user__middle_name",
+    "start_time",
+    "service__duration",
+    "service__max_participants",
+    "booked_count",
+)
+
+
+class Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_full_name(*parts: str) -> str:
+    return " ".join(part for part in parts if part)
+
+
+def format_datetime(value: datetime) -> str:
+    return timezone.localtime(value).strftime("%d.%m.%Y %H:%M")
+
+
+def iter_booking_rows(queryset: QuerySet) -> Iterator[tuple]:
+    rows = (
+        queryset.order_by("pk")
+        .values_list(*booking_export_fields)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    for (
+        pk,
+        username,
+        last_name,
+        first_name,
+        middle_name,
+        email,
+        phone_number,
+        service_name,
+        trainer_last_name,
+        trainer_first_name,
+        trainer_middle_name,
+        start_time,
+        booked_at,
+        canceled,
+    ) in rows:
+        yield (
+            pk,
+            get_full_name(last_name, first_name, middle_name) or username,
+            email,
+            phone_number,
+            service_name,
+            get_full_name(trainer_last_name, trainer_first_name, trainer_middle_name),
+            format_datetime(start_time),
+            format_datetime(booked_at),
+            "Да" if canceled else "Нет",
+        )
+
+
+def iter_schedule_rows(queryset: QuerySet) -> Iterator[tuple]:
+    rows = (
+        queryset.order_by("pk")
+        .values_list(*schedule_export_fields)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    for (
+        pk,
+        service_name,
+        trainer_last_name,
+        trainer_first_name,
+        trainer_middle_name,
+        start_time,
+        duration,
+        max_participants,
+        booked_count,
+    ) in rows:
+        yield (
+            pk,
+            service_name,
+            get_full_name(trainer_last_name, trainer_first_name, trainer_middle_name),
+            format_datetime(start_time),
+            int(duration.total_seconds() // 60),
+            max_participants,
+            booked_count,
+            max(max_participants - booked_count, 0),
+        )
+
+
+EXPORTS: dict[str, tuple[tuple[str, ...], Callable[[QuerySet], Iterator[tuple]]]] = {
+    "bookings": (
+        (
+            "ID",
+            "Клиент",
+            "Email",
+            "Телефон",
+            "Занятие",
+            "Тренер",
+            "Время занятия",
+            "Время записи",
+            "Отменена",
+        ),
+        iter_booking_rows,
+    ),
+    "schedule": (
+        (
+            "ID",
+            "Занятие",
+            "Тренер",
+            "Начало",
+            "Продолжительность (мин)",
+            "Кол-во мест",
+            "Записано",
+            "Свободных мест",
+        ),
+        iter_schedule_rows,
+    ),
+}
+
+
+def stream_csv(header: Iterable[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo(), delimiter=";")
+    yield "\ufeff" + writer.writerow(header)
+
+    chunk = []
+    for row in rows:
+        chunk.append(writer.writerow(row))
+
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield "".join(chunk)
+
+
+def export_csv(name: str, queryset: QuerySet) -> Iterator[str]:
+    header, iter_rows = EXPORTS[name]
+    return stream_csv(header, iter_rows(queryset))
+
+
+async def aiter_chunks(chunks: Iterator[str]) -> AsyncIterator[str]:
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
+
+
+def export_csv_response(
+    request: HttpRequest, name: str, queryset: QuerySet
+) -> StreamingHttpResponse:
+    chunks = export_csv(name, queryset)
+
+    if isinstance(request, ASGIRequest):
+        chunks = aiter_chunks(chunks)
+
+    filename = f"{name}-{timezone.localdate():%Y-%m-%d}.csv"
+    return StreamingHttpResponse(
+        chunks,
+        content_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,21 @@
+from django import forms
+
+from .models import Booking
+
+
+class BookingAdminForm(forms.ModelForm):
+    class Meta:
+        model = Booking
+        fields = "__all__"
+
+    def clean_canceled(self) -> bool:
+        canceled = self.cleaned_data["canceled"]
+        booking = self.instance
+
+        if booking.pk and booking.canceled and not canceled:
+            if booking.schedule.count_remained_seats <= 0:
+                raise forms.ValidationError(
+                    f"На занятие '{booking.schedule}' нет свободных мест"
+                )
+
+        return canceled
@@ -0,0 +1,322 @@
+import json
+import threading
+import time
+from itertools import cycle, islice
+
+from core.benchmark import (
+    BenchmarkRequest,
+    client_sender,
+    get_bearer,
+    get_commit,
+    get_stats,
+    get_stats_header,
+    get_stats_line,
+    http_sender,
+    send_requests,
+)
+from core.models import Service, Trainer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.db.models import Count, F, Max
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from schedule.models import Booking, Schedule
+from users.tokens import UserRefreshToken
+
+User = get_user_model()
+
+UNLIMITED_LOGIN_RATES = {"ip": (10**9, 1), "account": (10**9, 1)}
+
+page_endpoints = {
+    "home": ("/", "session"),
+    "schedule": ("/schedule/", "session"),
+    "trainer": ("/trainers/{trainer_slug}/", "session"),
+    "service": ("/services/{service_slug}/", "session"),
+    "api_schedule": ("/api/schedule/", "client"),
+    "api_bookings": ("/api/bookings/", "client"),
+    "api_schedule_my": ("/api/schedule/my/", "trainer"),
+}
+
+ENDPOINTS = (
+    *page_endpoints,
+    "api_booking_create",
+    "token_obtain",
+    "token_refresh",
+)
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def make_requests(name: str, context: dict, count: int) -> list[BenchmarkRequest]:
+    if name in page_endpoints:
+        path, auth = page_endpoints[name]
+        path = path.format(**context)
+
+        if auth == "session":
+            headers = {"Cookie": context["cookie"]}
+        else:
+            headers = get_bearer(context[auth])
+
+        return [("GET", path, None, headers)] * count
+
+    user = context["client"]
+
+    if name == "api_booking_create":
+        schedule_ids = list(
+            Schedule.objects.filter(
+                start_time__gt=timezone.now(),
+                booked_count__lt=F("service__max_participants"),
+            )
+            .exclude(bookings__client=user)
+            .order_by("start_time")
+            .values_list("pk", flat=True)[:count]
+        )
+
+        if not schedule_ids:
+            raise CommandError("Нет свободных занятий для записи")
+
+        headers = get_bearer(user)
+        return [
+            ("POST", "/api/bookings/", {"schedule_id": pk}, headers)
+            for pk in islice(cycle(schedule_ids), count)
+        ]
+
+    if name == "token_obtain":
+        data = {"username": user.username, "password": context["password"]}
+        return [("POST", "/api/token/", data, {})] * count
+
+    return [
+        ("POST", "/api/token/refresh/", {"refresh": str(token)}, {})
+        for token in (UserRefreshToken.for_user(user) for _ in range(count))
+    ]
+
+
+def find_regressions(
+    results: dict, baseline: dict, max_regression: float
+) -> list[tuple[str, float, float]]:
+    regressions = []
+
+    for name, stats in results.items():
+        previous = baseline.get("results", {}).get(name)
+
+        if previous and stats["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append((name, previous["p95_ms"], stats["p95_ms"]))
+
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Замеряет задержки HTTP и API эндпоинтов и сохраняет результаты в JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            choices=ENDPOINTS,
+            help="Эндпоинт (можно указать несколько раз)",
+        )
+        parser.add_argument("--user", help="Клиент (по умолчанию самый активный)")
+        parser.add_argument("--trainer", help="Slug тренера для /api/schedule/my/")
+        parser.add_argument("--password", default="load12345")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--server",
+            action="store_true",
+            help="Через локальный многопоточный сервер вместо тестового клиента",
+        )
+        parser.add_argument("--output", help="Файл JSON с результатами")
+        parser.add_argument("--compare", help="Файл JSON с результатами для сравнения")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=0.2,
+            help="Допустимый рост p95 относительно --compare (0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Количество запросов должно быть не меньше двух")
+
+        if options["warmup"] < 0:
+            raise CommandError(
+                "Количество прогревочных запросов не может быть меньше нуля"
+            )
+
+        if options["concurrency"] < 1:
+            raise CommandError("Количество потоков должно быть больше нуля")
+
+        baseline = None
+
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(
+                    f"Не удалось прочитать '{options['compare']}': {exc}"
+                )
+
+        endpoints = options["endpoints"] or ENDPOINTS
+        context = self.get_context(options, endpoints)
+
+        with override_settings(DEBUG=False, LOGIN_THROTTLE_RATES=UNLIMITED_LOGIN_RATES):
+            results = self.run(endpoints, context, options)
+
+        commit = get_commit()
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "commit": commit,
+            "mode": "server" if options["server"] else "client",
+            "concurrency": options["concurrency"],
+            "database": {
+                "vendor": connection.vendor,
+                "name": str(connection.settings_dict["NAME"]),
+                "users": User.objects.count(),
+                "schedule": Schedule.objects.count(),
+                "bookings": Booking.objects.count(),
+            },
+            "async_api_views": settings.ASYNC_API_VIEWS,
+            "results": results,
+        }
+        output = options["output"] or f"benchmark-{commit or int(time.time())}.json"
+
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+        self.write_table(results, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Результаты сохранены в {output}"))
+
+        if baseline is not None:
+            if (baseline.get("mode"), baseline.get("concurrency")) != (
+                report["mode"],
+                report["concurrency"],
+            ):
+                self.stdout.write(
+                    self.style.WARNING(
+                        "Режим или число потоков отличаются от --compare"
+                    )
+                )
+
+            regressions = find_regressions(results, baseline, options["max_regression"])
+
+            if regressions:
+                raise CommandError(
+                    "Рост p95: "
+                    + ", ".join(
+                        f"{name} {before:.1f} → {after:.1f} мс"
+                        for name, before, after in regressions
+                    )
+                )
+
+    def get_context(self, options: dict, endpoints: tuple[str, ...]) -> dict:
+        if options["user"]:
+            client = User.objects.filter(username=options["user"]).first()
+        else:
+            top = (
+                Booking.not_canceled.values("client_id")
+                .annotate(count=Count("pk"))
+                .order_by("-count")
+                .first()
+            )
+            client = top and User.objects.get(pk=top["client_id"])
+
+        if client is None:
+            raise CommandError("Клиент не найден, заполните базу командой seed_load")
+
+        trainers = Trainer.objects.select_related("user")
+
+        if options["trainer"]:
+            trainer = trainers.filter(slug=options["trainer"]).first()
+        else:
+            trainer = (
+                trainers.annotate(count=Count("schedule")).order_by("-count").first()
+            )
+
+        service = (
+            Service.objects.annotate(count=Count("schedule")).order_by("-count").first()
+        )
+
+        if trainer is None or service is None:
+            raise CommandError("Тренер или услуга не найдены")
+
+        if "token_obtain" in endpoints and not client.check_password(
+            options["password"]
+        ):
+            raise CommandError(f"Неверный пароль пользователя '{client.username}'")
+
+        session = Client()
+        session.force_login(client)
+
+        return {
+            "client": client,
+            "trainer": trainer.user,
+            "password": options["password"],
+            "cookie": "; ".join(
+                f"{key}={morsel.value}" for key, morsel in session.cookies.items()
+            ),
+            "trainer_slug": trainer.slug,
+            "service_slug": service.slug,
+        }
+
+    def run(self, endpoints: tuple[str, ...], context: dict, options: dict) -> dict:
+        server = None
+        sender_factory = client_sender
+
+        if options["server"]:
+            server = ThreadedWSGIServer(
+                ("127.0.0.1", 0), QuietWSGIRequestHandler, allow_reuse_address=False
+            )
+            server.set_app(WSGIHandler())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            sender_factory = http_sender(server.server_address)
+
+        bookings = Booking.objects.filter(client=context["client"])
+        last_booking_id = Booking.objects.aggregate(last_id=Max("pk"))["last_id"] or 0
+        canceled_ids = list(bookings.filter(canceled=True).values_list("pk", flat=True))
+        results = {}
+
+        try:
+            for name in endpoints:
+                requests = make_requests(
+                    name, context, options["warmup"] + options["requests"]
+                )
+                send_requests(sender_factory, requests[: options["warmup"]], 1)
+                results[name] = get_stats(
+                    *send_requests(
+                        sender_factory,
+                        requests[options["warmup"] :],
+                        options["concurrency"],
+                    )
+                )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+            bookings.filter(pk__gt=last_booking_id).delete()
+            bookings.filter(pk__in=canceled_ids).set_canceled(True)
+
+        return results
+
+    def write_table(self, results: dict, baseline: dict | None) -> None:
+        self.stdout.write(get_stats_header("эндпоинт"))
+
+        for name, stats in results.items():
+            line = get_stats_line(name, stats)
+            previous = (baseline or {}).get("results", {}).get(name)
+
+            if previous and previous["p95_ms"]:
+                line += f"  p95 x{stats['p95_ms'] / previous['p95_ms']:.2f}"
+
+            self.stdout.write(line)
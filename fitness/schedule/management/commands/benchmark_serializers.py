@@ -0,0 +1,155 @@
+import random
+import time
+from datetime import timedelta
+
+from core.models import Service, Trainer
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils import timezone
+from schedule.models import Booking, Schedule
+from schedule.serializers import (
+    BookedScheduleRowSerializer,
+    BookedScheduleSerializer,
+    ScheduleRowSerializer,
+    ScheduleSerializer,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость сериализаторов расписания и записей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            action="append",
+            help="Количество строк (можно указать несколько раз)",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = options["rows"] or [1000, 10000]
+        repeat = options["repeat"]
+
+        request = RequestFactory().get("/")
+        request.user = User(pk=1)
+
+        for size in sizes:
+            schedule_objs, bookings, booking_ids = self.make_data(size)
+            schedule_rows = [self.schedule_row(obj) for obj in schedule_objs]
+            booking_rows = [self.booking_row(obj) for obj in bookings]
+
+            for obj in schedule_objs:
+                setattr(obj, "booking_id", booking_ids.get(obj.pk))
+
+            cases = (
+                (
+                    "schedule",
+                    lambda: ScheduleSerializer(
+                        schedule_objs, many=True, context={"request": request}
+                    ).data,
+                    lambda: ScheduleRowSerializer(
+                        request.user.pk, booking_ids=booking_ids
+                    ).serialize(schedule_rows),
+                ),
+                (
+                    "bookings",
+                    lambda: BookedScheduleSerializer(bookings, many=True).data,
+                    lambda: BookedScheduleRowSerializer(request.user.pk).serialize(
+                        booking_rows
+                    ),
+                ),
+            )
+
+            for name, slow, fast in cases:
+                if [dict(item) for item in slow()] != fast():
+                    raise CommandError(f"Результаты сериализации '{name}' различаются")
+
+                slow_time = self.measure(slow, repeat) / size
+                fast_time = self.measure(fast, repeat) / size
+
+                self.stdout.write(
+                    f"{name:<10} {size:>7} строк: "
+                    f"DRF {slow_time * 1e6:8.2f} мкс/строка, "
+                    f"быстрый {fast_time * 1e6:8.2f} мкс/строка, "
+                    f"x{slow_time / fast_time:.1f}"
+                )
+
+    @staticmethod
+    def measure(func, repeat: int) -> float:
+        best = float("inf")
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+
+        return best
+
+    @staticmethod
+    def make_data(size: int):
+        now = timezone.now().replace(microsecond=0)
+        services = [
+            Service(
+                pk=i,
+                duration=timedelta(minutes=random.choice((45, 60, 90))),
+                max_participants=random.randint(5, 20),
+            )
+            for i in range(1, 11)
+        ]
+        trainers = [Trainer(pk=i, user_id=i) for i in range(1, 11)]
+
+        schedule_objs = []
+        bookings = []
+        booking_ids = {}
+
+        for pk in range(1, size + 1):
+            service = random.choice(services)
+            obj = Schedule(
+                pk=pk,
+                service=service,
+                trainer=random.choice(trainers),
+                start_time=now + timedelta(hours=random.randint(-48, 7 * 24)),
+                booked_count=random.randint(0, service.max_participants),
+            )
+            booking = Booking(
+                pk=pk, schedule=obj, client_id=1, canceled=random.random() < 0.2
+            )
+
+            schedule_objs.append(obj)
+            bookings.append(booking)
+
+            if not booking.canceled and random.random() < 0.3:
+                booking_ids[obj.pk] = booking.pk
+
+        return schedule_objs, bookings, booking_ids
+
+    @staticmethod
+    def schedule_row(obj: Schedule) -> dict:
+        return {
+            "id": obj.pk,
+            "service_id": obj.service_id,
+            "trainer_id": obj.trainer_id,
+            "trainer__user_id": obj.trainer.user_id,
+            "start_time": obj.start_time,
+            "booked_count": obj.booked_count,
+            "service__duration": obj.service.duration,
+            "service__max_participants": obj.service.max_participants,
+        }
+
+    @staticmethod
+    def booking_row(obj: Booking) -> dict:
+        return {
+            "id": obj.pk,
+            "canceled": obj.canceled,
+            "schedule_id": obj.schedule_id,
+            "schedule__service_id": obj.schedule.service_id,
+            "schedule__trainer_id": obj.schedule.trainer_id,
+            "schedule__start_time": obj.schedule.start_time,
+            "schedule__booked_count": obj.schedule.booked_count,
+            "schedule__service__duration": obj.schedule.service.duration,
+            "schedule__service__max_participants": obj.schedule.service.max_participants,
+        }
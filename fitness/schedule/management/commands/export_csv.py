@@ -0,0 +1,54 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from schedule.export import EXPORTS, export_csv
+from schedule.models import Booking, Schedule
+
+
+class Command(BaseCommand):
+    help = "Выгружает записи или расписание в CSV за указанный период"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=tuple(EXPORTS))
+        parser.add_argument("--since", help="Первый день в формате ГГГГ-ММ-ДД")
+        parser.add_argument("--until", help="Последний день в формате ГГГГ-ММ-ДД")
+        parser.add_argument("--trainer", type=int, help="ID тренера")
+        parser.add_argument("--service", type=int, help="ID занятия")
+        parser.add_argument("--output", help="Файл для выгрузки (по умолчанию stdout)")
+
+    def parse_date(self, value: str) -> datetime:
+        try:
+            day = datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def handle(self, *args, **options):
+        if options["name"] == "bookings":
+            queryset, prefix = Booking.objects.all(), "schedule__"
+        else:
+            queryset, prefix = Schedule.objects.all(), ""
+
+        if options["since"]:
+            since = self.parse_date(options["since"])
+            queryset = queryset.filter(**{f"{prefix}start_time__gte": since})
+
+        if options["until"]:
+            until = self.parse_date(options["until"]) + timedelta(days=1)
+            queryset = queryset.filter(**{f"{prefix}start_time__lt": until})
+
+        if options["trainer"]:
+            queryset = queryset.filter(**{f"{prefix}trainer_id": options["trainer"]})
+
+        if options["service"]:
+            queryset = queryset.filter(**{f"{prefix}service_id": options["service"]})
+
+        if not options["output"]:
+            for chunk in export_csv(options["name"], queryset):
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as file:
+            file.writelines(export_csv(options["name"], queryset))
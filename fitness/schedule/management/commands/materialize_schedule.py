@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from schedule.models import ScheduleTemplate
+
+
+class Command(BaseCommand):
+    help = "Создаёт занятия по шаблонам расписания на несколько недель вперёд"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--weeks", type=int, default=4)
+        parser.add_argument("--start", help="Первый день в формате ГГГГ-ММ-ДД")
+        parser.add_argument(
+            "--template",
+            type=int,
+            action="append",
+            dest="templates",
+            help="ID шаблона (можно указать несколько раз)",
+        )
+
+    def handle(self, *args, **options):
+        if options["weeks"] < 1:
+            raise CommandError("Количество недель должно быть больше нуля")
+
+        start_date = timezone.localdate()
+
+        if options["start"]:
+            try:
+                start_date = datetime.strptime(options["start"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+
+        templates = ScheduleTemplate.objects.all()
+
+        if options["templates"]:
+            templates = templates.filter(pk__in=options["templates"])
+
+        created, conflicts = templates.materialize(start_date, options["weeks"])
+
+        for obj, reason in conflicts:
+            self.stdout.write(
+                self.style.WARNING(f"Пропущено '{obj}' ({obj.trainer}): {reason}")
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано занятий: {len(created)}, пропущено: {len(conflicts)}"
+            )
+        )
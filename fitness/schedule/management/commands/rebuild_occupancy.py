@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from schedule.models import get_changed_days, rebuild_occupancy
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает дневную загрузку занятий за дни, в которых менялись "
+        "занятия или записи (запускать раз в сутки)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=26,
+            help="Учитывать изменения за последние N часов",
+        )
+        parser.add_argument(
+            "--day",
+            action="append",
+            dest="days",
+            help="День в формате ГГГГ-ММ-ДД (можно указать несколько раз)",
+        )
+        parser.add_argument("--all", action="store_true", help="Пересчитать всё")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            days = None
+        elif options["days"]:
+            try:
+                days = {
+                    datetime.strptime(value, "%Y-%m-%d").date()
+                    for value in options["days"]
+                }
+            except ValueError:
+                raise CommandError("День должен быть в формате ГГГГ-ММ-ДД")
+        else:
+            days = get_changed_days(timezone.now() - timedelta(hours=options["hours"]))
+
+        count = rebuild_occupancy(days)
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано строк загрузки: {count}"))
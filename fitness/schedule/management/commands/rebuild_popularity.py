@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from schedule.models import rebuild_popularity
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает месячную популярность тренеров и услуг"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month",
+            action="append",
+            dest="months",
+            help="Месяц в формате ГГГГ-ММ (можно указать несколько раз)",
+        )
+
+    def handle(self, *args, **options):
+        months = None
+
+        if options["months"]:
+            try:
+                months = [
+                    datetime.strptime(value, "%Y-%m").date()
+                    for value in options["months"]
+                ]
+            except ValueError:
+                raise CommandError("Месяц должен быть в формате ГГГГ-ММ")
+
+        rebuild_popularity(months)
+        self.stdout.write(self.style.SUCCESS("Популярность пересчитана"))
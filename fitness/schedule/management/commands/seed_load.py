@@ -0,0 +1,494 @@
+import os
+import random
+import time
+from collections.abc import Iterable
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+from multiprocessing import get_context
+
+from core.models import Service, Trainer
+from core.versions import SERVICES_VERSION, TRAINERS_VERSION, invalidate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Model
+from django.utils import timezone
+from schedule.cache import invalidate_schedule
+from schedule.models import (
+    Booking,
+    Schedule,
+    rebuild_occupancy,
+    rebuild_popularity,
+)
+
+User = get_user_model()
+
+SEED_HOURS = range(7, 22)
+SEED_FUTURE_DAYS = 28
+SEED_BOOKING_WINDOW = timedelta(days=14)
+POPULARITY_SKEW = 0.8
+CLIENT_ACTIVITY_SHAPE = 1.5
+CLIENT_ACTIVITY_MAX = 50
+SEED_SQLITE_CACHE_SIZE = -262_144
+
+booking_state = {}
+
+first_names = (
+    ("Александр", "М"),
+    ("Дмитрий", "М"),
+    ("Максим", "М"),
+    ("Иван", "М"),
+    ("Сергей", "М"),
+    ("Андрей", "М"),
+    ("Анна", "Ж"),
+    ("Мария", "Ж"),
+    ("Елена", "Ж"),
+    ("Ольга", "Ж"),
+    ("Наталья", "Ж"),
+    ("Екатерина", "Ж"),
+)
+
+last_names = (
+    "Иванов",
+    "Смирнов",
+    "Кузнецов",
+    "Попов",
+    "Васильев",
+    "Петров",
+    "Соколов",
+    "Михайлов",
+    "Новиков",
+    "Фёдоров",
+)
+
+service_names = (
+    "Йога",
+    "Пилатес",
+    "Кроссфит",
+    "Стретчинг",
+    "Сайкл",
+    "Бокс",
+    "Функциональный тренинг",
+    "Аквааэробика",
+    "Зумба",
+    "Силовая тренировка",
+)
+
+
+def iter_batches(items, size: int):
+    iterator = iter(items)
+
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def get_weights(count: int) -> list[float]:
+    return [1 / (rank + 1) ** POPULARITY_SKEW for rank in range(count)]
+
+
+def make_name() -> tuple[str, str, str]:
+    first_name, gender = random.choice(first_names)
+    last_name = random.choice(last_names)
+
+    if gender == "Ж":
+        last_name += "а"
+
+    return first_name, last_name, gender
+
+
+def make_user(username: str, email: str, password: str) -> User:
+    first_name, last_name, gender = make_name()
+
+    return User(
+        username=username,
+        email=email,
+        password=password,
+        first_name=first_name,
+        last_name=last_name,
+        gender=gender,
+    )
+
+
+def get_insert_sql(model: type[Model], fields: Iterable[str]) -> str:
+    quote_name = connection.ops.quote_name
+    columns = [model._meta.get_field(name).column for name in fields]
+
+    return "INSERT INTO {} ({}) VALUES ({})".format(
+        quote_name(model._meta.db_table),
+        ", ".join(quote_name(column) for column in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+
+
+def get_row_defaults(model: type[Model], exclude: Iterable[str], **values) -> dict:
+    instance = model(**values)
+
+    return {
+        field.name: field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in exclude
+    }
+
+
+def create_users(prefix: str, count: int, password: str, batch_size: int) -> list[int]:
+    fields = ("username", "email", "first_name", "last_name", "gender")
+    defaults = get_row_defaults(User, fields, password=password)
+    sql = get_insert_sql(User, (*fields, *defaults))
+    rows = (
+        (f"{prefix}_{i}", f"{prefix}_{i}@example.com", *make_name(), *defaults.values())
+        for i in range(count)
+    )
+
+    for batch in iter_batches(rows, batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+
+    return list(
+        User.objects.filter(username__startswith=f"{prefix}_")
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def create_trainers(prefix: str, count: int, password: str) -> list[Trainer]:
+    users = User.objects.bulk_create(
+        make_user(
+            f"{prefix}_trainer_{i}", f"{prefix}_trainer_{i}@example.com", password
+        )
+        for i in range(count)
+    )
+
+    return Trainer.objects.bulk_create(
+        Trainer(
+            user=user,
+            slug=f"{prefix}-trainer-{i}",
+            specialization=random.choice(service_names),
+        )
+        for i, user in enumerate(users)
+    )
+
+
+def create_services(prefix: str, count: int, trainers: list[Trainer]) -> list[Service]:
+    services = Service.objects.bulk_create(
+        Service(
+            name=f"{random.choice(service_names)} {i + 1}",
+            slug=f"{prefix}-service-{i}",
+            duration=timedelta(minutes=random.choice((45, 60, 90))),
+            price=Decimal(random.randrange(500, 3000, 100)),
+            max_participants=random.randint(10, 40),
+            color=f"#{random.randrange(0x1000000):06x}",
+        )
+        for i in range(count)
+    )
+
+    Service.trainers.through.objects.bulk_create(
+        Service.trainers.through(service_id=service.pk, trainer_id=trainer.pk)
+        for service in services
+        for trainer in random.sample(trainers, min(len(trainers), random.randint(2, 6)))
+    )
+    return services
+
+
+def plan_schedule(
+    services: list[Service], days: int, sessions_per_day: int
+) -> list[tuple[Service, int, datetime, float]]:
+    service_weights = get_weights(len(services))
+    service_trainers = {
+        service.pk: list(service.trainers.values_list("pk", flat=True))
+        for service in services
+    }
+    trainer_weights = {}
+    first_day = timezone.localdate() + timedelta(days=SEED_FUTURE_DAYS - days)
+    sessions_per_hour = max(sessions_per_day // len(SEED_HOURS), 1)
+    plan = []
+
+    for day in range(days):
+        date = first_day + timedelta(days=day)
+
+        for hour in SEED_HOURS:
+            start_time = timezone.make_aware(
+                datetime.combine(date, datetime.min.time()).replace(hour=hour)
+            )
+            busy = set()
+
+            for index in random.choices(
+                range(len(services)), service_weights, k=sessions_per_hour
+            ):
+                service = services[index]
+                free = [pk for pk in service_trainers[service.pk] if pk not in busy]
+
+                if not free:
+                    continue
+
+                trainer_id = random.choice(free)
+                busy.add(trainer_id)
+                trainer_weight = trainer_weights.setdefault(
+                    trainer_id, random.uniform(0.3, 1)
+                )
+                plan.append(
+                    (
+                        service,
+                        trainer_id,
+                        start_time,
+                        service_weights[index] * trainer_weight,
+                    )
+                )
+
+    return plan
+
+
+def plan_bookings(
+    plan: list[tuple[Service, int, datetime, float]], bookings: int
+) -> list[int]:
+    capacity = [service.max_participants for service, *_ in plan]
+    demand = [weight * random.uniform(0.5, 1.5) for *_, weight in plan]
+    counts = [0] * len(plan)
+    remaining = min(bookings, sum(capacity))
+
+    while remaining > 0:
+        open_slots = [i for i, count in enumerate(counts) if count < capacity[i]]
+        total_demand = sum(demand[i] for i in open_slots)
+        added = 0
+
+        for i in open_slots:
+            share = max(round(remaining * demand[i] / total_demand), 1)
+            share = min(share, capacity[i] - counts[i], remaining - added)
+            counts[i] += share
+            added += share
+
+            if added >= remaining:
+                break
+
+        remaining -= added
+
+    return counts
+
+
+def create_schedule(
+    plan: list[tuple[Service, int, datetime, float]],
+    booked_counts: list[int],
+    batch_size: int,
+) -> list[Schedule]:
+    return Schedule.objects.bulk_create(
+        (
+            Schedule(
+                service=service,
+                trainer_id=trainer_id,
+                start_time=start_time,
+                booked_count=booked_count,
+            )
+            for (service, trainer_id, start_time, _), booked_count in zip(
+                plan, booked_counts
+            )
+        ),
+        batch_size=batch_size,
+    )
+
+
+def get_client_weights(count: int) -> list[float]:
+    return list(
+        accumulate(
+            min(random.paretovariate(CLIENT_ACTIVITY_SHAPE), CLIENT_ACTIVITY_MAX)
+            for _ in range(count)
+        )
+    )
+
+
+def tune_connection() -> None:
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA cache_size = {SEED_SQLITE_CACHE_SIZE}")
+
+
+def split_bookings(
+    schedule: list[Schedule], booked_counts: list[int], batch_size: int
+) -> list[tuple[int, list[tuple[int, datetime, int]]]]:
+    chunks = []
+    chunk, size = [], 0
+
+    for schedule_obj, booked_count in zip(schedule, booked_counts):
+        chunk.append((schedule_obj.pk, schedule_obj.start_time, booked_count))
+        size += booked_count
+
+        if size >= batch_size:
+            chunks.append((random.getrandbits(32), chunk))
+            chunk, size = [], 0
+
+    if chunk:
+        chunks.append((random.getrandbits(32), chunk))
+
+    return chunks
+
+
+def insert_bookings(chunk: tuple[int, list[tuple[int, datetime, int]]]) -> int:
+    seed, slots = chunk
+    rng = random.Random(seed)
+    client_ids = booking_state["client_ids"]
+    cum_weights = booking_state["cum_weights"]
+    cancel_factor = booking_state["cancel_ratio"] / (1 - booking_state["cancel_ratio"])
+    now = timezone.make_naive(timezone.now(), UTC)
+    rows = []
+
+    for schedule_id, start_time, booked_count in slots:
+        canceled_count = round(booked_count * cancel_factor * rng.uniform(0.5, 1.5))
+        total = min(booked_count + canceled_count, len(client_ids))
+        clients = set(rng.choices(client_ids, cum_weights=cum_weights, k=total))
+
+        while len(clients) < total:
+            clients.add(rng.choice(client_ids))
+
+        latest = min(timezone.make_naive(start_time, UTC), now)
+        rows.extend(
+            (
+                client_id,
+                schedule_id,
+                latest - rng.random() * SEED_BOOKING_WINDOW,
+                i >= booked_count,
+                now,
+            )
+            for i, client_id in enumerate(clients)
+        )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(booking_state["insert_sql"], rows)
+
+    return len(rows)
+
+
+@contextmanager
+def deferred_indexes(model: type[Model]):
+    with connection.schema_editor() as editor:
+        for index in model._meta.indexes:
+            editor.remove_index(model, index)
+
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for index in model._meta.indexes:
+                editor.add_index(model, index)
+
+
+def create_bookings(
+    schedule: list[Schedule],
+    booked_counts: list[int],
+    client_ids: list[int],
+    cancel_ratio: float,
+    batch_size: int,
+    workers: int,
+) -> int:
+    booking_state.update(
+        client_ids=client_ids,
+        cum_weights=get_client_weights(len(client_ids)),
+        cancel_ratio=cancel_ratio,
+        insert_sql=get_insert_sql(
+            Booking, ("client", "schedule", "booked_at", "canceled", "updated_at")
+        ),
+    )
+    chunks = split_bookings(schedule, booked_counts, batch_size)
+
+    if workers == 1:
+        return sum(map(insert_bookings, chunks))
+
+    connections.close_all()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("fork"),
+        initializer=tune_connection,
+    ) as executor:
+        return sum(executor.map(insert_bookings, chunks))
+
+
+class Command(BaseCommand):
+    help = "Генерирует большой объём тестовых данных для нагрузочного тестирования"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--trainers", type=int, default=200)
+        parser.add_argument("--services", type=int, default=300)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--sessions-per-day", type=int, default=150)
+        parser.add_argument("--bookings", type=int, default=1_000_000)
+        parser.add_argument("--cancel-ratio", type=float, default=0.15)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 4))
+        parser.add_argument("--prefix", default="load")
+        parser.add_argument("--password", default="load12345")
+        parser.add_argument("--seed", type=int)
+
+    def log(self, message: str) -> None:
+        elapsed = time.perf_counter() - self.started_at
+        self.stdout.write(f"[{elapsed:6.1f} с] {message}")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+
+        if min(options["users"], options["trainers"], options["services"]) < 1:
+            raise CommandError(
+                "Количество пользователей, тренеров и услуг должно быть больше нуля"
+            )
+
+        if options["days"] < 1 or options["sessions_per_day"] < 1:
+            raise CommandError(
+                "Количество дней и занятий в день должно быть больше нуля"
+            )
+
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError(
+                "Размер пакета и количество процессов должны быть больше нуля"
+            )
+
+        if not 0 <= options["cancel_ratio"] < 1:
+            raise CommandError("Доля отмен должна быть в диапазоне [0, 1)")
+
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(
+                f"Данные с префиксом '{prefix}' уже существуют, укажите другой --prefix"
+            )
+
+        random.seed(options["seed"])
+        self.started_at = time.perf_counter()
+        password = make_password(options["password"])
+        batch_size = options["batch_size"]
+        tune_connection()
+
+        client_ids = create_users(prefix, options["users"], password, batch_size)
+        self.log(f"Пользователей: {len(client_ids)}")
+
+        with transaction.atomic():
+            trainers = create_trainers(prefix, options["trainers"], password)
+            services = create_services(prefix, options["services"], trainers)
+        self.log(f"Тренеров: {len(trainers)}, услуг: {len(services)}")
+
+        plan = plan_schedule(services, options["days"], options["sessions_per_day"])
+        booked_counts = plan_bookings(
+            plan, round(options["bookings"] * (1 - options["cancel_ratio"]))
+        )
+
+        with transaction.atomic():
+            schedule = create_schedule(plan, booked_counts, batch_size)
+        self.log(f"Занятий: {len(schedule)}")
+
+        with deferred_indexes(Booking):
+            bookings_count = create_bookings(
+                schedule,
+                booked_counts,
+                client_ids,
+                options["cancel_ratio"],
+                batch_size,
+                options["workers"],
+            )
+        self.log(f"Записей: {bookings_count}")
+
+        rebuild_popularity()
+        rebuild_occupancy()
+        invalidate_schedule()
+        invalidate(SERVICES_VERSION, TRAINERS_VERSION)
+        self.log("Популярность и загрузка пересчитаны")
+
+        self.stdout.write(self.style.SUCCESS("Тестовые данные созданы"))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 04:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_booked_count(apps, schema_editor):
+    Schedule = apps.get_model("schedule", "Schedule")
+    Booking = apps.get_model("schedule", "Booking")
+
+    bookings_count = (
+        Booking.objects.filter(schedule=OuterRef("pk"), canceled=False)
+        .order_by()
+        .values("schedule")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Schedule.objects.update(booked_count=Coalesce(Subquery(bookings_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("schedule", "0004_alter_booking_client"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="schedule",
+            name="booked_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Записано"
+            ),
+        ),
+        migrations.RunPython(fill_booked_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,155 @@
+# Generated by Django 5.2 on 2026-10-18 04:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def fill_popularity(apps, schema_editor):
+    Booking = apps.get_model("schedule", "Booking")
+
+    for model_name, subject_field in (
+        ("TrainerPopularity", "trainer"),
+        ("ServicePopularity", "service"),
+    ):
+        model = apps.get_model("schedule", model_name)
+        rows = (
+            Booking.objects.filter(canceled=False)
+            .annotate(
+                month=TruncMonth(
+                    "schedule__start_time", output_field=models.DateField()
+                )
+            )
+            .values("month", f"schedule__{subject_field}")
+            .annotate(
+                distinct_clients=Count("client", distinct=True),
+                bookings_count=Count("pk"),
+            )
+            .order_by()
+        )
+        model.objects.bulk_create(
+            model(
+                month=row["month"],
+                distinct_clients=row["distinct_clients"],
+                bookings_count=row["bookings_count"],
+                **{f"{subject_field}_id": row[f"schedule__{subject_field}"]},
+            )
+            for row in rows
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_alter_service_description_alter_trainer_achievements"),
+        ("schedule", "0005_schedule_booked_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServicePopularity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(verbose_name="Месяц")),
+                (
+                    "distinct_clients",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Уникальных клиентов"
+                    ),
+                ),
+                (
+                    "bookings_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Записей"),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="popularity",
+                        to="core.service",
+                        verbose_name="Услуга",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Популярность услуги",
+                "verbose_name_plural": "Популярность услуг",
+                "indexes": [
+                    models.Index(
+                        models.F("month"),
+                        models.OrderBy(models.F("distinct_clients"), descending=True),
+                        models.OrderBy(models.F("bookings_count"), descending=True),
+                        name="service_popularity_rank_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("month", "service"),
+                        name="unique_service_popularity_month",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TrainerPopularity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(verbose_name="Месяц")),
+                (
+                    "distinct_clients",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Уникальных клиентов"
+                    ),
+                ),
+                (
+                    "bookings_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Записей"),
+                ),
+                (
+                    "trainer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="popularity",
+                        to="core.trainer",
+                        verbose_name="Тренер",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Популярность тренера",
+                "verbose_name_plural": "Популярность тренеров",
+                "indexes": [
+                    models.Index(
+                        models.F("month"),
+                        models.OrderBy(models.F("distinct_clients"), descending=True),
+                        models.OrderBy(models.F("bookings_count"), descending=True),
+                        name="trainer_popularity_rank_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("month", "trainer"),
+                        name="unique_trainer_popularity_month",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_popularity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 04:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_alter_service_description_alter_trainer_achievements"),
+        ("schedule", "0006_popularity_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["client", "canceled"], name="booking_client_canceled_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("canceled", False)),
+                fields=["schedule"],
+                name="booking_active_schedule_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(fields=["start_time"], name="schedule_start_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(
+                fields=["service", "start_time"], name="schedule_service_start_idx"
+            ),
+        ),
+    ]
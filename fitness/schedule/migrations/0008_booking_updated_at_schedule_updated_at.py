@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 04:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("schedule", "0007_schedule_booking_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Время изменения",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="schedule",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Время изменения",
+            ),
+            preserve_default=False,
+        ),
+    ]
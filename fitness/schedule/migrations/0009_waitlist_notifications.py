@@ -0,0 +1,134 @@
+# Generated by Django 5.2 on 2026-10-18 04:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("schedule", "0008_booking_updated_at_schedule_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Notification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("waitlist_promoted", "Запись из листа ожидания")],
+                        max_length=32,
+                        verbose_name="Тип",
+                    ),
+                ),
+                ("message", models.CharField(max_length=255, verbose_name="Сообщение")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время создания"
+                    ),
+                ),
+                (
+                    "is_read",
+                    models.BooleanField(default=False, verbose_name="Прочитано"),
+                ),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notifications",
+                        to="schedule.booking",
+                        verbose_name="Запись",
+                    ),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notifications",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Клиент",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Уведомление",
+                "verbose_name_plural": "Уведомления",
+                "ordering": ("-created_at", "-id"),
+                "indexes": [
+                    models.Index(
+                        fields=["client", "is_read"], name="notification_unread_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="WaitlistEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время постановки в очередь"
+                    ),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist_entries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Клиент",
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist",
+                        to="schedule.schedule",
+                        verbose_name="Занятие",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Лист ожидания",
+                "verbose_name_plural": "Лист ожидания",
+                "ordering": ("created_at", "id"),
+                "indexes": [
+                    models.Index(
+                        fields=["schedule", "created_at", "id"],
+                        name="waitlist_queue_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("schedule", "client"),
+                        name="unique_schedule_client_waitlist",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 04:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("schedule", "0009_waitlist_notifications"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatChangeEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("remaining_seats", models.IntegerField(verbose_name="Свободных мест")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Время изменения"
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_events",
+                        to="schedule.schedule",
+                        verbose_name="Занятие",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение свободных мест",
+                "verbose_name_plural": "Изменения свободных мест",
+                "ordering": ("id",),
+            },
+        ),
+    ]
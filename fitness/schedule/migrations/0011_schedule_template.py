@@ -0,0 +1,83 @@
+# Generated by Django 5.2 on 2026-10-18 04:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_alter_service_description_alter_trainer_achievements"),
+        ("schedule", "0010_seat_change_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Понедельник"),
+                            (1, "Вторник"),
+                            (2, "Среда"),
+                            (3, "Четверг"),
+                            (4, "Пятница"),
+                            (5, "Суббота"),
+                            (6, "Воскресенье"),
+                        ],
+                        verbose_name="День недели",
+                    ),
+                ),
+                ("start_time", models.TimeField(verbose_name="Время начала")),
+                ("valid_from", models.DateField(verbose_name="Действует с")),
+                (
+                    "valid_to",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Действует по"
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.service",
+                        verbose_name="Услуга",
+                    ),
+                ),
+                (
+                    "trainer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.trainer",
+                        verbose_name="Тренер",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Шаблон расписания",
+                "verbose_name_plural": "Шаблоны расписания",
+                "ordering": ("weekday", "start_time"),
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            ("valid_to__isnull", True),
+                            ("valid_to__gte", models.F("valid_from")),
+                            _connector="OR",
+                        ),
+                        name="schedule_template_valid_range",
+                    )
+                ],
+            },
+        ),
+    ]
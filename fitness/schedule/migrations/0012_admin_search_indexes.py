@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("schedule", "0011_schedule_template"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["booked_at"], name="booking_booked_at_idx"),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2 on 2026-10-18 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_photo_validators"),
+        ("schedule", "0012_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleOccupancyDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="День")),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Понедельник"),
+                            (1, "Вторник"),
+                            (2, "Среда"),
+                            (3, "Четверг"),
+                            (4, "Пятница"),
+                            (5, "Суббота"),
+                            (6, "Воскресенье"),
+                        ],
+                        verbose_name="День недели",
+                    ),
+                ),
+                ("hour", models.PositiveSmallIntegerField(verbose_name="Час")),
+                (
+                    "sessions",
+                    models.PositiveIntegerField(default=0, verbose_name="Занятий"),
+                ),
+                (
+                    "capacity",
+                    models.PositiveIntegerField(default=0, verbose_name="Мест"),
+                ),
+                (
+                    "booked",
+                    models.PositiveIntegerField(default=0, verbose_name="Записано"),
+                ),
+                (
+                    "canceled",
+                    models.PositiveIntegerField(default=0, verbose_name="Отменено"),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="occupancy",
+                        to="core.service",
+                        verbose_name="Услуга",
+                    ),
+                ),
+                (
+                    "trainer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="occupancy",
+                        to="core.trainer",
+                        verbose_name="Тренер",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Загрузка за день",
+                "verbose_name_plural": "Загрузка по дням",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "service", "trainer", "hour"),
+                        name="unique_occupancy_slot",
+                    )
+                ],
+            },
+        ),
+    ]
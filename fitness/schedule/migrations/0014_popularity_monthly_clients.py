@@ -0,0 +1,149 @@
+# Generated by Django 5.2 on 2026-10-18 05:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def fill_monthly_clients(apps, schema_editor):
+    Booking = apps.get_model("schedule", "Booking")
+
+    for model_name, subject_field in (
+        ("TrainerMonthlyClient", "trainer"),
+        ("ServiceMonthlyClient", "service"),
+    ):
+        model = apps.get_model("schedule", model_name)
+        rows = (
+            Booking.objects.filter(canceled=False)
+            .annotate(
+                month=TruncMonth(
+                    "schedule__start_time", output_field=models.DateField()
+                )
+            )
+            .values("month", f"schedule__{subject_field}", "client")
+            .annotate(bookings_count=Count("pk"))
+            .order_by()
+        )
+        model.objects.bulk_create(
+            (
+                model(
+                    month=row["month"],
+                    client_id=row["client"],
+                    bookings_count=row["bookings_count"],
+                    **{f"{subject_field}_id": row[f"schedule__{subject_field}"]},
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=2000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_photo_validators"),
+        ("schedule", "0013_schedule_occupancy_daily"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServiceMonthlyClient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(verbose_name="Месяц")),
+                (
+                    "bookings_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Записей"),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Клиент",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.service",
+                        verbose_name="Услуга",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Клиент услуги за месяц",
+                "verbose_name_plural": "Клиенты услуг по месяцам",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("month", "service", "client"),
+                        name="unique_service_monthly_client",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TrainerMonthlyClient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(verbose_name="Месяц")),
+                (
+                    "bookings_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Записей"),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Клиент",
+                    ),
+                ),
+                (
+                    "trainer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.trainer",
+                        verbose_name="Тренер",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Клиент тренера за месяц",
+                "verbose_name_plural": "Клиенты тренеров по месяцам",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("month", "trainer", "client"),
+                        name="unique_trainer_monthly_client",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_monthly_clients, migrations.RunPython.noop),
+    ]
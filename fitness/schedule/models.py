@@ -1,14 +1,40 @@
-from datetime import datetime, timedelta
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from functools import reduce
+from operator import or_
 
 from core.models import Service, Trainer
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.exceptions import EmptyResultSet
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Concat, ExtractHour, Greatest
+from django.db.models.sql import UpdateQuery
 from django.utils import timezone
 
+from .cache import invalidate_schedule
 from .templatetags.date_extras import to_time
+from .utils import day_bounds, month_bounds, month_range, month_start
 
 User = get_user_model()
 
+CANCELLATION_DEADLINE = timedelta(hours=6)
+SCHEDULE_BULK_BATCH_SIZE = 1000
+
 schedule_detail_fields = (
     "service__slug",
     "service__name",
@@ -21,7 +47,9 @@ schedule_detail_fields = (
     "trainer__user__first_name",
     "trainer__user__last_name",
     "trainer__user__middle_name",
+    "trainer__user__username",
     "start_time",
+    "booked_count",
 )
 
 schedule_short_fields = (
@@ -29,6 +57,7 @@ schedule_short_fields = (
     "service__max_participants",
     "service__duration",
     "start_time",
+    "booked_count",
     "trainer_id",
     "trainer__user__id",
 )
@@ -53,7 +82,9 @@ booking_fields = (
     "schedule__trainer__user__first_name",
     "schedule__trainer__user__last_name",
     "schedule__trainer__user__middle_name",
+    "schedule__trainer__user__username",
     "schedule__start_time",
+    "schedule__booked_count",
     "canceled",
 )
 
@@ -62,7 +93,9 @@ booking_short_fields = (
     "schedule__service__max_participants",
     "schedule__service__duration",
     "schedule__start_time",
+    "schedule__booked_count",
     "schedule__trainer__user_id",
+    "client",
     "canceled",
 )
 
@@ -72,14 +105,139 @@ client_fields = (
     "client__middle_name",
     "client__email",
     "client__phone_number",
-    "client__photo",
-    "client__trainer__photo",
+    "client__avatar_path",
+    "client__username",
     "schedule_id",
     "booked_at",
 )
 
 
-class NotCanceledManager(models.Manager):
+class ScheduleQuerySet(models.QuerySet):
+    def recount_bookings(self) -> int:
+        bookings_count = (
+            Booking.not_canceled.filter(schedule=OuterRef("pk"))
+            .order_by()
+            .values("schedule")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        count = self.update(booked_count=Coalesce(Subquery(bookings_count), 0))
+        invalidate_schedule()
+
+        return count
+
+
+class ScheduleTemplateQuerySet(models.QuerySet):
+    def materialize(
+        self, start_date: date, weeks: int
+    ) -> tuple[list["Schedule"], list[tuple["Schedule", str]]]:
+        end_date = start_date + timedelta(weeks=weeks) - timedelta(days=1)
+        now = timezone.now()
+        new_schedule = []
+
+        for template in self.select_related("service", "trainer__user"):
+            first_day = max(start_date, template.valid_from)
+            last_day = min(end_date, template.valid_to or end_date)
+            day = first_day + timedelta(
+                days=(template.weekday - first_day.weekday()) % 7
+            )
+            start_time = timezone.make_aware(datetime.combine(day, template.start_time))
+
+            while start_time.date() <= last_day:
+                if start_time > now:
+                    new_schedule.append(
+                        Schedule(
+                            service=template.service,
+                            trainer=template.trainer,
+                            start_time=start_time,
+                        )
+                    )
+
+                start_time += timedelta(weeks=1)
+
+        return create_schedule(new_schedule)
+
+
+class BookingQuerySet(models.QuerySet):
+    def set_canceled(self, canceled: bool) -> int:
+        with transaction.atomic():
+            bookings = list(
+                self.exclude(canceled=canceled)
+                .select_related("schedule")
+                .only(
+                    "client",
+                    "schedule__service",
+                    "schedule__trainer",
+                    "schedule__start_time",
+                )
+            )
+
+            if not bookings:
+                return 0
+
+            count = Booking.objects.filter(
+                pk__in=[booking.pk for booking in bookings]
+            ).update(canceled=canceled, updated_at=timezone.now())
+            Schedule.objects.filter(
+                pk__in={booking.schedule_id for booking in bookings}
+            ).recount_bookings()
+
+            delta = -1 if canceled else 1
+            track_popularity_many(
+                (booking.schedule, booking.client_id, delta) for booking in bookings
+            )
+            track_occupancy_many(
+                (booking.schedule, delta, -delta) for booking in bookings
+            )
+            invalidate_schedule()
+
+        return count
+
+    def release(self) -> None:
+        bookings = list(
+            self.select_related("schedule").only(
+                "client",
+                "canceled",
+                "schedule__service",
+                "schedule__trainer",
+                "schedule__start_time",
+            )
+        )
+
+        if not bookings:
+            return
+
+        active = Counter(
+            booking.schedule_id for booking in bookings if not booking.canceled
+        )
+
+        if active:
+            Schedule.objects.filter(pk__in=active).update(
+                booked_count=Greatest(
+                    F("booked_count")
+                    - Case(*(When(pk=pk, then=count) for pk, count in active.items())),
+                    0,
+                )
+            )
+
+        track_popularity_many(
+            (booking.schedule, booking.client_id, -1)
+            for booking in bookings
+            if not booking.canceled
+        )
+        track_occupancy_many(
+            (booking.schedule, 0, -1) if booking.canceled else (booking.schedule, -1, 0)
+            for booking in bookings
+        )
+        invalidate_schedule()
+
+    def delete(self):
+        with transaction.atomic():
+            self.release()
+            return super().delete()
+
+
+class NotCanceledManager(models.Manager.from_queryset(BookingQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(canceled=False)
 
@@ -92,6 +250,14 @@ class Schedule(models.Model):
         Trainer, on_delete=models.CASCADE, verbose_name="Тренер"
     )
     start_time = models.DateTimeField(verbose_name="Время начала")
+    booked_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Записано"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name="Время изменения"
+    )
+
+    objects = ScheduleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Расписание"
@@ -109,6 +275,12 @@ class Schedule(models.Model):
                 name="unique_trainer_start_time"
             ),
         )
+        indexes = (
+            models.Index(fields=("start_time",), name="schedule_start_time_idx"),
+            models.Index(
+                fields=("service", "start_time"), name="schedule_service_start_idx"
+            ),
+        )
 
     def __str__(self):
         local_time = timezone.localtime(self.start_time)
@@ -118,14 +290,7 @@ class Schedule(models.Model):
 
     @property
     def bookings_count(self) -> int:
-        if hasattr(self, "not_canceled_bookings_count"):
-            count = getattr(self, "not_canceled_bookings_count")
-        elif hasattr(self, "not_canceled_bookings"):
-            count = len(getattr(self, "not_canceled_bookings"))
-        else:
-            count = 0
-
-        return count
+        return self.booked_count
 
     @property
     def count_remained_seats(self) -> int:
@@ -139,9 +304,9 @@ class Schedule(models.Model):
     def is_available(self) -> bool:
         return bool(self.count_remained_seats > 0 and self.in_future)
 
-    def __time_before(self, **kwargs) -> bool:
+    def __time_before(self, delta: timedelta = timedelta()) -> bool:
         now = timezone.localtime(timezone.now())
-        booking_end_time = timezone.localtime(self.start_time) - timedelta(**kwargs)
+        booking_end_time = timezone.localtime(self.start_time) - delta
 
         return booking_end_time > now
 
@@ -151,13 +316,119 @@ class Schedule(models.Model):
 
     @property
     def is_cancellation_allowed(self) -> bool:
-        return self.__time_before(hours=6)
+        return self.__time_before(CANCELLATION_DEADLINE)
+
+
+class ScheduleTemplate(models.Model):
+    class Weekday(models.IntegerChoices):
+        MONDAY = 0, "Понедельник"
+        TUESDAY = 1, "Вторник"
+        WEDNESDAY = 2, "Среда"
+        THURSDAY = 3, "Четверг"
+        FRIDAY = 4, "Пятница"
+        SATURDAY = 5, "Суббота"
+        SUNDAY = 6, "Воскресенье"
+
+    service = models.ForeignKey(
+        Service, on_delete=models.CASCADE, verbose_name="Услуга"
+    )
+    trainer = models.ForeignKey(
+        Trainer, on_delete=models.CASCADE, verbose_name="Тренер"
+    )
+    weekday = models.PositiveSmallIntegerField(
+        choices=Weekday, verbose_name="День недели"
+    )
+    start_time = models.TimeField(verbose_name="Время начала")
+    valid_from = models.DateField(verbose_name="Действует с")
+    valid_to = models.DateField(blank=True, null=True, verbose_name="Действует по")
+
+    objects = ScheduleTemplateQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Шаблон расписания"
+        verbose_name_plural = "Шаблоны расписания"
+        ordering = ("weekday", "start_time")
+        constraints = (
+            models.CheckConstraint(
+                condition=Q(valid_to__isnull=True) | Q(valid_to__gte=F("valid_from")),
+                name="schedule_template_valid_range",
+            ),
+        )
+
+    def __str__(self):
+        return (
+            f"{self.service.name} - {self.get_weekday_display()} "
+            f"{self.start_time:%H:%M}"
+        )
+
+
+def split_schedule_conflicts(
+    new_schedule: list[Schedule],
+) -> tuple[list[Schedule], list[tuple[Schedule, str]]]:
+    if not new_schedule:
+        return [], []
+
+    start = min(obj.start_time for obj in new_schedule) - timedelta(days=1)
+    end = max(obj.start_time for obj in new_schedule) + timedelta(days=1)
+
+    busy: dict[int, list[tuple[datetime, datetime, bool]]] = {}
+    existing = Schedule.objects.filter(
+        trainer_id__in={obj.trainer_id for obj in new_schedule},
+        start_time__gte=start,
+        start_time__lt=end,
+    ).values_list("trainer_id", "start_time", "service__duration")
+
+    for trainer_id, start_time, duration in existing:
+        busy.setdefault(trainer_id, []).append(
+            (start_time, start_time + duration, True)
+        )
+
+    for intervals in busy.values():
+        intervals.sort()
+
+    accepted = []
+    conflicts = []
+
+    for obj in new_schedule:
+        intervals = busy.setdefault(obj.trainer_id, [])
+        interval = (obj.start_time, obj.start_time + obj.service.duration, False)
+        index = bisect_left(intervals, interval)
+        overlaps = [
+            other
+            for other in intervals[max(index - 1, 0) : index + 1]
+            if other[0] < interval[1] and interval[0] < other[1]
+        ]
+
+        if not overlaps:
+            insort(intervals, interval)
+            accepted.append(obj)
+        elif any(is_existing for *_, is_existing in overlaps):
+            conflicts.append((obj, "у тренера уже есть занятие в это время"))
+        else:
+            conflicts.append((obj, "пересекается с другим новым занятием"))
+
+    return accepted, conflicts
+
+
+def create_schedule(
+    new_schedule: list[Schedule],
+) -> tuple[list[Schedule], list[tuple[Schedule, str]]]:
+    accepted, conflicts = split_schedule_conflicts(new_schedule)
+
+    if accepted:
+        Schedule.objects.bulk_create(
+            accepted, batch_size=SCHEDULE_BULK_BATCH_SIZE, ignore_conflicts=True
+        )
+        invalidate_schedule()
+
+    return accepted, conflicts
 
 
 class Booking(models.Model):
     client = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name="bookings",
         verbose_name="Клиент"
     )
@@ -169,8 +440,11 @@ class Booking(models.Model):
     )
     booked_at = models.DateTimeField(auto_now_add=True, verbose_name="Время записи")
     canceled = models.BooleanField(default=False, verbose_name="Отменено")
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name="Время изменения"
+    )
 
-    objects = models.Manager()
+    objects = BookingQuerySet.as_manager()
     not_canceled = NotCanceledManager()
 
     class Meta:
@@ -183,6 +457,616 @@ class Booking(models.Model):
                 name="unique_schedule_client_booking"
             ),
         )
+        indexes = (
+            models.Index(
+                fields=("client", "canceled"), name="booking_client_canceled_idx"
+            ),
+            models.Index(fields=("booked_at",), name="booking_booked_at_idx"),
+            models.Index(
+                fields=("schedule",),
+                condition=Q(canceled=False),
+                name="booking_active_schedule_idx",
+            ),
+        )
 
     def __str__(self):
         return f"{self.schedule} - {self.client}"
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            Booking.objects.filter(pk=self.pk).release()
+            return super().delete(*args, **kwargs)
+
+
+class WaitlistEntry(models.Model):
+    client = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries",
+        verbose_name="Клиент",
+    )
+    schedule = models.ForeignKey(
+        Schedule,
+        on_delete=models.CASCADE,
+        related_name="waitlist",
+        verbose_name="Занятие",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Время постановки в очередь"
+    )
+
+    class Meta:
+        verbose_name = "Лист ожидания"
+        verbose_name_plural = "Лист ожидания"
+        ordering = ("created_at", "id")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("schedule", "client"), name="unique_schedule_client_waitlist"
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("schedule", "created_at", "id"), name="waitlist_queue_idx"
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.schedule} - {self.client}"
+
+
+class Notification(models.Model):
+    class Kind(models.TextChoices):
+        WAITLIST_PROMOTED = "waitlist_promoted", "Запись из листа ожидания"
+
+    client = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+        verbose_name="Клиент",
+    )
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="notifications",
+        verbose_name="Запись",
+    )
+    kind = models.CharField(max_length=32, choices=Kind, verbose_name="Тип")
+    message = models.CharField(max_length=255, verbose_name="Сообщение")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
+    is_read = models.BooleanField(default=False, verbose_name="Прочитано")
+
+    class Meta:
+        verbose_name = "Уведомление"
+        verbose_name_plural = "Уведомления"
+        ordering = ("-created_at", "-id")
+        indexes = (
+            models.Index(fields=("client", "is_read"), name="notification_unread_idx"),
+        )
+
+    def __str__(self):
+        return self.message
+
+
+class SeatChangeEvent(models.Model):
+    schedule = models.ForeignKey(
+        Schedule,
+        on_delete=models.CASCADE,
+        related_name="seat_events",
+        verbose_name="Занятие",
+    )
+    remaining_seats = models.IntegerField(verbose_name="Свободных мест")
+    created_at = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name="Время изменения"
+    )
+
+    class Meta:
+        verbose_name = "Изменение свободных мест"
+        verbose_name_plural = "Изменения свободных мест"
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.schedule_id}: {self.remaining_seats}"
+
+
+def insert_from_select(
+    model: type[models.Model], fields: Iterable[str], queryset: models.QuerySet
+) -> int:
+    connection = connections[queryset.db]
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(
+        quote_name(model._meta.get_field(field).column) for field in fields
+    )
+
+    try:
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote_name(model._meta.db_table)} ({columns}) {sql}", params
+        )
+        return cursor.rowcount
+
+
+def update_returning_pks(queryset: models.QuerySet, **values) -> list[int]:
+    connection = connections[queryset.db]
+    pk_column = connection.ops.quote_name(queryset.model._meta.pk.column)
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+
+    try:
+        sql, params = query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {pk_column}", params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+class MonthlyClient(models.Model):
+    month = models.DateField(verbose_name="Месяц")
+    client = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        verbose_name="Клиент",
+    )
+    bookings_count = models.PositiveIntegerField(default=0, verbose_name="Записей")
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def track(cls, lookup: dict, client_id: int, delta: int) -> int:
+        rows = cls.objects.filter(**lookup, client_id=client_id)
+
+        if delta > 0:
+            if rows.update(bookings_count=F("bookings_count") + delta):
+                return 0
+
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        **lookup, client_id=client_id, bookings_count=delta
+                    )
+            except IntegrityError:
+                rows.update(bookings_count=F("bookings_count") + delta)
+                return 0
+
+            return 1
+
+        if rows.filter(bookings_count__gt=-delta).update(
+            bookings_count=F("bookings_count") + delta
+        ):
+            return 0
+
+        deleted, _ = rows.delete()
+        return -1 if deleted else 0
+
+
+class TrainerMonthlyClient(MonthlyClient):
+    trainer = models.ForeignKey(
+        Trainer, on_delete=models.CASCADE, related_name="+", verbose_name="Тренер"
+    )
+
+    class Meta:
+        verbose_name = "Клиент тренера за месяц"
+        verbose_name_plural = "Клиенты тренеров по месяцам"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("month", "trainer", "client"),
+                name="unique_trainer_monthly_client",
+            ),
+        )
+
+
+class ServiceMonthlyClient(MonthlyClient):
+    service = models.ForeignKey(
+        Service, on_delete=models.CASCADE, related_name="+", verbose_name="Услуга"
+    )
+
+    class Meta:
+        verbose_name = "Клиент услуги за месяц"
+        verbose_name_plural = "Клиенты услуг по месяцам"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("month", "service", "client"),
+                name="unique_service_monthly_client",
+            ),
+        )
+
+
+PopularityKey = tuple[date, int, int]
+
+
+class MonthlyPopularity(models.Model):
+    month = models.DateField(verbose_name="Месяц")
+    distinct_clients = models.PositiveIntegerField(
+        default=0, verbose_name="Уникальных клиентов"
+    )
+    bookings_count = models.PositiveIntegerField(default=0, verbose_name="Записей")
+
+    subject_field: str
+    client_model: type[MonthlyClient]
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_key(cls, schedule: Schedule, client_id: int) -> PopularityKey:
+        subject_id = getattr(schedule, f"{cls.subject_field}_id")
+        return month_start(schedule.start_time), subject_id, client_id
+
+    @classmethod
+    def apply(cls, deltas: dict[PopularityKey, int]) -> None:
+        totals: dict[tuple[date, int], list[int]] = {}
+
+        for (month, subject_id, client_id), delta in deltas.items():
+            lookup = {"month": month, f"{cls.subject_field}_id": subject_id}
+            clients_delta = cls.client_model.track(lookup, client_id, delta)
+
+            total = totals.setdefault((month, subject_id), [0, 0])
+            total[0] += delta
+            total[1] += clients_delta
+
+        for (month, subject_id), (bookings_delta, clients_delta) in totals.items():
+            lookup = {"month": month, f"{cls.subject_field}_id": subject_id}
+            changes = {
+                "bookings_count": F("bookings_count") + bookings_delta,
+                "distinct_clients": F("distinct_clients") + clients_delta,
+            }
+
+            if cls.objects.filter(**lookup).update(**changes) or bookings_delta <= 0:
+                continue
+
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        **lookup,
+                        bookings_count=bookings_delta,
+                        distinct_clients=clients_delta,
+                    )
+            except IntegrityError:
+                cls.objects.filter(**lookup).update(**changes)
+
+    @classmethod
+    def rebuild(cls, months: Iterable[date] | None = None) -> int:
+        stats = cls.objects.all()
+        clients = cls.client_model.objects.all()
+
+        if months is None:
+            bounds = Schedule.objects.aggregate(
+                first=Min("start_time"), last=Max("start_time")
+            )
+            months = []
+
+            if bounds["first"]:
+                months = month_range(bounds["first"], bounds["last"])
+        else:
+            months = set(months)
+            stats = stats.filter(month__in=months)
+            clients = clients.filter(month__in=months)
+
+        subject_lookup = f"schedule__{cls.subject_field}"
+
+        with transaction.atomic():
+            stats.delete()
+            clients.delete()
+
+            for month in months:
+                start, end = month_bounds(month)
+                insert_from_select(
+                    cls.client_model,
+                    ("month", cls.subject_field, "client", "bookings_count"),
+                    Booking.not_canceled.filter(
+                        schedule__start_time__gte=start, schedule__start_time__lt=end
+                    )
+                    .values(subject_lookup, "client")
+                    .annotate(
+                        bookings_count=Count("pk"),
+                        month=Value(month, output_field=models.DateField()),
+                    )
+                    .values_list("month", subject_lookup, "client", "bookings_count")
+                    .order_by(),
+                )
+
+            return insert_from_select(
+                cls,
+                ("month", cls.subject_field, "distinct_clients", "bookings_count"),
+                clients.values("month", cls.subject_field)
+                .annotate(
+                    distinct_clients=Count("pk"),
+                    total_bookings=Sum("bookings_count"),
+                )
+                .values_list(
+                    "month", cls.subject_field, "distinct_clients", "total_bookings"
+                )
+                .order_by(),
+            )
+
+
+class TrainerPopularity(MonthlyPopularity):
+    trainer = models.ForeignKey(
+        Trainer,
+        on_delete=models.CASCADE,
+        related_name="popularity",
+        verbose_name="Тренер",
+    )
+
+    subject_field = "trainer"
+    client_model = TrainerMonthlyClient
+
+    class Meta:
+        verbose_name = "Популярность тренера"
+        verbose_name_plural = "Популярность тренеров"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("month", "trainer"), name="unique_trainer_popularity_month"
+            ),
+        )
+        indexes = (
+            models.Index(
+                "month",
+                F("distinct_clients").desc(),
+                F("bookings_count").desc(),
+                name="trainer_popularity_rank_idx",
+            ),
+        )
+
+
+class ServicePopularity(MonthlyPopularity):
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="popularity",
+        verbose_name="Услуга",
+    )
+
+    subject_field = "service"
+    client_model = ServiceMonthlyClient
+
+    class Meta:
+        verbose_name = "Популярность услуги"
+        verbose_name_plural = "Популярность услуг"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("month", "service"), name="unique_service_popularity_month"
+            ),
+        )
+        indexes = (
+            models.Index(
+                "month",
+                F("distinct_clients").desc(),
+                F("bookings_count").desc(),
+                name="service_popularity_rank_idx",
+            ),
+        )
+
+
+popularity_models = (TrainerPopularity, ServicePopularity)
+
+
+def apply_popularity(
+    deltas: dict[type[MonthlyPopularity], Counter[PopularityKey]],
+) -> None:
+    with transaction.atomic():
+        for model, model_deltas in deltas.items():
+            model.apply({key: delta for key, delta in model_deltas.items() if delta})
+
+
+def track_popularity_many(changes: Iterable[tuple[Schedule, int, int]]) -> None:
+    deltas: dict[type[MonthlyPopularity], Counter[PopularityKey]] = {
+        model: Counter() for model in popularity_models
+    }
+
+    for schedule, client_id, delta in changes:
+        for model in popularity_models:
+            deltas[model][model.get_key(schedule, client_id)] += delta
+
+    if any(deltas.values()):
+        transaction.on_commit(lambda: apply_popularity(deltas), robust=True)
+
+
+def track_popularity(schedule: Schedule, client_id: int, delta: int) -> None:
+    track_popularity_many([(schedule, client_id, delta)])
+
+
+def rebuild_popularity(months: Iterable[date] | None = None) -> None:
+    for model in popularity_models:
+        model.rebuild(months)
+
+
+occupancy_groups = {
+    "day": (("day",), {}),
+    "weekday": (("weekday",), {}),
+    "hour": (("hour",), {}),
+    "service": (("service_id",), {"service_name": F("service__name")}),
+    "trainer": (
+        ("trainer_id",),
+        {
+            "trainer_name": Concat(
+                "trainer__user__last_name", Value(" "), "trainer__user__first_name"
+            )
+        },
+    ),
+}
+
+
+class ScheduleOccupancyDaily(models.Model):
+    day = models.DateField(verbose_name="День")
+    weekday = models.PositiveSmallIntegerField(
+        choices=ScheduleTemplate.Weekday.choices, verbose_name="День недели"
+    )
+    hour = models.PositiveSmallIntegerField(verbose_name="Час")
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="occupancy",
+        verbose_name="Услуга",
+    )
+    trainer = models.ForeignKey(
+        Trainer,
+        on_delete=models.CASCADE,
+        related_name="occupancy",
+        verbose_name="Тренер",
+    )
+    sessions = models.PositiveIntegerField(default=0, verbose_name="Занятий")
+    capacity = models.PositiveIntegerField(default=0, verbose_name="Мест")
+    booked = models.PositiveIntegerField(default=0, verbose_name="Записано")
+    canceled = models.PositiveIntegerField(default=0, verbose_name="Отменено")
+
+    class Meta:
+        verbose_name = "Загрузка за день"
+        verbose_name_plural = "Загрузка по дням"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("day", "service", "trainer", "hour"),
+                name="unique_occupancy_slot",
+            ),
+        )
+
+    @classmethod
+    def track(cls, changes: Iterable[tuple[Schedule, int, int]]) -> None:
+        deltas: dict[tuple[date, int, int, int], tuple[int, int]] = {}
+
+        for schedule, booked, canceled in changes:
+            start_time = timezone.localtime(schedule.start_time)
+            key = (
+                start_time.date(),
+                start_time.hour,
+                schedule.service_id,
+                schedule.trainer_id,
+            )
+            total_booked, total_canceled = deltas.get(key, (0, 0))
+            deltas[key] = (total_booked + booked, total_canceled + canceled)
+
+        if not deltas:
+            return
+
+        keys = {
+            key: Q(day=key[0], hour=key[1], service_id=key[2], trainer_id=key[3])
+            for key in deltas
+        }
+        stats = cls.objects.filter(reduce(or_, keys.values()))
+        updated = stats.update(
+            booked=F("booked")
+            + Case(
+                *(When(keys[key], then=booked) for key, (booked, _) in deltas.items()),
+                default=0,
+            ),
+            canceled=F("canceled")
+            + Case(
+                *(
+                    When(keys[key], then=canceled)
+                    for key, (_, canceled) in deltas.items()
+                ),
+                default=0,
+            ),
+        )
+
+        if updated < len(deltas):
+            existing = set(stats.values_list("day", "hour", "service_id", "trainer_id"))
+            cls.rebuild({key[0] for key in deltas if key not in existing})
+
+    @classmethod
+    def rebuild(cls, days: Iterable[date] | None = None) -> int:
+        stats = cls.objects.all()
+
+        if days is None:
+            bounds = Schedule.objects.aggregate(
+                first=Min("start_time"), last=Max("start_time")
+            )
+            days = []
+
+            if bounds["first"]:
+                first = timezone.localdate(bounds["first"])
+                last = timezone.localdate(bounds["last"])
+                days = [
+                    first + timedelta(days=i) for i in range((last - first).days + 1)
+                ]
+        else:
+            days = set(days)
+            stats = stats.filter(day__in=days)
+
+        canceled_count = (
+            Booking.objects.filter(schedule=OuterRef("pk"), canceled=True)
+            .order_by()
+            .values("schedule")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        created = 0
+
+        with transaction.atomic():
+            stats.delete()
+
+            for day in days:
+                start, end = day_bounds(day)
+                created += insert_from_select(
+                    cls,
+                    (
+                        "day",
+                        "weekday",
+                        "hour",
+                        "service",
+                        "trainer",
+                        "sessions",
+                        "capacity",
+                        "booked",
+                        "canceled",
+                    ),
+                    Schedule.objects.filter(start_time__gte=start, start_time__lt=end)
+                    .annotate(
+                        hour=ExtractHour("start_time"),
+                        canceled_count=Coalesce(Subquery(canceled_count), 0),
+                    )
+                    .values("hour", "service_id", "trainer_id")
+                    .annotate(
+                        day=Value(day, output_field=models.DateField()),
+                        weekday=Value(day.weekday()),
+                        sessions_count=Count("pk"),
+                        capacity_sum=Sum("service__max_participants"),
+                        booked_sum=Sum("booked_count"),
+                        canceled_sum=Sum("canceled_count"),
+                    )
+                    .values_list(
+                        "day",
+                        "weekday",
+                        "hour",
+                        "service_id",
+                        "trainer_id",
+                        "sessions_count",
+                        "capacity_sum",
+                        "booked_sum",
+                        "canceled_sum",
+                    )
+                    .order_by(),
+                )
+
+        return created
+
+
+def track_occupancy_many(changes: Iterable[tuple[Schedule, int, int]]) -> None:
+    ScheduleOccupancyDaily.track(changes)
+
+
+def track_occupancy(schedule: Schedule, booked: int, canceled: int) -> None:
+    track_occupancy_many([(schedule, booked, canceled)])
+
+
+def rebuild_occupancy(days: Iterable[date] | None = None) -> int:
+    return ScheduleOccupancyDaily.rebuild(days)
+
+
+def get_changed_days(since: datetime) -> set[date]:
+    changed = Schedule.objects.filter(
+        Q(updated_at__gte=since)
+        | Q(pk__in=Booking.objects.filter(updated_at__gte=since).values("schedule_id"))
+    ).datetimes("start_time", "day")
+
+    return {value.date() for value in changed}
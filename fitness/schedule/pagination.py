@@ -0,0 +1,207 @@
+import base64
+from datetime import datetime
+from functools import reduce
+
+from django.db.models import Q, QuerySet
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPage:
+    def __init__(
+        self,
+        object_list: list,
+        next_cursor: str | None = None,
+        previous_cursor: str | None = None,
+    ):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(position: datetime, pk: int, reverse: bool = False) -> str:
+    value = f"{'p' if reverse else 'n'}|{position.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, bool]:
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+        direction, position, pk = value.split("|")
+        return datetime.fromisoformat(position), int(pk), direction == "p"
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_queryset(
+    queryset: QuerySet, cursor: str | None, per_page: int, position_field: str
+) -> tuple[QuerySet, bool]:
+    reverse = False
+
+    if cursor:
+        position, pk, reverse = decode_cursor(cursor)
+
+        if reverse:
+            queryset = queryset.filter(
+                Q(**{f"{position_field}__gt": position})
+                | Q(**{position_field: position, "pk__gt": pk})
+            )
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{position_field}__lt": position})
+                | Q(**{position_field: position, "pk__lt": pk})
+            )
+
+    if reverse:
+        queryset = queryset.order_by(position_field, "pk")
+    else:
+        queryset = queryset.order_by(f"-{position_field}", "-pk")
+
+    return queryset[: per_page + 1], reverse
+
+
+def keyset_page(
+    items: list, cursor: str | None, per_page: int, position_field: str, reverse: bool
+) -> KeysetPage:
+    has_more = len(items) > per_page
+    items = items[:per_page]
+
+    if reverse:
+        items.reverse()
+
+    if not items:
+        return KeysetPage(items)
+
+    def get_position(item) -> tuple[datetime, int]:
+        if isinstance(item, dict):
+            return item[position_field], item["id"]
+        return reduce(getattr, position_field.split("__"), item), item.pk
+
+    next_cursor = previous_cursor = None
+
+    if has_more or reverse:
+        next_cursor = encode_cursor(*get_position(items[-1]))
+
+    if (has_more and reverse) or (cursor and not reverse):
+        previous_cursor = encode_cursor(*get_position(items[0]), reverse=True)
+
+    return KeysetPage(items, next_cursor, previous_cursor)
+
+
+def paginate_keyset(
+    queryset: QuerySet, cursor: str | None, per_page: int, position_field: str
+) -> KeysetPage:
+    queryset, reverse = keyset_queryset(queryset, cursor, per_page, position_field)
+    return keyset_page(list(queryset), cursor, per_page, position_field, reverse)
+
+
+async def apaginate_keyset(
+    queryset: QuerySet, cursor: str | None, per_page: int, position_field: str
+) -> KeysetPage:
+    queryset, reverse = keyset_queryset(queryset, cursor, per_page, position_field)
+    items = [item async for item in queryset.aiterator()]
+    return keyset_page(items, cursor, per_page, position_field, reverse)
+
+
+class KeysetPaginationMixin:
+    position_field: str
+    cursor_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = paginate_keyset(
+                queryset,
+                self.request.GET.get(self.cursor_kwarg),
+                page_size,
+                self.position_field,
+            )
+        except ValueError:
+            raise Http404("Неверный курсор")
+
+        return None, page, page.object_list, page.has_other_pages()
+
+
+class KeysetPagination(BasePagination):
+    page_size = 25
+    cursor_query_param = "cursor"
+    position_field: str
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        try:
+            self.page = paginate_keyset(
+                queryset,
+                request.query_params.get(self.cursor_query_param),
+                self.page_size,
+                self.position_field,
+            )
+        except ValueError:
+            raise NotFound("Неверный курсор")
+
+        return self.page.object_list
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        try:
+            self.page = await apaginate_keyset(
+                queryset,
+                request.GET.get(self.cursor_query_param),
+                self.page_size,
+                self.position_field,
+            )
+        except ValueError:
+            raise NotFound("Неверный курсор")
+
+        return self.page.object_list
+
+    def get_link(self, cursor: str | None) -> str | None:
+        if cursor is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data) -> dict:
+        return {
+            "next": self.get_link(self.page.next_cursor),
+            "previous": self.get_link(self.page.previous_cursor),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class BookingPagination(KeysetPagination):
+    position_field = "schedule__start_time"
@@ -1,7 +1,21 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from users.serializers import UserShortSerializer
 
-from .models import Booking, Schedule
+from .models import (
+    CANCELLATION_DEADLINE,
+    Booking,
+    Notification,
+    Schedule,
+    WaitlistEntry,
+    occupancy_groups,
+)
+
+BATCH_MAX_SIZE = 50
 
 
 class ScheduleSerializer(serializers.ModelSerializer):
@@ -97,10 +111,150 @@ class BookedScheduleSerializer(serializers.Serializer):
         return int(obj.schedule.end_time.timestamp()) * 1000
 
 
+class _RowSerializer(ABC):
+    fields: tuple[str, ...]
+
+    def __init__(self, user_id: int | None = None, now: datetime | None = None):
+        now = now or timezone.now()
+
+        self.user_id = user_id
+        self.booking_deadline = now
+        self.cancellation_deadline = now + CANCELLATION_DEADLINE
+
+    @abstractmethod
+    def to_representation(self, row: dict) -> dict: ...
+
+    def serialize(self, rows: Iterable[dict]) -> list[dict]:
+        return [self.to_representation(row) for row in rows]
+
+
+class ScheduleRowSerializer(_RowSerializer):
+    fields = (
+        "id",
+        "service_id",
+        "trainer_id",
+        "trainer__user_id",
+        "start_time",
+        "booked_count",
+        "service__duration",
+        "service__max_participants",
+    )
+
+    def __init__(
+        self,
+        user_id: int | None = None,
+        now: datetime | None = None,
+        booking_ids: dict[int, int] | None = None,
+    ):
+        super().__init__(user_id, now)
+        self.booking_ids = booking_ids or {}
+
+    def to_representation(self, row: dict) -> dict:
+        start_time = row["start_time"]
+        end_time = start_time + row["service__duration"]
+        remained_seats = row["service__max_participants"] - row["booked_count"]
+        booking_id = self.booking_ids.get(row["id"])
+
+        return {
+            "id": row["id"],
+            "service_id": row["service_id"],
+            "trainer_id": row["trainer_id"],
+            "start_time_ms": int(start_time.timestamp()) * 1000,
+            "end_time_ms": int(end_time.timestamp()) * 1000,
+            "count_remained_seats": remained_seats,
+            "booking_id": booking_id,
+            "can_book": bool(
+                remained_seats > 0
+                and start_time > self.booking_deadline
+                and not booking_id
+                and self.user_id != row["trainer__user_id"]
+            ),
+            "can_cancel": bool(booking_id) and start_time > self.cancellation_deadline,
+        }
+
+
+class BookedScheduleRowSerializer(_RowSerializer):
+    fields = (
+        "id",
+        "canceled",
+        "schedule_id",
+        "schedule__service_id",
+        "schedule__trainer_id",
+        "schedule__start_time",
+        "schedule__booked_count",
+        "schedule__service__duration",
+        "schedule__service__max_participants",
+    )
+
+    def to_representation(self, row: dict) -> dict:
+        start_time = row["schedule__start_time"]
+        end_time = start_time + row["schedule__service__duration"]
+        remained_seats = (
+            row["schedule__service__max_participants"] - row["schedule__booked_count"]
+        )
+        canceled = row["canceled"]
+
+        return {
+            "id": row["schedule_id"],
+            "service_id": row["schedule__service_id"],
+            "trainer_id": row["schedule__trainer_id"],
+            "start_time_ms": int(start_time.timestamp()) * 1000,
+            "end_time_ms": int(end_time.timestamp()) * 1000,
+            "count_remained_seats": remained_seats,
+            "booking_id": row["id"] if not canceled else None,
+            "can_book": bool(remained_seats > 0 and start_time > self.booking_deadline)
+            and canceled,
+            "can_cancel": not canceled and start_time > self.cancellation_deadline,
+        }
+
+
 class CreateBookingSerializer(serializers.Serializer):
     schedule_id = serializers.IntegerField(allow_null=False)
 
 
+class BatchBookingSerializer(serializers.Serializer):
+    schedule_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BATCH_MAX_SIZE
+    )
+
+
+class BatchCancelSerializer(serializers.Serializer):
+    booking_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BATCH_MAX_SIZE
+    )
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    position = serializers.IntegerField(read_only=True)
+    created_at_ms = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ("id", "schedule_id", "position", "created_at_ms")
+
+    @staticmethod
+    def get_created_at_ms(obj: WaitlistEntry) -> int:
+        return int(obj.created_at.timestamp()) * 1000
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    created_at_ms = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ("id", "booking_id", "kind", "message", "created_at_ms")
+
+    @staticmethod
+    def get_created_at_ms(obj: Notification) -> int:
+        return int(obj.created_at.timestamp()) * 1000
+
+
+class ReadNotificationsSerializer(serializers.Serializer):
+    notification_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BATCH_MAX_SIZE
+    )
+
+
 class BookingSerializer(serializers.ModelSerializer):
     booked_at_ms = serializers.SerializerMethodField()
 
@@ -130,7 +284,87 @@ class TrainerScheduleSerializer(serializers.ModelSerializer):
         return int(obj.end_time.timestamp()) * 1000
 
 
+class TrainerScheduleQuerySerializer(serializers.Serializer):
+    days_before = 7
+    days_after = 28
+    max_days = 92
+
+    def get_fields(self):
+        return {
+            "from": serializers.DateField(required=False),
+            "to": serializers.DateField(required=False),
+            "since": serializers.IntegerField(required=False, min_value=0),
+        }
+
+    def validate_since(self, value: int) -> datetime:
+        try:
+            return datetime.fromtimestamp(value / 1000, tz=UTC)
+        except (OverflowError, OSError, ValueError):
+            raise serializers.ValidationError("Некорректная отметка времени")
+
+    def validate(self, attrs):
+        today = timezone.localdate()
+        attrs.setdefault("from", today - timedelta(days=self.days_before))
+        attrs.setdefault("to", today + timedelta(days=self.days_after))
+
+        if attrs["from"] > attrs["to"]:
+            raise serializers.ValidationError(
+                {"to": "Конец периода не может быть раньше его начала"}
+            )
+
+        if (attrs["to"] - attrs["from"]).days >= self.max_days:
+            raise serializers.ValidationError(
+                {"to": f"Период не может быть длиннее {self.max_days} дней"}
+            )
+
+        return attrs
+
+
 class TrainerScheduleResponseSerializer(serializers.Serializer):
     items = TrainerScheduleSerializer(many=True)
     clients = UserShortSerializer(many=True)
     bookings = BookingSerializer(many=True)
+    canceled_bookings = serializers.ListField(child=serializers.IntegerField())
+    synced_at_ms = serializers.IntegerField()
+
+
+class OccupancyQuerySerializer(serializers.Serializer):
+    days_before = 30
+    max_days = 366
+
+    def get_fields(self):
+        return {
+            "from": serializers.DateField(required=False),
+            "to": serializers.DateField(required=False),
+            "group_by": serializers.CharField(required=False, allow_blank=True),
+        }
+
+    def validate_group_by(self, value: str) -> list[str]:
+        groups = list(dict.fromkeys(group for group in value.split(",") if group))
+        unknown = [group for group in groups if group not in occupancy_groups]
+
+        if unknown:
+            raise serializers.ValidationError(
+                f"Недопустимая группировка: {', '.join(unknown)}. "
+                f"Доступны: {', '.join(occupancy_groups)}"
+            )
+
+        return groups
+
+    def validate(self, attrs):
+        today = timezone.localdate()
+        attrs.setdefault("to", today)
+        attrs.setdefault("from", attrs["to"] - timedelta(days=self.days_before))
+        attrs.setdefault("group_by", [])
+
+        if attrs["from"] > attrs["to"]:
+            raise serializers.ValidationError(
+                {"to": "Конец периода не может быть раньше его начала"}
+            )
+
+        if (attrs["to"] - attrs["from"]).days >= self.max_days:
+            raise serializers.ValidationError(
+                {"to": f"Период не может быть длиннее {self.max_days} дней"}
+            )
+
+        return attrs
@@ -0,0 +1,122 @@
+from core.models import Service, Trainer
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_schedule
+from .models import (
+    Booking,
+    Schedule,
+    rebuild_occupancy,
+    track_popularity_many,
+)
+
+User = get_user_model()
+
+schedule_rollup_fields = ("service", "trainer", "start_time")
+
+
+@receiver(pre_save, sender=Schedule)
+def schedule_saving(sender, instance: Schedule, update_fields=None, **kwargs):
+    if instance._state.adding:
+        return
+
+    if update_fields is not None and not set(schedule_rollup_fields) & {
+        field.removesuffix("_id") for field in update_fields
+    }:
+        return
+
+    previous = (
+        Schedule.objects.only(*schedule_rollup_fields).filter(pk=instance.pk).first()
+    )
+    setattr(instance, "previous_state", previous)
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_saved(sender, instance: Schedule, **kwargs):
+    previous = getattr(instance, "previous_state", None)
+    setattr(instance, "previous_state", None)
+
+    if previous is None or (
+        previous.service_id,
+        previous.trainer_id,
+        previous.start_time,
+    ) == (instance.service_id, instance.trainer_id, instance.start_time):
+        return
+
+    client_ids = list(
+        Booking.not_canceled.filter(schedule_id=instance.pk).values_list(
+            "client_id", flat=True
+        )
+    )
+    track_popularity_many(
+        [(previous, client_id, -1) for client_id in client_ids]
+        + [(instance, client_id, 1) for client_id in client_ids]
+    )
+    days = {
+        timezone.localdate(previous.start_time),
+        timezone.localdate(instance.start_time),
+    }
+    transaction.on_commit(lambda: rebuild_occupancy(days))
+
+
+@receiver(pre_delete, sender=User)
+def client_deleting(sender, instance: User, **kwargs):
+    Booking.objects.filter(client_id=instance.pk).release()
+
+
+@receiver(pre_delete, sender=Schedule)
+def schedule_deleting(sender, instance: Schedule, **kwargs):
+    client_ids = Booking.not_canceled.filter(schedule_id=instance.pk).values_list(
+        "client_id", flat=True
+    )
+    track_popularity_many((instance, client_id, -1) for client_id in client_ids)
+
+
+@receiver(post_delete, sender=Schedule)
+def schedule_deleted(sender, instance: Schedule, **kwargs):
+    day = timezone.localdate(instance.start_time)
+    transaction.on_commit(lambda: rebuild_occupancy([day]))
+
+
+@receiver(pre_save, sender=Service)
+def service_saving(sender, instance: Service, **kwargs):
+    if instance._state.adding:
+        return
+
+    previous = (
+        Service.objects.filter(pk=instance.pk)
+        .values_list("max_participants", flat=True)
+        .first()
+    )
+    setattr(instance, "previous_max_participants", previous)
+
+
+@receiver(post_save, sender=Service)
+def service_saved(sender, instance: Service, **kwargs):
+    previous = getattr(instance, "previous_max_participants", None)
+    setattr(instance, "previous_max_participants", None)
+
+    if previous is None or previous == instance.max_participants:
+        return
+
+    def rebuild_future_days():
+        future = Schedule.objects.filter(
+            service_id=instance.pk, start_time__gte=timezone.now()
+        ).datetimes("start_time", "day")
+        rebuild_occupancy({value.date() for value in future})
+
+    transaction.on_commit(rebuild_future_days)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Trainer)
+@receiver(post_delete, sender=Trainer)
+def schedule_changed(sender, **kwargs):
+    invalidate_schedule()
@@ -70,6 +70,23 @@ $(document).ready(function () {
     }
   });
 
+  const seatEventsUrl = $(".schedule").data("seat-events-url");
+
+  if (window.EventSource && seatEventsUrl) {
+    const seatEvents = new EventSource(seatEventsUrl);
+
+    seatEvents.addEventListener("seats", function (event) {
+      const change = JSON.parse(event.data);
+      const item = $(`.schedule__item[data-schedule-id="${change.schedule_id}"]`);
+      const seats = Math.max(change.remaining_seats, 0);
+
+      item.find(".schedule__seats-count").text(seats);
+      item.find(".schedule__seats").prop("hidden", seats === 0);
+
+      item.data("can-book", seats > 0 && item.data("bookable"));
+    });
+  }
+
   function replaceBookingId(urlTemplate, newId) {
     return urlTemplate.replace(/\/\d+\//, `/${newId}/`)
   }
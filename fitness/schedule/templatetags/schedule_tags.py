@@ -3,7 +3,8 @@ from itertools import groupby
 from django import template
 from django.contrib.auth import get_user_model
 from django.http import HttpRequest
-from schedule.views import get_schedule
+from django.urls import reverse
+from schedule.views import get_schedule, seat_events_enabled
 
 register = template.Library()
 User = get_user_model()
@@ -23,5 +24,8 @@ def get_schedule_tag(request: HttpRequest, **kwargs):
     context = {
         "schedule": schedule,
         "days": list(days.items()),
+        "seat_events_url": (
+            reverse("seat_events") if seat_events_enabled(request) else None
+        ),
     }
     return context
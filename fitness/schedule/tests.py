@@ -1,3 +1,1803 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from io import StringIO
+from itertools import combinations
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from core.models import Service, Trainer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count, F, Q, Sum
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework_simplejwt.tokens import AccessToken
+from users.tokens import UserRefreshToken
+
+from .export import export_csv
+from .models import (
+    Booking,
+    Notification,
+    Schedule,
+    ScheduleOccupancyDaily,
+    ScheduleTemplate,
+    ServicePopularity,
+    TrainerMonthlyClient,
+    TrainerPopularity,
+    WaitlistEntry,
+    occupancy_groups,
+    rebuild_occupancy,
+    rebuild_popularity,
+    split_schedule_conflicts,
+    track_occupancy_many,
+)
+from .pagination import BookingPagination, apaginate_keyset, paginate_keyset
+from .serializers import (
+    BookedScheduleRowSerializer,
+    BookedScheduleSerializer,
+    ScheduleRowSerializer,
+    ScheduleSerializer,
+)
+from .utils import day_bounds
+from .views import (
+    cancel,
+    cancel_many,
+    get_bookings,
+    get_user_booking_ids,
+    join_waitlist,
+    seat_events_view,
+    to_book,
+    to_book_many,
+)
+
+User = get_user_model()
+
+
+def create_trainer(username: str, **kwargs) -> Trainer:
+    user = User.objects.create_user(username, f"{username}@example.com", **kwargs)
+    return Trainer.objects.create(user=user, slug=username, specialization="Йога")
+
+
+def create_service(slug: str, **kwargs) -> Service:
+    kwargs.setdefault("duration", timedelta(hours=1))
+    return Service.objects.create(name=slug, slug=slug, price=100, **kwargs)
+
+
+@override_settings(DEBUG_TOOLBAR_CONFIG={"SHOW_TOOLBAR_CALLBACK": lambda r: False})
+class AdminChangelistQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        trainer_user = User.objects.create_user("trainer", "trainer@example.com")
+        cls.trainer = Trainer.objects.create(
+            user=trainer_user, slug="trainer", specialization="Йога"
+        )
+        cls.service = Service.objects.create(
+            name="Йога", slug="yoga", duration=timedelta(hours=1), price=100
+        )
+        cls.service.trainers.add(cls.trainer)
+        cls.start = timezone.now().replace(microsecond=0)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count: int) -> None:
+        offset = Schedule.objects.count()
+        schedules = Schedule.objects.bulk_create(
+            Schedule(
+                service=self.service,
+                trainer=self.trainer,
+                start_time=self.start + timedelta(days=offset + i),
+            )
+            for i in range(count)
+        )
+        clients = User.objects.bulk_create(
+            User(
+                username=f"client{offset + i}", email=f"client{offset + i}@example.com"
+            )
+            for i in range(count)
+        )
+        Booking.objects.bulk_create(
+            Booking(schedule=schedule, client=client)
+            for schedule, client in zip(schedules, clients)
+        )
+
+    def assertChangelistQueries(self, url: str, num: int) -> None:
+        for count in (3, 15):
+            self.add_rows(count)
+
+            with self.assertNumQueries(num):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_booking_changelist(self):
+        self.assertChangelistQueries(reverse("admin:schedule_booking_changelist"), 7)
+
+    def test_schedule_changelist(self):
+        self.assertChangelistQueries(reverse("admin:schedule_schedule_changelist"), 7)
+
+    def test_service_changelist(self):
+        self.assertChangelistQueries(reverse("admin:core_service_changelist"), 5)
+
+
+class PopularityTrackingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(2)
+        ]
+        cls.trainers = [create_trainer(f"trainer{i}") for i in range(2)]
+        service = create_service("yoga", max_participants=5)
+        start = (timezone.localtime() + timedelta(days=2)).replace(
+            hour=10, minute=0, second=0, microsecond=0
+        )
+        cls.schedules = [
+            Schedule.objects.create(
+                service=service,
+                trainer=cls.trainers[0],
+                start_time=start + timedelta(hours=i),
+            )
+            for i in range(3)
+        ]
+        rebuild_occupancy()
+
+    def assertPopularity(
+        self, trainer: Trainer, distinct_clients: int, bookings_count: int
+    ) -> None:
+        stats = TrainerPopularity.objects.filter(trainer=trainer).first()
+        self.assertEqual(
+            (stats.distinct_clients, stats.bookings_count) if stats else (0, 0),
+            (distinct_clients, bookings_count),
+        )
+
+    def book(self, client: User, schedule: Schedule) -> int:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(to_book(client.pk, schedule.pk)["success"])
+
+        return Booking.objects.get(client=client, schedule=schedule).pk
+
+    def test_rollup_is_updated_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertNumQueries(8):
+                to_book(self.clients[0].pk, self.schedules[0].pk)
+
+        self.assertFalse(TrainerPopularity.objects.exists())
+
+        for callback in callbacks:
+            callback()
+
+        self.assertPopularity(self.trainers[0], 1, 1)
+
+    def test_distinct_clients_are_counted_incrementally(self):
+        first_id = self.book(self.clients[0], self.schedules[0])
+        second_id = self.book(self.clients[0], self.schedules[1])
+        self.book(self.clients[1], self.schedules[0])
+        self.assertPopularity(self.trainers[0], 2, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel(self.clients[0].pk, first_id)
+
+        self.assertPopularity(self.trainers[0], 2, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel(self.clients[0].pk, second_id)
+
+        self.assertPopularity(self.trainers[0], 1, 1)
+        self.assertFalse(
+            TrainerMonthlyClient.objects.filter(client=self.clients[0]).exists()
+        )
+
+    def test_bulk_delete_keeps_distinct_clients(self):
+        for schedule in self.schedules:
+            for client in self.clients:
+                self.book(client, schedule)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.filter(client=self.clients[0]).delete()
+
+        for model in (TrainerPopularity, ServicePopularity):
+            stats = model.objects.get()
+            self.assertEqual(stats.distinct_clients, 1)
+            self.assertEqual(stats.bookings_count, 3)
+
+    def test_schedule_move_updates_rollups(self):
+        self.book(self.clients[0], self.schedules[0])
+        self.book(self.clients[0], self.schedules[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule = Schedule.objects.get(pk=self.schedules[0].pk)
+            schedule.trainer = self.trainers[1]
+            schedule.save()
+
+        self.assertPopularity(self.trainers[0], 1, 1)
+        self.assertPopularity(self.trainers[1], 1, 1)
+
+    def test_trainer_delete(self):
+        self.book(self.clients[0], self.schedules[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trainers[0].delete()
+
+        self.assertFalse(TrainerPopularity.objects.exists())
+        self.assertFalse(TrainerMonthlyClient.objects.exists())
+
+    def test_client_delete_releases_seats(self):
+        for schedule in self.schedules[:2]:
+            self.book(self.clients[0], schedule)
+
+        self.book(self.clients[1], self.schedules[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(14):
+                self.clients[0].delete()
+
+        self.assertEqual(
+            [schedule.booked_count for schedule in Schedule.objects.all()], [1, 0, 0]
+        )
+        self.assertPopularity(self.trainers[0], 1, 1)
+        self.assertEqual(
+            list(ScheduleOccupancyDaily.objects.values_list("hour", "booked")),
+            [(10, 1), (11, 0), (12, 0)],
+        )
+
+    def test_schedule_delete_is_not_per_booking(self):
+        for client in self.clients:
+            self.book(client, self.schedules[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(8):
+                Schedule.objects.filter(pk=self.schedules[0].pk).delete()
+
+        self.assertPopularity(self.trainers[0], 0, 0)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_rebuild_matches_tracking(self):
+        for schedule in self.schedules[:2]:
+            for client in self.clients:
+                self.book(client, schedule)
+
+        tracked = list(
+            TrainerMonthlyClient.objects.values_list("client", "bookings_count")
+        )
+        rebuild_popularity()
+
+        self.assertPopularity(self.trainers[0], 2, 4)
+        self.assertCountEqual(
+            TrainerMonthlyClient.objects.values_list("client", "bookings_count"),
+            tracked,
+        )
+
+    def test_set_canceled_tracks_deltas(self):
+        for schedule in self.schedules[:2]:
+            self.book(self.clients[0], schedule)
+
+        self.book(self.clients[1], self.schedules[0])
+        bookings = Booking.objects.filter(client=self.clients[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(bookings.set_canceled(True), 2)
+
+        self.assertPopularity(self.trainers[0], 1, 1)
+        self.assertEqual(Schedule.objects.get(pk=self.schedules[0].pk).booked_count, 1)
+        occupancy = list(
+            ScheduleOccupancyDaily.objects.order_by("hour").values_list(
+                "booked", "canceled"
+            )
+        )
+        self.assertEqual(occupancy, [(1, 1), (0, 1), (0, 0)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(bookings.set_canceled(False), 2)
+
+        self.assertPopularity(self.trainers[0], 2, 3)
+        tracked = list(
+            ScheduleOccupancyDaily.objects.order_by("hour").values_list(
+                "booked", "canceled"
+            )
+        )
+        self.assertEqual(tracked, [(2, 0), (1, 0), (0, 0)])
+        rebuild_occupancy()
+        self.assertCountEqual(
+            ScheduleOccupancyDaily.objects.values_list("booked", "canceled"), tracked
+        )
+
+    def test_cancel_nothing_keeps_rollups(self):
+        self.book(self.clients[0], self.schedules[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.filter(pk=0).set_canceled(True)
+
+        self.assertPopularity(self.trainers[0], 1, 1)
+        self.assertCountEqual(
+            ScheduleOccupancyDaily.objects.values_list("booked", flat=True), [1, 0, 0]
+        )
+
+
+class OccupancyRollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user("client", "client@example.com")
+        cls.trainer = create_trainer("trainer")
+        cls.service = create_service("yoga", max_participants=5)
+        cls.start = (timezone.localtime() + timedelta(days=2)).replace(
+            hour=10, minute=0, second=0, microsecond=0
+        )
+        cls.schedule = Schedule.objects.create(
+            service=cls.service, trainer=cls.trainer, start_time=cls.start
+        )
+        Booking.objects.create(schedule=cls.schedule, client=cls.client_user)
+        Schedule.objects.all().recount_bookings()
+        rebuild_occupancy()
+
+    def assertOccupancy(self, *expected: tuple) -> None:
+        self.assertCountEqual(
+            ScheduleOccupancyDaily.objects.values_list(
+                "day", "hour", "capacity", "booked"
+            ),
+            expected,
+        )
+
+    def test_schedule_move_rebuilds_both_days(self):
+        moved = self.start + timedelta(days=1, hours=2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule = Schedule.objects.get(pk=self.schedule.pk)
+            schedule.start_time = moved
+            schedule.save()
+
+        self.assertOccupancy((moved.date(), 12, 5, 1))
+
+    def test_capacity_change_rebuilds_future_days(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.max_participants = 8
+            self.service.save()
+
+        self.assertOccupancy((self.start.date(), 10, 8, 1))
+
+    def test_track_many_in_one_update(self):
+        later = Schedule.objects.create(
+            service=self.service,
+            trainer=self.trainer,
+            start_time=self.start + timedelta(hours=1),
+        )
+        rebuild_occupancy()
+
+        with self.assertNumQueries(1):
+            track_occupancy_many([(self.schedule, 2, 0), (later, 0, 1)])
+
+        self.assertOccupancy(
+            (self.start.date(), 10, 5, 3), (self.start.date(), 11, 5, 0)
+        )
+        self.assertEqual(ScheduleOccupancyDaily.objects.get(hour=11).canceled, 1)
+
+
+class OccupancyAnalyticsTest(TestCase):
+    url = "/api/analytics/occupancy/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(3)
+        ]
+        cls.trainers = [
+            create_trainer(f"trainer{i}", last_name=f"Тренер{i}", first_name="Иван")
+            for i in range(2)
+        ]
+        cls.services = [
+            create_service("yoga", max_participants=4),
+            create_service("pilates", max_participants=6),
+        ]
+        cls.day = timezone.localdate() + timedelta(days=2)
+        cls.schedules = [
+            Schedule.objects.create(
+                service=cls.services[service],
+                trainer=cls.trainers[trainer],
+                start_time=timezone.make_aware(
+                    datetime.combine(cls.day + timedelta(days=days), time(hour))
+                ),
+            )
+            for days, hour, service, trainer in (
+                (0, 10, 0, 0),
+                (0, 12, 1, 1),
+                (1, 10, 0, 1),
+                (1, 18, 1, 0),
+            )
+        ]
+        Booking.objects.bulk_create(
+            Booking(schedule=cls.schedules[i], client=cls.clients[j], canceled=canceled)
+            for i, j, canceled in (
+                (0, 0, False),
+                (0, 1, False),
+                (0, 2, True),
+                (1, 0, False),
+                (2, 1, True),
+                (3, 2, False),
+            )
+        )
+        Schedule.objects.all().recount_bookings()
+        rebuild_occupancy()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get_slots(self, item: dict, groups: tuple[str, ...]) -> tuple:
+        slots = {
+            "day": item.get("day"),
+            "weekday": item.get("weekday"),
+            "hour": item.get("hour"),
+            "service": (item.get("service_id"), item.get("service_name")),
+            "trainer": (item.get("trainer_id"), item.get("trainer_name")),
+        }
+        return tuple(slots[group] for group in groups)
+
+    def get_expected(self, groups: tuple[str, ...]) -> list[tuple]:
+        totals = {}
+
+        for schedule in Schedule.objects.select_related("service", "trainer__user"):
+            start = timezone.localtime(schedule.start_time)
+            user = schedule.trainer.user
+            slots = {
+                "day": start.date(),
+                "weekday": start.weekday(),
+                "hour": start.hour,
+                "service": (schedule.service_id, schedule.service.name),
+                "trainer": (schedule.trainer_id, f"{user.last_name} {user.first_name}"),
+            }
+            key = tuple(slots[group] for group in groups)
+            row = totals.setdefault(key, [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += schedule.service.max_participants
+            row[2] += schedule.bookings.filter(canceled=False).count()
+            row[3] += schedule.bookings.filter(canceled=True).count()
+
+        return [
+            (key, *row, round(row[2] / row[1], 4))
+            for key, row in sorted(totals.items())
+        ]
+
+    def test_every_grouping(self):
+        for size in range(len(occupancy_groups) + 1):
+            for groups in combinations(occupancy_groups, size):
+                with self.subTest(groups=groups):
+                    response = self.client.get(
+                        self.url,
+                        {
+                            "from": self.day.isoformat(),
+                            "to": (self.day + timedelta(days=1)).isoformat(),
+                            "group_by": ",".join(groups),
+                        },
+                    )
+
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.data["group_by"], list(groups))
+                    self.assertEqual(
+                        [
+                            (
+                                self.get_slots(item, groups),
+                                item["sessions_total"],
+                                item["capacity_total"],
+                                item["booked_total"],
+                                item["canceled_total"],
+                                item["fill_rate"],
+                            )
+                            for item in response.data["items"]
+                        ],
+                        self.get_expected(groups),
+                    )
+
+    def test_unknown_grouping(self):
+        response = self.client.get(self.url, {"group_by": "day,month"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("month", str(response.data["group_by"]))
+
+    def test_tracking_matches_rebuild(self):
+        def get_stats():
+            return list(
+                ScheduleOccupancyDaily.objects.filter(sessions__gt=0)
+                .order_by("day", "hour", "service", "trainer")
+                .values_list(
+                    "day",
+                    "weekday",
+                    "hour",
+                    "service",
+                    "trainer",
+                    "sessions",
+                    "capacity",
+                    "booked",
+                    "canceled",
+                )
+            )
+
+        booking = Booking.objects.get(schedule=self.schedules[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule = Schedule.objects.get(pk=self.schedules[0].pk)
+            schedule.start_time += timedelta(days=1, hours=3)
+            schedule.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(
+                to_book(self.clients[1].pk, self.schedules[1].pk)["success"]
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(cancel(self.clients[0].pk, booking.pk)["success"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(
+                to_book(self.clients[2].pk, self.schedules[0].pk)["success"]
+            )
+
+        tracked = get_stats()
+        rebuild_occupancy()
+
+        self.assertEqual(tracked, get_stats())
+
+
+@override_settings(DEBUG_TOOLBAR_CONFIG={"SHOW_TOOLBAR_CALLBACK": lambda r: False})
+class ScheduleAdminRollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(2)
+        ]
+        cls.trainers = [create_trainer(f"trainer{i}") for i in range(2)]
+        cls.services = [
+            create_service(f"yoga{i}", max_participants=5) for i in range(2)
+        ]
+        cls.start = timezone.make_aware(datetime(2030, 1, 31, 10))
+        cls.schedule = Schedule.objects.create(
+            service=cls.services[0], trainer=cls.trainers[0], start_time=cls.start
+        )
+        cls.bookings = Booking.objects.bulk_create(
+            Booking(schedule=cls.schedule, client=client) for client in cls.clients
+        )
+        Schedule.objects.all().recount_bookings()
+        rebuild_popularity()
+        rebuild_occupancy()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def change(
+        self, start_time: datetime, trainer: Trainer, service: Service, **canceled
+    ):
+        data = {
+            "service": service.pk,
+            "trainer": trainer.pk,
+            "start_time_0": start_time.strftime("%d.%m.%Y"),
+            "start_time_1": start_time.strftime("%H:%M:%S"),
+            "bookings-TOTAL_FORMS": len(self.bookings),
+            "bookings-INITIAL_FORMS": len(self.bookings),
+            "bookings-MIN_NUM_FORMS": 0,
+            "bookings-MAX_NUM_FORMS": 1000,
+        }
+
+        for i, booking in enumerate(self.bookings):
+            data[f"bookings-{i}-id"] = booking.pk
+            data[f"bookings-{i}-schedule"] = self.schedule.pk
+
+            if canceled.get(booking.client.username):
+                data[f"bookings-{i}-canceled"] = "on"
+
+        url = reverse("admin:schedule_schedule_change", args=(self.schedule.pk,))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 302)
+
+    def get_rollups(self) -> dict[str, list]:
+        return {
+            "trainers": sorted(
+                TrainerPopularity.objects.filter(bookings_count__gt=0).values_list(
+                    "month", "trainer", "distinct_clients", "bookings_count"
+                )
+            ),
+            "services": sorted(
+                ServicePopularity.objects.filter(bookings_count__gt=0).values_list(
+                    "month", "service", "distinct_clients", "bookings_count"
+                )
+            ),
+            "occupancy": sorted(
+                ScheduleOccupancyDaily.objects.values_list(
+                    "day", "trainer", "service", "booked", "canceled"
+                )
+            ),
+        }
+
+    def test_move_across_month(self):
+        moved = self.start + timedelta(days=1)
+        self.change(moved, self.trainers[1], self.services[1], client1=True)
+
+        rollups = self.get_rollups()
+        self.assertEqual(Schedule.objects.get().booked_count, 1)
+        self.assertEqual(
+            rollups["trainers"], [(moved.date(), self.trainers[1].pk, 1, 1)]
+        )
+        self.assertEqual(
+            rollups["services"], [(moved.date(), self.services[1].pk, 1, 1)]
+        )
+        self.assertEqual(
+            rollups["occupancy"],
+            [(moved.date(), self.trainers[1].pk, self.services[1].pk, 1, 1)],
+        )
+
+        rebuild_popularity()
+        rebuild_occupancy()
+        self.assertEqual(self.get_rollups(), rollups)
+
+    def test_unchanged_form_keeps_rollups(self):
+        rollups = self.get_rollups()
+        self.change(self.start, self.trainers[0], self.services[0])
+        self.assertEqual(self.get_rollups(), rollups)
+
+
+@override_settings(DEBUG_TOOLBAR_CONFIG={"SHOW_TOOLBAR_CALLBACK": lambda r: False})
+class BookingAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(3)
+        ]
+        cls.schedule = Schedule.objects.create(
+            service=create_service("yoga", max_participants=1),
+            trainer=create_trainer("trainer"),
+            start_time=timezone.now() + timedelta(days=1),
+        )
+        cls.active, cls.canceled = Booking.objects.bulk_create(
+            Booking(schedule=cls.schedule, client=client, canceled=canceled)
+            for client, canceled in zip(cls.clients, (False, True))
+        )
+        Schedule.objects.all().recount_bookings()
+        WaitlistEntry.objects.create(schedule=cls.schedule, client=cls.clients[2])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def change(self, booking: Booking, canceled: bool):
+        url = reverse("admin:schedule_booking_change", args=(booking.pk,))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, {"canceled": "on"} if canceled else {})
+
+    def test_restore_into_full_class(self):
+        response = self.change(self.canceled, False)
+
+        self.assertContains(response, "нет свободных мест")
+        self.assertTrue(Booking.objects.get(pk=self.canceled.pk).canceled)
+        self.assertEqual(Schedule.objects.get().booked_count, 1)
+
+    def test_cancel_promotes_waitlist(self):
+        self.assertEqual(self.change(self.active, True).status_code, 302)
+
+        self.assertTrue(Booking.objects.get(pk=self.active.pk).canceled)
+        self.assertTrue(Booking.not_canceled.filter(client=self.clients[2]).exists())
+        self.assertTrue(Notification.objects.filter(client=self.clients[2]).exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.assertEqual(Schedule.objects.get().booked_count, 1)
+        self.assertEqual(
+            TrainerPopularity.objects.values_list("bookings_count", flat=True).get(),
+            1,
+        )
+
+
+@override_settings(DEBUG_TOOLBAR_CONFIG={"SHOW_TOOLBAR_CALLBACK": lambda r: False})
+class ExportCsvTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.clients = [
+            User.objects.create_user(
+                "client0",
+                "client0@example.com",
+                last_name="Петров",
+                first_name="Пётр",
+                phone_number="+7 (777) 777-77-77",
+            ),
+            User.objects.create_user("client1", "client1@example.com"),
+        ]
+        cls.trainers = [
+            create_trainer("trainer0", last_name="Иванов", first_name="Иван"),
+            create_trainer("trainer1"),
+        ]
+        cls.services = [
+            create_service("yoga", max_participants=5),
+            create_service("pilates", max_participants=5),
+        ]
+        cls.schedules = [
+            Schedule.objects.create(
+                service=service,
+                trainer=trainer,
+                start_time=timezone.make_aware(datetime(2030, 1, day, 9, 30)),
+            )
+            for day, service, trainer in (
+                (10, cls.services[0], cls.trainers[0]),
+                (11, cls.services[1], cls.trainers[0]),
+                (12, cls.services[0], cls.trainers[1]),
+            )
+        ]
+        cls.bookings = Booking.objects.bulk_create(
+            (
+                Booking(schedule=cls.schedules[0], client=cls.clients[0]),
+                Booking(
+                    schedule=cls.schedules[1], client=cls.clients[1], canceled=True
+                ),
+            )
+        )
+        Schedule.objects.all().recount_bookings()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def read_csv(self, content: str) -> list[list[str]]:
+        self.assertTrue(content.startswith("\ufeff"))
+        return list(csv.reader(StringIO(content[1:]), delimiter=";"))
+
+    def export(self, *args) -> list[int]:
+        stdout = StringIO()
+        call_command("export_csv", *args, stdout=stdout)
+        return [int(row[0]) for row in self.read_csv(stdout.getvalue())[1:]]
+
+    def test_admin_export_streams_bookings(self):
+        response = self.client.post(
+            reverse("admin:schedule_booking_changelist"),
+            {
+                "action": "export_csv",
+                "_selected_action": [booking.pk for booking in self.bookings],
+            },
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertTrue(
+            response["Content-Disposition"].startswith(
+                'attachment; filename="bookings-'
+            )
+        )
+        header, *rows = self.read_csv(b"".join(response.streaming_content).decode())
+        self.assertEqual(header[:3], ["ID", "Клиент", "Email"])
+        self.assertEqual(
+            [row[:7] + row[8:] for row in rows],
+            [
+                [
+                    str(self.bookings[0].pk),
+                    "Петров Пётр",
+                    "client0@example.com",
+                    "+7 (777) 777-77-77",
+                    "yoga",
+                    "Иванов Иван",
+                    "10.01.2030 09:30",
+                    "Нет",
+                ],
+                [
+                    str(self.bookings[1].pk),
+                    "client1",
+                    "client1@example.com",
+                    "",
+                    "pilates",
+                    "Иванов Иван",
+                    "11.01.2030 09:30",
+                    "Да",
+                ],
+            ],
+        )
+
+    def test_export_is_chunked(self):
+        with mock.patch("schedule.export.EXPORT_CHUNK_SIZE", 2):
+            chunks = list(export_csv("schedule", Schedule.objects.all()))
+
+        self.assertEqual([chunk.count("\r\n") for chunk in chunks], [1, 2, 1])
+        self.assertEqual(
+            self.read_csv("".join(chunks))[1][1:],
+            ["yoga", "Иванов Иван", "10.01.2030 09:30", "60", "5", "1", "4"],
+        )
+
+    def test_command_filters(self):
+        pks = [schedule.pk for schedule in self.schedules]
+
+        self.assertEqual(self.export("schedule"), pks)
+        self.assertEqual(self.export("schedule", "--since", "2030-01-11"), pks[1:])
+        self.assertEqual(self.export("schedule", "--until", "2030-01-11"), pks[:2])
+        self.assertEqual(
+            self.export("schedule", "--trainer", str(self.trainers[1].pk)), pks[2:]
+        )
+        self.assertEqual(
+            self.export("bookings", "--service", str(self.services[1].pk)),
+            [self.bookings[1].pk],
+        )
+
+    def test_command_rejects_invalid_date(self):
+        with self.assertRaisesMessage(CommandError, "ГГГГ-ММ-ДД"):
+            self.export("schedule", "--since", "10.01.2030")
+
+
+class ScheduleTemplateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trainers = [create_trainer(f"trainer{i}") for i in range(2)]
+        cls.service = create_service("yoga")
+        cls.long_service = create_service("pilates", duration=timedelta(minutes=90))
+        today = timezone.localdate()
+        cls.monday = today + timedelta(days=7 - today.weekday())
+
+    def at(self, day: int, hour: int, minute: int = 0) -> datetime:
+        return timezone.make_aware(
+            datetime.combine(self.monday + timedelta(days=day), time(hour, minute))
+        )
+
+    def create_template(self, weekday: int, **kwargs) -> ScheduleTemplate:
+        kwargs.setdefault("service", self.service)
+        kwargs.setdefault("trainer", self.trainers[0])
+        kwargs.setdefault("valid_from", self.monday)
+        return ScheduleTemplate.objects.create(
+            weekday=weekday, start_time=time(10), **kwargs
+        )
+
+    def test_materialize(self):
+        self.create_template(ScheduleTemplate.Weekday.MONDAY)
+        self.create_template(
+            ScheduleTemplate.Weekday.WEDNESDAY, valid_to=self.monday + timedelta(days=9)
+        )
+        self.create_template(
+            ScheduleTemplate.Weekday.FRIDAY,
+            trainer=self.trainers[1],
+            valid_from=self.monday + timedelta(days=7),
+        )
+
+        created, conflicts = ScheduleTemplate.objects.materialize(self.monday, 3)
+
+        self.assertEqual(conflicts, [])
+        self.assertEqual(len(created), 7)
+        self.assertEqual(
+            list(Schedule.objects.values_list("trainer", "start_time")),
+            [
+                (self.trainers[0].pk, self.at(0, 10)),
+                (self.trainers[0].pk, self.at(2, 10)),
+                (self.trainers[0].pk, self.at(7, 10)),
+                (self.trainers[0].pk, self.at(9, 10)),
+                (self.trainers[1].pk, self.at(11, 10)),
+                (self.trainers[0].pk, self.at(14, 10)),
+                (self.trainers[1].pk, self.at(18, 10)),
+            ],
+        )
+
+    def test_materialize_twice(self):
+        self.create_template(ScheduleTemplate.Weekday.MONDAY)
+        ScheduleTemplate.objects.materialize(self.monday, 2)
+
+        created, conflicts = ScheduleTemplate.objects.materialize(self.monday, 2)
+
+        self.assertEqual(created, [])
+        self.assertEqual(
+            [reason for _, reason in conflicts],
+            ["у тренера уже есть занятие в это время"] * 2,
+        )
+        self.assertEqual(Schedule.objects.count(), 2)
+
+    def test_split_schedule_conflicts(self):
+        Schedule.objects.create(
+            service=self.service, trainer=self.trainers[0], start_time=self.at(0, 10)
+        )
+        new_schedule = [
+            Schedule(service=service, trainer=trainer, start_time=start_time)
+            for service, trainer, start_time in (
+                (self.service, self.trainers[0], self.at(0, 9, 30)),
+                (self.service, self.trainers[0], self.at(0, 10, 30)),
+                (self.service, self.trainers[0], self.at(0, 11)),
+                (self.long_service, self.trainers[0], self.at(0, 11, 30)),
+                (self.service, self.trainers[1], self.at(0, 10)),
+                (self.service, self.trainers[0], self.at(0, 9)),
+                (self.service, self.trainers[0], self.at(0, 8, 30)),
+            )
+        ]
+
+        accepted, conflicts = split_schedule_conflicts(new_schedule)
+
+        self.assertEqual(accepted, [new_schedule[i] for i in (2, 4, 5)])
+        self.assertEqual(
+            conflicts,
+            [
+                (new_schedule[0], "у тренера уже есть занятие в это время"),
+                (new_schedule[1], "у тренера уже есть занятие в это время"),
+                (new_schedule[3], "пересекается с другим новым занятием"),
+                (new_schedule[6], "пересекается с другим новым занятием"),
+            ],
+        )
+
+
+class BatchBookingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user("client", "client@example.com")
+        other = User.objects.create_user("other", "other@example.com")
+        trainer = create_trainer("trainer")
+        service = create_service("yoga", max_participants=1)
+        start = (timezone.localtime() + timedelta(days=2)).replace(
+            hour=10, minute=0, second=0, microsecond=0
+        )
+        cls.schedules = [
+            Schedule.objects.create(
+                service=service, trainer=trainer, start_time=start + timedelta(hours=i)
+            )
+            for i in range(5)
+        ]
+        cls.past = Schedule.objects.create(
+            service=service, trainer=trainer, start_time=start - timedelta(days=3)
+        )
+        cls.other_booking = Booking.objects.create(
+            schedule=cls.schedules[2], client=other
+        )
+        cls.booking = Booking.objects.create(
+            schedule=cls.schedules[3], client=cls.client_user
+        )
+        cls.canceled_booking = Booking.objects.create(
+            schedule=cls.schedules[4], client=cls.client_user, canceled=True
+        )
+        cls.past_booking = Booking.objects.create(
+            schedule=cls.past, client=cls.client_user
+        )
+        Schedule.objects.all().recount_bookings()
+        rebuild_occupancy()
+
+    def post(self, url: str, data: dict) -> list[dict]:
+        token = AccessToken.for_user(self.client_user)
+        response = self.client.post(
+            url,
+            data,
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(response.status_code, 200)
+
+        for result in response.json():
+            self.assertEqual(set(result), {"success", "message", "item"})
+
+        return response.json()
+
+    def test_book_many(self):
+        ids = [schedule.pk for schedule in self.schedules] + [self.past.pk, 0]
+        results = self.post("/api/bookings/batch/", {"schedule_ids": ids + ids[:1]})
+
+        self.assertEqual(
+            [result["success"] for result in results],
+            [True, True, False, False, True, False, False],
+        )
+        self.assertEqual(
+            [result["message"].split(" '")[0] for result in results],
+            [
+                "Вы успешно записались на",
+                "Вы успешно записались на",
+                "Не осталось свободных мест на занятие",
+                "Вы уже записаны на",
+                "Вы успешно записались на",
+                "Вы уже записаны на",
+                "Занятие не найдено!",
+            ],
+        )
+        self.assertEqual(results[3]["item"]["booking_id"], self.booking.pk)
+        self.assertEqual(results[4]["item"]["booking_id"], self.canceled_booking.pk)
+        self.assertIsNone(results[6]["item"])
+        self.assertEqual(
+            list(
+                Schedule.objects.filter(pk__in=ids)
+                .order_by("start_time")
+                .values_list("booked_count", flat=True)
+            ),
+            [1, 1, 1, 1, 1, 1],
+        )
+        self.assertEqual(
+            Booking.not_canceled.filter(client=self.client_user).count(), 5
+        )
+
+    def test_cancel_many(self):
+        ids = [
+            self.booking.pk,
+            self.canceled_booking.pk,
+            self.past_booking.pk,
+            self.other_booking.pk,
+        ]
+        results = self.post("/api/bookings/batch/cancel/", {"booking_ids": ids})
+
+        self.assertEqual(
+            [result["success"] for result in results], [True, False, False, False]
+        )
+        self.assertEqual(
+            [result["message"].split(" '")[0] for result in results],
+            [
+                "Вы успешно отменили запись на",
+                "Запись на",
+                "Отменить запись на",
+                "Запись не найдена!",
+            ],
+        )
+        self.assertEqual(results[0]["item"]["count_remained_seats"], 1)
+        self.assertTrue(Booking.objects.get(pk=self.booking.pk).canceled)
+        self.assertFalse(Booking.objects.get(pk=self.past_booking.pk).canceled)
+
+    def test_batch_query_count(self):
+        ids = [self.schedules[i].pk for i in (0, 1, 4)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(9):
+                results = to_book_many(self.client_user.pk, ids)
+
+        self.assertTrue(all(result["success"] for result in results))
+        booking_ids = Booking.not_canceled.filter(
+            client=self.client_user, schedule_id__in=ids
+        ).values_list("pk", flat=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(8):
+                results = cancel_many(self.client_user.pk, booking_ids)
+
+        self.assertTrue(all(result["success"] for result in results))
+
+
+class WaitlistPromotionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(4)
+        ]
+        cls.schedule = Schedule.objects.create(
+            service=create_service("yoga", max_participants=2),
+            trainer=create_trainer("trainer"),
+            start_time=timezone.now() + timedelta(days=2),
+        )
+
+    def book(self, client: User) -> int:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(to_book(client.pk, self.schedule.pk)["success"])
+
+        return Booking.objects.get(client=client, schedule=self.schedule).pk
+
+    def cancel(self, client: User, booking_id: int) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(cancel(client.pk, booking_id)["success"])
+
+    def assertWaiting(self, *clients: User) -> None:
+        self.assertEqual(
+            list(
+                WaitlistEntry.objects.filter(schedule=self.schedule).values_list(
+                    "client", flat=True
+                )
+            ),
+            [client.pk for client in clients],
+        )
+
+    def assertPromoted(self, client: User, booking_id: int | None = None) -> None:
+        booking = Booking.not_canceled.get(client=client, schedule=self.schedule)
+        notification = Notification.objects.get(client=client)
+
+        if booking_id is not None:
+            self.assertEqual(booking.pk, booking_id)
+
+        self.assertEqual(notification.booking_id, booking.pk)
+        self.assertEqual(notification.kind, Notification.Kind.WAITLIST_PROMOTED)
+        self.assertEqual(Schedule.objects.get(pk=self.schedule.pk).booked_count, 2)
+
+    def test_cancel_promotes_first_waiter(self):
+        first_id = self.book(self.clients[0])
+        self.book(self.clients[1])
+
+        for client in self.clients[2:]:
+            self.assertTrue(join_waitlist(client.pk, self.schedule.pk)["success"])
+
+        self.cancel(self.clients[0], first_id)
+
+        self.assertPromoted(self.clients[2])
+        self.assertWaiting(self.clients[3])
+
+    def test_promotion_restores_canceled_booking(self):
+        canceled_id = self.book(self.clients[2])
+        self.cancel(self.clients[2], canceled_id)
+        first_id = self.book(self.clients[0])
+        self.book(self.clients[1])
+        self.assertTrue(join_waitlist(self.clients[2].pk, self.schedule.pk)["success"])
+
+        self.cancel(self.clients[0], first_id)
+
+        self.assertPromoted(self.clients[2], canceled_id)
+        self.assertWaiting()
+
+    def test_promotion_skips_booked_waiter(self):
+        first_id = self.book(self.clients[0])
+        self.book(self.clients[1])
+        WaitlistEntry.objects.create(schedule=self.schedule, client=self.clients[1])
+        self.assertTrue(join_waitlist(self.clients[2].pk, self.schedule.pk)["success"])
+
+        self.cancel(self.clients[0], first_id)
+
+        self.assertPromoted(self.clients[2])
+        self.assertWaiting()
+        self.assertEqual(Booking.objects.filter(client=self.clients[1]).count(), 1)
+        self.assertFalse(Notification.objects.filter(client=self.clients[1]).exists())
+
+
+class RowSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user, *others = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(3)
+        ]
+        cls.trainer = create_trainer("trainer")
+        service = create_service("yoga", max_participants=2)
+        now = timezone.now().replace(second=0, microsecond=0)
+        schedules = Schedule.objects.bulk_create(
+            Schedule(service=service, trainer=cls.trainer, start_time=now + delta)
+            for delta in (
+                timedelta(days=2),
+                timedelta(days=2, hours=1),
+                timedelta(hours=3),
+                timedelta(days=-1),
+                timedelta(days=1),
+                timedelta(days=3),
+            )
+        )
+        Booking.objects.bulk_create(
+            [
+                Booking(schedule=schedules[0], client=cls.client_user),
+                Booking(schedule=schedules[1], client=others[0]),
+                Booking(schedule=schedules[1], client=others[1]),
+                Booking(schedule=schedules[2], client=cls.client_user),
+                Booking(schedule=schedules[3], client=cls.client_user, canceled=True),
+                Booking(schedule=schedules[4], client=cls.client_user, canceled=True),
+            ]
+        )
+        Schedule.objects.all().recount_bookings()
+
+    def test_schedule_rows(self):
+        schedules = Schedule.objects.order_by("start_time")
+        rows = list(schedules.values(*ScheduleRowSerializer.fields))
+        schedule_objs = list(schedules.select_related("service", "trainer"))
+
+        for user in (self.client_user, self.trainer.user):
+            with self.subTest(user=user.username):
+                request = RequestFactory().get("/")
+                request.user = user
+                booking_ids = get_user_booking_ids(user.pk, [row["id"] for row in rows])
+
+                for schedule in schedule_objs:
+                    setattr(schedule, "booking_id", booking_ids.get(schedule.pk))
+
+                expected = ScheduleSerializer(
+                    schedule_objs, many=True, context={"request": request}
+                ).data
+                serializer = ScheduleRowSerializer(user.pk, booking_ids=booking_ids)
+
+                self.assertEqual(
+                    serializer.serialize(rows), [dict(item) for item in expected]
+                )
+
+    def test_booked_schedule_rows(self):
+        bookings = get_bookings(self.client_user.pk)
+        rows = bookings.values(*BookedScheduleRowSerializer.fields)
+        expected = BookedScheduleSerializer(bookings, many=True).data
+
+        self.assertEqual(
+            BookedScheduleRowSerializer(self.client_user.pk).serialize(rows),
+            [dict(item) for item in expected],
+        )
+
+
+class TrainerScheduleSyncTest(TestCase):
+    url = "/api/schedule/my/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.trainer = create_trainer("trainer")
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(2)
+        ]
+        service = create_service("yoga", max_participants=5)
+        today = timezone.localtime().replace(hour=12, minute=0, second=0)
+        cls.schedules = {
+            days: Schedule.objects.create(
+                service=service,
+                trainer=cls.trainer,
+                start_time=today + timedelta(days=days),
+            )
+            for days in (-8, -7, 28, 29)
+        }
+        cls.bookings = Booking.objects.bulk_create(
+            Booking(schedule=cls.schedules[28], client=client) for client in cls.clients
+        )
+        long_ago = timezone.now() - timedelta(hours=1)
+        Schedule.objects.update(updated_at=long_ago)
+        Booking.objects.update(updated_at=long_ago)
+
+    def setUp(self):
+        self.client.force_login(self.trainer.user)
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_default_period(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertCountEqual(
+            [item["id"] for item in data["items"]],
+            [self.schedules[-7].pk, self.schedules[28].pk],
+        )
+        self.assertCountEqual(
+            [booking["id"] for booking in data["bookings"]],
+            [booking.pk for booking in self.bookings],
+        )
+        self.assertCountEqual(
+            [client["id"] for client in data["clients"]],
+            [client.pk for client in self.clients],
+        )
+
+    def test_invalid_period(self):
+        today = timezone.localdate()
+
+        for params in (
+            {"from": today, "to": today - timedelta(days=1)},
+            {"from": today, "to": today + timedelta(days=92)},
+            {"since": -1},
+            {"since": 10**20},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+    def test_since_returns_changes(self):
+        since = self.get().json()["synced_at_ms"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(cancel(self.clients[0].pk, self.bookings[0].pk)["success"])
+            schedule = Schedule.objects.get(pk=self.schedules[-7].pk)
+            schedule.save()
+
+        data = self.get(since=since).json()
+
+        self.assertEqual([item["id"] for item in data["items"]], [schedule.pk])
+        self.assertEqual(data["bookings"], [])
+        self.assertEqual(data["canceled_bookings"], [self.bookings[0].pk])
+        self.assertGreaterEqual(data["synced_at_ms"], since)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.clients = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(2)
+        ]
+        cls.service = create_service("yoga", max_participants=5)
+        cls.schedule = Schedule.objects.create(
+            service=cls.service,
+            trainer=create_trainer("trainer"),
+            start_time=timezone.now() + timedelta(days=1),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(
+            mock.patch("django.utils.timezone.now", return_value=timezone.now())
+        )
+
+    def get(self, url: str, user: User, etag: str | None = None):
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+        if etag:
+            headers["If-None-Match"] = etag
+
+        return self.client.get(url, headers=headers)
+
+    def get_seats(self, response) -> int:
+        return response.json()["items"][0]["count_remained_seats"]
+
+    def test_schedule_not_modified(self):
+        response = self.get("/api/schedule/", self.clients[0])
+        etag = response["ETag"]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.get("/api/schedule/", self.clients[0], etag).status_code, 304
+        )
+        self.assertNotEqual(self.get("/api/schedule/", self.clients[1])["ETag"], etag)
+
+    def test_schedule_etag_changes_on_commit(self):
+        response = self.get("/api/schedule/", self.clients[0])
+        etag = response["ETag"]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertTrue(to_book(self.clients[1].pk, self.schedule.pk)["success"])
+
+        self.assertEqual(
+            self.get("/api/schedule/", self.clients[0], etag).status_code, 304
+        )
+
+        for callback in callbacks:
+            callback()
+
+        response = self.get("/api/schedule/", self.clients[0], etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.get_seats(response), 4)
+
+    def test_schedule_etag_follows_deadlines(self):
+        day = timezone.localdate() + timedelta(days=3)
+
+        def at(hour: int) -> datetime:
+            return timezone.make_aware(datetime.combine(day, time(hour)))
+
+        Schedule.objects.create(
+            service=self.service, trainer=self.schedule.trainer, start_time=at(18)
+        )
+
+        def get_at(moment: datetime, etag: str | None = None):
+            with mock.patch("django.utils.timezone.now", return_value=moment):
+                return self.get("/api/schedule/", self.clients[0], etag)
+
+        etag = get_at(at(9))["ETag"]
+        self.assertEqual(get_at(at(11), etag).status_code, 304)
+
+        response = get_at(at(12) + timedelta(seconds=1), etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response["Last-Modified"], http_date(at(12).timestamp()))
+        self.assertFalse(response.json()["items"][0]["can_cancel"])
+        self.assertEqual(get_at(at(17), response["ETag"]).status_code, 304)
+
+    def test_versions_outlive_local_cache(self):
+        etag = self.get("/api/schedule/", self.clients[0])["ETag"]
+        cache.clear()
+
+        self.assertEqual(
+            self.get("/api/schedule/", self.clients[0], etag).status_code, 304
+        )
+
+    def test_services_etag_changes_on_commit(self):
+        etag = self.get("/api/services/", self.clients[0])["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.name = "Йога"
+            self.service.save()
+
+        response = self.get("/api/services/", self.clients[0], etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Йога")
+        self.assertEqual(
+            self.get("/api/services/", self.clients[0], response["ETag"]).status_code,
+            304,
+        )
+
+
+@mock.patch.object(BookingPagination, "page_size", 3)
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user("client", "client@example.com")
+        cls.trainers = [create_trainer(f"trainer{i}") for i in range(2)]
+        cls.service = create_service("yoga", max_participants=5)
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+        for i in range(4):
+            for trainer in cls.trainers:
+                cls.create_booking(trainer, cls.start + timedelta(hours=i))
+
+    @classmethod
+    def create_booking(cls, trainer: Trainer, start_time: datetime) -> Booking:
+        schedule = Schedule.objects.create(
+            service=cls.service, trainer=trainer, start_time=start_time
+        )
+        return Booking.objects.create(schedule=schedule, client=cls.client_user)
+
+    def get_page(self, url: str = "/api/bookings/") -> dict:
+        token = AccessToken.for_user(self.client_user)
+        response = self.client.get(url, headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get_ids(self, page: dict) -> list[int]:
+        return [item["booking_id"] for item in page["results"]]
+
+    def test_pages_cover_all_bookings_once(self):
+        expected = list(get_bookings(self.client_user.pk).values_list("pk", flat=True))
+        pages = [self.get_page()]
+
+        while pages[-1]["next"]:
+            pages.append(self.get_page(pages[-1]["next"]))
+
+        self.assertEqual([len(page["results"]) for page in pages], [3, 3, 2])
+        self.assertEqual([pk for page in pages for pk in self.get_ids(page)], expected)
+        self.assertIsNone(pages[0]["previous"])
+
+        for page, previous in zip(pages[1:], pages):
+            self.assertEqual(
+                self.get_ids(self.get_page(page["previous"])), self.get_ids(previous)
+            )
+
+    def test_cursor_is_stable_across_inserts(self):
+        first = self.get_page()
+        second = self.get_page(first["next"])
+
+        self.create_booking(self.trainers[0], self.start + timedelta(days=1))
+        self.create_booking(self.trainers[0], self.start + timedelta(minutes=30))
+
+        self.assertEqual(
+            self.get_ids(self.get_page(first["next"])), self.get_ids(second)
+        )
+        self.assertEqual(
+            self.get_ids(self.get_page(second["previous"])), self.get_ids(first)
+        )
+
+    def test_async_pages_match(self):
+        queryset = get_bookings(self.client_user.pk)
+        cursor = None
+
+        for _ in range(3):
+            page = paginate_keyset(queryset, cursor, 3, "schedule__start_time")
+            async_page = async_to_sync(apaginate_keyset)(
+                queryset, cursor, 3, "schedule__start_time"
+            )
+
+            self.assertEqual(async_page.object_list, page.object_list)
+            self.assertEqual(async_page.next_cursor, page.next_cursor)
+            self.assertEqual(async_page.previous_cursor, page.previous_cursor)
+            cursor = page.next_cursor
+
+    def test_invalid_cursor(self):
+        token = AccessToken.for_user(self.client_user)
+        response = self.client.get(
+            "/api/bookings/?cursor=broken",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+class IndexUsageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user("client", "client@example.com")
+        cls.trainer = create_trainer("trainer")
+        cls.service = create_service("yoga", max_participants=5)
+        start = timezone.now() + timedelta(days=1)
+        cls.schedules = Schedule.objects.bulk_create(
+            Schedule(
+                service=cls.service,
+                trainer=cls.trainer,
+                start_time=start + timedelta(hours=i),
+            )
+            for i in range(3)
+        )
+        Booking.objects.bulk_create(
+            Booking(schedule=schedule, client=cls.client_user)
+            for schedule in cls.schedules
+        )
+
+    def assertUsesIndex(self, queryset, search: str) -> None:
+        self.assertIn(f"SEARCH schedule_{search}", queryset.explain())
+
+    def window(self, **kwargs):
+        start, end = day_bounds(timezone.localdate(), 7)
+        return Schedule.objects.filter(
+            start_time__gte=start, start_time__lt=end, **kwargs
+        ).order_by("start_time")
+
+    def test_schedule_window(self):
+        self.assertUsesIndex(
+            self.window(),
+            "schedule USING INDEX schedule_start_time_idx (start_time>? AND",
+        )
+
+    def test_schedule_window_by_service(self):
+        self.assertUsesIndex(
+            self.window(service=self.service),
+            "schedule USING INDEX schedule_service_start_idx (service_id=? AND",
+        )
+
+    def test_schedule_window_by_trainer(self):
+        self.assertUsesIndex(
+            self.window(trainer=self.trainer),
+            "schedule USING INDEX sqlite_autoindex_schedule_schedule_1 "
+            "(trainer_id=? AND start_time>? AND",
+        )
+
+    def test_client_bookings(self):
+        self.assertUsesIndex(
+            get_bookings(self.client_user.pk),
+            "booking USING INDEX booking_client_canceled_idx (client_id=?)",
+        )
+
+    def test_active_bookings(self):
+        self.assertUsesIndex(
+            Booking.not_canceled.filter(schedule=self.schedules[0]),
+            "booking USING INDEX booking_active_schedule_idx (schedule_id=?)",
+        )
+
+
+@override_settings(
+    ASYNC_API_VIEWS=True,
+    DEBUG_TOOLBAR_CONFIG={"SHOW_TOOLBAR_CALLBACK": lambda r: False},
+)
+class SeatEventsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.schedule = Schedule.objects.create(
+            service=create_service("yoga"),
+            trainer=create_trainer("trainer"),
+            start_time=timezone.now() + timedelta(days=1),
+        )
+
+    def test_wsgi_request_gets_no_content(self):
+        request = RequestFactory().get("/api/schedule/events/")
+        response = async_to_sync(seat_events_view)(request)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_wsgi_page_does_not_open_stream(self):
+        response = self.client.get(reverse("schedule:schedule"))
+
+        self.assertContains(response, f'data-schedule-id="{self.schedule.pk}"')
+        self.assertNotContains(response, "data-seat-events-url")
+
+    @override_settings(ASYNC_API_VIEWS=True)
+    async def test_booking_is_streamed(self):
+        client = await User.objects.acreate(username="client", email="c@example.com")
+        request = AsyncRequestFactory().get("/api/schedule/events/")
+        response = await seat_events_view(request)
+        stream = aiter(response.streaming_content)
+
+        def book():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(to_book(client.pk, self.schedule.pk)["success"])
+
+        try:
+            self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+            await sync_to_async(book)()
+            event = await asyncio.wait_for(anext(stream), 5)
+        finally:
+            await stream.aclose()
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertRegex(event.decode(), r"^id: \d+\nevent: seats\ndata: ")
+        self.assertEqual(
+            json.loads(event.decode().split("data: ")[1]),
+            {
+                "schedule_id": self.schedule.pk,
+                "remaining_seats": self.schedule.service.max_participants - 1,
+            },
+        )
+
+
+@override_settings(JWT_TOKEN_USER=True)
+class TokenUserModeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user("client", "client@example.com")
+        cls.trainer = create_trainer("trainer")
+        Schedule.objects.create(
+            service=create_service("yoga"),
+            trainer=cls.trainer,
+            start_time=timezone.now() + timedelta(days=1),
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+
+    def get(self, url: str, token: AccessToken) -> tuple[int, list[str]]:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url, headers={"Authorization": f"Bearer {token}"}
+            )
+
+        user_loads = [
+            query["sql"]
+            for query in queries
+            if '"users_user"."password"' in query["sql"]
+        ]
+        return response.status_code, user_loads
+
+    def test_claims(self):
+        trainer_token = UserRefreshToken.for_user(self.trainer.user).access_token
+        client_token = UserRefreshToken.for_user(self.client_user).access_token
+
+        self.assertEqual(trainer_token["trainer_id"], self.trainer.pk)
+        self.assertIs(trainer_token["is_active"], True)
+        self.assertIs(trainer_token["is_staff"], False)
+        self.assertIsNone(client_token["trainer_id"])
+
+    def test_refresh_reloads_claims(self):
+        refresh = UserRefreshToken.for_user(self.client_user)
+        User.objects.filter(pk=self.client_user.pk).update(is_staff=True)
+
+        response = self.client.post(reverse("token_refresh"), {"refresh": str(refresh)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(AccessToken(response.json()["access"])["is_staff"], True)
+
+    def test_no_user_queries(self):
+        trainer_token = UserRefreshToken.for_user(self.trainer.user).access_token
+        client_token = UserRefreshToken.for_user(self.client_user).access_token
+
+        for url, token in (
+            ("/api/schedule/my/", trainer_token),
+            ("/api/schedule/", client_token),
+            ("/api/bookings/", client_token),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url, token), (200, []))
+
+        with override_settings(JWT_TOKEN_USER=False):
+            status_code, user_loads = self.get("/api/schedule/my/", trainer_token)
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(len(user_loads), 1)
+
+    def test_deactivation_rejects_issued_tokens(self):
+        claims_token = UserRefreshToken.for_user(self.client_user).access_token
+        plain_token = AccessToken.for_user(self.client_user)
+        self.assertEqual(self.get("/api/schedule/", claims_token)[0], 200)
+
+        self.client_user.is_active = False
+        self.client_user.save(update_fields=("is_active",))
+
+        self.assertEqual(self.get("/api/schedule/", claims_token)[0], 401)
+        self.assertEqual(self.get("/api/schedule/", plain_token)[0], 401)
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    bookers = 200
+    seats = 20
+
+    def setUp(self):
+        self.schedule = Schedule.objects.create(
+            service=create_service("yoga", max_participants=self.seats),
+            trainer=create_trainer("trainer"),
+            start_time=timezone.now() + timedelta(days=1),
+        )
+        self.client_ids = [
+            client.pk
+            for client in User.objects.bulk_create(
+                User(username=f"client{i}", email=f"client{i}@example.com")
+                for i in range(self.bookers)
+            )
+        ]
+
+    def run_concurrently(self, func, args: list) -> list:
+        barrier = threading.Barrier(len(args))
+
+        def run(arg):
+            try:
+                barrier.wait()
+                return func(arg)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(len(args)) as executor:
+            return list(executor.map(run, args))
+
+    def test_no_oversell(self):
+        results = self.run_concurrently(
+            lambda client_id: to_book(client_id, self.schedule.pk), self.client_ids
+        )
+
+        self.schedule.refresh_from_db()
+        booked = Booking.not_canceled.filter(schedule=self.schedule).count()
+
+        self.assertEqual(sum(result["success"] for result in results), self.seats)
+        self.assertEqual(booked, self.seats)
+        self.assertEqual(self.schedule.booked_count, self.seats)
+
+    def test_no_oversell_while_canceling(self):
+        holders = self.client_ids[: self.seats]
+        for client_id in holders:
+            to_book(client_id, self.schedule.pk)
+
+        booking_ids = dict(
+            Booking.objects.filter(client_id__in=holders).values_list("client_id", "pk")
+        )
+        cancelers = holders[: self.seats // 2]
+
+        def act(client_id: int) -> dict:
+            if client_id in booking_ids:
+                return cancel(client_id, booking_ids[client_id])
+            return to_book(client_id, self.schedule.pk)
+
+        results = self.run_concurrently(act, cancelers + self.client_ids[self.seats :])
+
+        self.schedule.refresh_from_db()
+        booked = Booking.not_canceled.filter(schedule=self.schedule).count()
+
+        canceled = results[: len(cancelers)]
+        rebooked = sum(result["success"] for result in results[len(cancelers) :])
+
+        self.assertTrue(all(result["success"] for result in canceled))
+        self.assertEqual(booked, self.seats - len(cancelers) + rebooked)
+        self.assertEqual(self.schedule.booked_count, booked)
+        self.assertLessEqual(booked, self.seats)
+
+
+class SeedLoadTest(TransactionTestCase):
+    options = {
+        "users": 60,
+        "trainers": 5,
+        "services": 4,
+        "days": 3,
+        "sessions_per_day": 30,
+        "bookings": 200,
+        "cancel_ratio": 0.2,
+        "batch_size": 50,
+        "workers": 1,
+        "seed": 1,
+    }
+
+    def seed(self):
+        call_command("seed_load", stdout=StringIO(), **self.options)
+
+    def test_seed_is_consistent(self):
+        self.seed()
+
+        active = Booking.not_canceled.count()
+        schedules = Schedule.objects.annotate(
+            active=Count("bookings", filter=Q(bookings__canceled=False))
+        )
+
+        self.assertEqual(User.objects.filter(username__startswith="load_").count(), 65)
+        self.assertEqual(Trainer.objects.count(), 5)
+        self.assertEqual(Service.objects.count(), 4)
+        self.assertEqual(active, 160)
+        self.assertTrue(Booking.objects.filter(canceled=True).exists())
+        self.assertFalse(schedules.exclude(booked_count=F("active")).exists())
+        self.assertEqual(
+            ScheduleOccupancyDaily.objects.aggregate(
+                sessions=Sum("sessions"), booked=Sum("booked")
+            ),
+            {"sessions": Schedule.objects.count(), "booked": active},
+        )
+
+        for model in (TrainerPopularity, ServicePopularity):
+            self.assertEqual(
+                model.objects.aggregate(total=Sum("bookings_count"))["total"], active
+            )
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Booking._meta.db_table
+            )
+
+        self.assertTrue(
+            {index.name for index in Booking._meta.indexes} <= set(constraints)
+        )
+
+    def test_prefix_must_be_new(self):
+        self.seed()
+
+        with self.assertRaisesMessage(CommandError, "load"):
+            self.seed()
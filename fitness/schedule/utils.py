@@ -0,0 +1,37 @@
+from datetime import date, datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.utils import timezone
+
+
+def month_start(value: datetime) -> date:
+    return timezone.localdate(value).replace(day=1)
+
+
+def month_range(first: datetime, last: datetime) -> list[date]:
+    month, last_month = month_start(first), month_start(last)
+    months = []
+
+    while month <= last_month:
+        months.append(month)
+        month += relativedelta(months=1)
+
+    return months
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(month.replace(day=1), time.min))
+    end = timezone.make_aware(
+        datetime.combine(month.replace(day=1) + relativedelta(months=1), time.min)
+    )
+
+    return start, end
+
+
+def day_bounds(start_date: date, days: int = 1) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(
+        datetime.combine(start_date + timedelta(days=days), time.min)
+    )
+
+    return start, end
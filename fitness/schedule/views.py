@@ -1,73 +1,194 @@
-from datetime import date, timedelta
+import json
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
 from itertools import groupby
 
-from core.models import Trainer
+from asgiref.sync import sync_to_async
+from core.async_api import api_response, async_api_view
+from core.versions import get_version, get_version_time
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Count, OuterRef, Prefetch, Q, QuerySet, Subquery
-from django.db.models.fields import IntegerField
-from django.db.models.functions import TruncDate
-from django.http import HttpRequest, HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    When,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.safestring import mark_safe
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import ListView
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.generics import GenericAPIView, ListCreateAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import GenericAPIView, ListAPIView, ListCreateAPIView
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from users.authentication import get_trainer_id
 from users.models import user_short_fields
 
+from .cache import (
+    SCHEDULE_VERSION,
+    aget_cached_schedule,
+    get_cached_schedule,
+    invalidate_schedule,
+)
+from .events import notify_seats_changed, seat_events
 from .models import (
+    CANCELLATION_DEADLINE,
     Booking,
+    Notification,
     Schedule,
+    ScheduleOccupancyDaily,
+    WaitlistEntry,
     booking_fields,
     booking_short_fields,
     client_fields,
+    occupancy_groups,
     schedule_detail_fields,
     schedule_short_fields,
+    track_occupancy_many,
+    track_popularity_many,
     trainer_schedule_fields,
+    update_returning_pks,
 )
+from .pagination import BookingPagination, KeysetPaginationMixin
 from .serializers import (
+    BatchBookingSerializer,
+    BatchCancelSerializer,
+    BookedScheduleRowSerializer,
     BookedScheduleSerializer,
     CreateBookingSerializer,
+    NotificationSerializer,
+    OccupancyQuerySerializer,
+    ReadNotificationsSerializer,
+    ScheduleRowSerializer,
     ScheduleSerializer,
+    TrainerScheduleQuerySerializer,
     TrainerScheduleResponseSerializer,
+    WaitlistEntrySerializer,
 )
+from .utils import day_bounds
 
 User = get_user_model()
 
+TRAINER_SYNC_OVERLAP = timedelta(seconds=5)
+SEAT_EVENTS_KEEPALIVE = 15
 
-def get_schedule(
-    user_id: int | None, **kwargs
-) -> tuple[QuerySet[Schedule], list[date]]:
-    today = date.today()
-    end_date = today + timedelta(days=6)
-    schedule_date_range = (today, end_date)
-
-    days = [today + timedelta(days=i) for i in range(7)]
-
-    schedule_objs = (
-        Schedule.objects.select_related("service", "trainer__user")
-        .filter(start_time__date__range=schedule_date_range, **kwargs)
-        .annotate(
-            date=TruncDate("start_time"),
-            not_canceled_bookings_count=Count("bookings", Q(bookings__canceled=False)),
-            booking_id=Subquery(
-                Booking.not_canceled.filter(
-                    schedule=OuterRef("pk"),
-                    client_id=user_id,
-                ).values("id")[:1],
-                output_field=IntegerField(),
-            ),
+
+def group_by_date(items: Iterable[Booking | Schedule]) -> list[dict]:
+    grouped = []
+
+    for key, group in groupby(items, lambda item: getattr(item, "date")):
+        grouped.append({"date": key, "items": list(group)[::-1]})
+
+    return grouped
+
+
+def get_public_schedule(start_date: date, days: int, **kwargs) -> list[Schedule]:
+    start, end = day_bounds(start_date, days)
+
+    def load() -> list[Schedule]:
+        return list(
+            Schedule.objects.select_related("service", "trainer__user")
+            .filter(start_time__gte=start, start_time__lt=end, **kwargs)
+            .annotate(date=TruncDate("start_time"))
+            .only(*schedule_detail_fields)
+            .order_by("start_time")
         )
-        .only(*schedule_detail_fields)
-        .order_by("start_time")
+
+    return get_cached_schedule("grid", load, start_date=start_date, days=days, **kwargs)
+
+
+def get_schedule_rows(start_date: date, days: int, **kwargs) -> list[dict]:
+    start, end = day_bounds(start_date, days)
+
+    def load() -> list[dict]:
+        return list(
+            Schedule.objects.filter(start_time__gte=start, start_time__lt=end, **kwargs)
+            .order_by("start_time")
+            .values(*ScheduleRowSerializer.fields)
+        )
+
+    return get_cached_schedule("rows", load, start_date=start_date, days=days, **kwargs)
+
+
+async def aget_schedule_rows(start_date: date, days: int, **kwargs) -> list[dict]:
+    start, end = day_bounds(start_date, days)
+
+    async def load() -> list[dict]:
+        return [
+            row
+            async for row in Schedule.objects.filter(
+                start_time__gte=start, start_time__lt=end, **kwargs
+            )
+            .order_by("start_time")
+            .values(*ScheduleRowSerializer.fields)
+            .aiterator()
+        ]
+
+    return await aget_cached_schedule(
+        "rows", load, start_date=start_date, days=days, **kwargs
+    )
+
+
+def get_schedule_days() -> list[date]:
+    today = timezone.localdate()
+    return [today + timedelta(days=i) for i in range(7)]
+
+
+def get_user_booking_ids(
+    user_id: int | None, schedule_ids: list[int]
+) -> dict[int, int]:
+    if not user_id or not schedule_ids:
+        return {}
+
+    return dict(
+        Booking.not_canceled.filter(
+            client_id=user_id, schedule_id__in=schedule_ids
+        ).values_list("schedule_id", "id")
     )
 
+
+async def aget_user_booking_ids(
+    user_id: int | None, schedule_ids: list[int]
+) -> dict[int, int]:
+    if not user_id or not schedule_ids:
+        return {}
+
+    return {
+        schedule_id: pk
+        async for schedule_id, pk in Booking.not_canceled.filter(
+            client_id=user_id, schedule_id__in=schedule_ids
+        ).values_list("schedule_id", "id")
+    }
+
+
+def get_schedule(user_id: int | None, **kwargs) -> tuple[list[Schedule], list[date]]:
+    days = get_schedule_days()
+
+    schedule_objs = get_public_schedule(days[0], len(days), **kwargs)
+    booking_ids = get_user_booking_ids(user_id, [item.pk for item in schedule_objs])
+
+    for item in schedule_objs:
+        setattr(item, "booking_id", booking_ids.get(item.pk))
+
     return schedule_objs, days
 
 
@@ -80,16 +201,9 @@ def get_bookings(user_id: int) -> QuerySet[Booking]:
             "schedule__trainer",
             "schedule__trainer__user",
         )
-        .prefetch_related(
-            Prefetch(
-                "schedule__bookings",
-                queryset=Booking.not_canceled.only("schedule_id"),
-                to_attr="not_canceled_bookings",
-            )
-        )
         .annotate(date=TruncDate("schedule__start_time"))
         .only(*booking_fields)
-        .order_by("-date", "schedule__start_time__time")
+        .order_by("-schedule__start_time", "-id")
     )
 
 
@@ -101,15 +215,14 @@ def get_trainer_schedule(
         .select_related("service")
         .annotate(date=TruncDate("start_time"))
         .only(*trainer_schedule_fields)
-        .order_by("-date", "start_time__time")
+        .order_by("-start_time", "-id")
     )
 
     if include_bookings:
         res = res.prefetch_related(
             Prefetch(
                 "bookings",
-                Booking.not_canceled.select_related("client", "client__trainer")
-                .only(*client_fields),
+                Booking.not_canceled.select_related("client").only(*client_fields),
                 to_attr="active_bookings",
             )
         )
@@ -117,64 +230,316 @@ def get_trainer_schedule(
     return res
 
 
-def to_book(
-    user_id: int, schedule_id: int | None, return_item: bool = False
-) -> dict[str, str | bool | None | Schedule]:
-    result: dict[str, bool | str | None | Schedule] = {
+def reserve_seats(
+    schedule_objs: Iterable[Schedule],
+    user_id: int,
+    reservations: dict[int, Booking] | None = None,
+) -> dict[int, int]:
+    reservations = reservations or {}
+    schedule_objs = list(schedule_objs)
+
+    if not schedule_objs:
+        return {}
+
+    capacity = Case(
+        *(
+            When(pk=schedule_obj.pk, then=schedule_obj.service.max_participants)
+            for schedule_obj in schedule_objs
+        )
+    )
+
+    with transaction.atomic():
+        reserved_ids = set(
+            update_returning_pks(
+                Schedule.objects.filter(
+                    pk__in=[schedule_obj.pk for schedule_obj in schedule_objs],
+                    booked_count__lt=capacity,
+                ),
+                booked_count=F("booked_count") + 1,
+            )
+        )
+        reserved = [
+            schedule_obj
+            for schedule_obj in schedule_objs
+            if schedule_obj.pk in reserved_ids
+        ]
+
+        if not reserved:
+            return {}
+
+        booking_ids = {
+            schedule_obj.pk: reservations[schedule_obj.pk].pk
+            for schedule_obj in reserved
+            if schedule_obj.pk in reservations
+        }
+
+        if booking_ids:
+            restored = Booking.objects.filter(
+                pk__in=booking_ids.values(), canceled=True
+            ).update(canceled=False, updated_at=timezone.now())
+
+            if restored != len(booking_ids):
+                raise IntegrityError("Booking is already active")
+
+        created = Booking.objects.bulk_create(
+            Booking(schedule_id=schedule_obj.pk, client_id=user_id)
+            for schedule_obj in reserved
+            if schedule_obj.pk not in reservations
+        )
+        booking_ids.update((booking.schedule_id, booking.pk) for booking in created)
+
+        WaitlistEntry.objects.filter(
+            schedule_id__in=booking_ids, client_id=user_id
+        ).delete()
+        invalidate_schedule()
+        notify_seats_changed(*booking_ids)
+        track_popularity_many((schedule_obj, user_id, 1) for schedule_obj in reserved)
+        track_occupancy_many(
+            (schedule_obj, 1, -1 if schedule_obj.pk in reservations else 0)
+            for schedule_obj in reserved
+        )
+
+    return booking_ids
+
+
+def reserve_seat(
+    schedule_obj: Schedule, user_id: int, reservation: Booking | None = None
+) -> int | None:
+    reservations = {schedule_obj.pk: reservation} if reservation else None
+    return reserve_seats([schedule_obj], user_id, reservations).get(schedule_obj.pk)
+
+
+def release_seats(reservations: list[Booking]) -> None:
+    with transaction.atomic():
+        released = Booking.objects.filter(
+            pk__in=[reservation.pk for reservation in reservations], canceled=False
+        ).update(canceled=True, updated_at=timezone.now())
+
+        if released != len(reservations):
+            raise IntegrityError("Booking is already canceled")
+
+        schedule_ids = [reservation.schedule_id for reservation in reservations]
+        Schedule.objects.filter(pk__in=schedule_ids, booked_count__gt=0).update(
+            booked_count=F("booked_count") - 1
+        )
+        track_popularity_many(
+            (reservation.schedule, reservation.client_id, -1)
+            for reservation in reservations
+        )
+        track_occupancy_many(
+            (reservation.schedule, -1, 1) for reservation in reservations
+        )
+        waitlisted = set(
+            WaitlistEntry.objects.filter(schedule_id__in=schedule_ids).values_list(
+                "schedule_id", flat=True
+            )
+        )
+
+        for reservation in reservations:
+            if reservation.schedule_id in waitlisted:
+                promote_waitlist(reservation.schedule)
+
+        invalidate_schedule()
+        notify_seats_changed(*schedule_ids)
+
+
+def release_seat(reservation: Booking) -> bool:
+    try:
+        release_seats([reservation])
+    except IntegrityError:
+        return False
+
+    return True
+
+
+def promote_waitlist(schedule_obj: Schedule) -> int | None:
+    if not schedule_obj.in_future:
+        return None
+
+    entries = WaitlistEntry.objects.filter(schedule_id=schedule_obj.pk).only(
+        "client_id"
+    )
+
+    for entry in entries:
+        reservation = (
+            Booking.objects.filter(
+                schedule_id=schedule_obj.pk, client_id=entry.client_id
+            )
+            .only("canceled")
+            .first()
+        )
+
+        try:
+            booking_id = reserve_seat(schedule_obj, entry.client_id, reservation)
+        except IntegrityError:
+            entry.delete()
+            continue
+
+        if booking_id is None:
+            return None
+
+        Notification.objects.create(
+            client_id=entry.client_id,
+            booking_id=booking_id,
+            kind=Notification.Kind.WAITLIST_PROMOTED,
+            message=f"Освободилось место! Вы записаны на '{schedule_obj}'",
+        )
+        schedule_obj.booked_count += 1
+
+        return booking_id
+
+    return None
+
+
+def get_waitlist(user_id: int) -> QuerySet[WaitlistEntry]:
+    ahead = (
+        WaitlistEntry.objects.filter(schedule_id=OuterRef("schedule_id"))
+        .filter(
+            Q(created_at__lt=OuterRef("created_at"))
+            | Q(created_at=OuterRef("created_at"), id__lt=OuterRef("id"))
+        )
+        .values("schedule_id")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+    return (
+        WaitlistEntry.objects.filter(
+            client_id=user_id, schedule__start_time__gt=timezone.now()
+        )
+        .annotate(position=Coalesce(Subquery(ahead), 0) + 1)
+        .only("schedule_id", "created_at")
+        .order_by("schedule__start_time")
+    )
+
+
+def join_waitlist(
+    user_id: int, schedule_id: int, return_item: bool = False
+) -> dict[str, bool | str | None | WaitlistEntry]:
+    result: dict[str, bool | str | None | WaitlistEntry] = {
         "success": False,
         "message": "",
         "item": None,
     }
 
     try:
-        schedule_obj = (
-            Schedule.objects.select_related("trainer__user", "service")
-            .annotate(
-                not_canceled_bookings_count=Count(
-                    "bookings", Q(bookings__canceled=False)
-                )
-            )
-            .only(*schedule_short_fields)
-            .get(pk=schedule_id)
-        )
+        schedule_obj = get_booking_schedules().get(pk=schedule_id)
 
     except (ValueError, ObjectDoesNotExist):
         result["message"] = "Занятие не найдено!"
         return result
 
-    reservation = Booking.objects.filter(
-        schedule=schedule_obj, client_id=user_id
-    ).first()
-
-    if reservation and not reservation.canceled:
+    if Booking.not_canceled.filter(schedule=schedule_obj, client_id=user_id).exists():
         result["message"] = f"Вы уже записаны на '{schedule_obj}'!"
-        setattr(schedule_obj, "booking_id", reservation.pk)
 
     elif schedule_obj.trainer.user_id == user_id:
         result["message"] = f"Вы не можете записаться на '{schedule_obj}'"
 
-    elif not schedule_obj.count_remained_seats:
-        result["message"] = f"Не осталось свободных мест на занятие '{schedule_obj}'!"
-
     elif not schedule_obj.in_future:
         result["message"] = f"Записаться на '{schedule_obj}' уже нельзя!"
 
+    elif schedule_obj.count_remained_seats > 0:
+        result["message"] = f"На занятие '{schedule_obj}' есть свободные места!"
+
     else:
-        if reservation:
-            reservation.canceled = False
-            reservation.save()
-            setattr(schedule_obj, "booking_id", reservation.pk)
+        entry, created = WaitlistEntry.objects.get_or_create(
+            schedule=schedule_obj, client_id=user_id
+        )
+
+        if created:
+            result["success"] = True
+            result["message"] = f"Вы добавлены в лист ожидания на '{schedule_obj}'"
         else:
-            new_reservation = Booking.objects.create(
-                schedule_id=schedule_obj.pk, client_id=user_id
-            )
-            setattr(schedule_obj, "booking_id", new_reservation.pk)
+            result["message"] = f"Вы уже в листе ожидания на '{schedule_obj}'!"
+
+        if return_item:
+            result["item"] = get_waitlist(user_id).get(pk=entry.pk)
+
+    return result
+
+
+def leave_waitlist(user_id: int, schedule_id: int) -> dict[str, bool | str | None]:
+    deleted, _ = WaitlistEntry.objects.filter(
+        schedule_id=schedule_id, client_id=user_id
+    ).delete()
+
+    if not deleted:
+        return {"success": False, "message": "Вы не в листе ожидания!", "item": None}
+
+    return {"success": True, "message": "Вы удалены из листа ожидания", "item": None}
+
+
+def get_booking_schedules() -> QuerySet[Schedule]:
+    return Schedule.objects.select_related("trainer__user", "service").only(
+        *schedule_short_fields
+    )
+
 
+def get_client_bookings(user_id: int) -> QuerySet[Booking]:
+    return (
+        Booking.objects.filter(client_id=user_id)
+        .select_related("schedule", "schedule__service", "schedule__trainer")
+        .only(*booking_short_fields)
+    )
+
+
+def get_booking_error(
+    user_id: int, schedule_obj: Schedule, reservation: Booking | None
+) -> str | None:
+    if reservation and not reservation.canceled:
+        setattr(schedule_obj, "booking_id", reservation.pk)
+        return f"Вы уже записаны на '{schedule_obj}'!"
+
+    if schedule_obj.trainer.user_id == user_id:
+        return f"Вы не можете записаться на '{schedule_obj}'"
+
+    if not schedule_obj.count_remained_seats:
+        return f"Не осталось свободных мест на занятие '{schedule_obj}'!"
+
+    if not schedule_obj.in_future:
+        return f"Записаться на '{schedule_obj}' уже нельзя!"
+
+    return None
+
+
+def set_booking_result(
+    result: dict, schedule_obj: Schedule, booking_id: int | None
+) -> None:
+    if booking_id is None:
+        result["message"] = f"Не осталось свободных мест на занятие '{schedule_obj}'!"
+        schedule_obj.booked_count = schedule_obj.service.max_participants
+    else:
         result["success"] = True
         result["message"] = f"Вы успешно записались на '{schedule_obj}'"
+        setattr(schedule_obj, "booking_id", booking_id)
+        schedule_obj.booked_count += 1
+
+
+def book_schedule(
+    user_id: int,
+    schedule_obj: Schedule,
+    reservation: Booking | None,
+    return_item: bool = False,
+) -> dict[str, str | bool | None | Schedule]:
+    result: dict[str, bool | str | None | Schedule] = {
+        "success": False,
+        "message": get_booking_error(user_id, schedule_obj, reservation) or "",
+        "item": None,
+    }
 
-        count = getattr(schedule_obj, "not_canceled_bookings_count") + 1
-        setattr(schedule_obj, "not_canceled_bookings_count", count)
+    if not result["message"]:
+        try:
+            booking_id = reserve_seat(schedule_obj, user_id, reservation)
+        except IntegrityError:
+            result["message"] = f"Вы уже записаны на '{schedule_obj}'!"
+            booking_id = (
+                Booking.not_canceled.filter(schedule=schedule_obj, client_id=user_id)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            setattr(schedule_obj, "booking_id", booking_id)
+        else:
+            set_booking_result(result, schedule_obj, booking_id)
 
     if return_item:
         result["item"] = schedule_obj
@@ -182,50 +547,104 @@ def to_book(
     return result
 
 
-def cancel(
-    user_id: int, booking_id: int, return_item: bool = False
-) -> dict[str, bool | str | None | Schedule]:
-    result: dict[str, bool | str | None | Schedule] = {
-        "success": False,
-        "message": "",
-        "item": None,
+def to_book(
+    user_id: int, schedule_id: int | None, return_item: bool = False
+) -> dict[str, str | bool | None | Schedule]:
+    try:
+        schedule_obj = get_booking_schedules().get(pk=schedule_id)
+
+    except (ValueError, ObjectDoesNotExist):
+        return {"success": False, "message": "Занятие не найдено!", "item": None}
+
+    reservation = (
+        Booking.objects.filter(schedule=schedule_obj, client_id=user_id)
+        .only("canceled")
+        .first()
+    )
+
+    return book_schedule(user_id, schedule_obj, reservation, return_item)
+
+
+def to_book_many(
+    user_id: int, schedule_ids: Iterable[int], return_item: bool = False
+) -> list[dict[str, str | bool | None | Schedule]]:
+    schedule_ids = list(dict.fromkeys(schedule_ids))
+    schedules = get_booking_schedules().in_bulk(schedule_ids)
+    reservations = {
+        reservation.schedule_id: reservation
+        for reservation in Booking.objects.filter(
+            schedule_id__in=schedules, client_id=user_id
+        ).only("schedule_id", "canceled")
     }
+    results = {}
 
-    try:
-        reservation = (
-            Booking.objects.filter(id=booking_id, client_id=user_id)
-            .select_related("schedule", "schedule__service", "schedule__trainer")
-            .prefetch_related(
-                Prefetch(
-                    "schedule__bookings",
-                    queryset=Booking.not_canceled.only("schedule_id"),
-                    to_attr="not_canceled_bookings",
-                )
+    for schedule_id, schedule_obj in schedules.items():
+        message = get_booking_error(
+            user_id, schedule_obj, reservations.get(schedule_id)
+        )
+        results[schedule_id] = {
+            "success": False,
+            "message": message or "",
+            "item": schedule_obj if return_item else None,
+        }
+
+    pending = [
+        schedules[schedule_id]
+        for schedule_id in schedule_ids
+        if schedule_id in results and not results[schedule_id]["message"]
+    ]
+
+    if pending:
+        try:
+            booking_ids = reserve_seats(pending, user_id, reservations)
+        except IntegrityError:
+            return [to_book(user_id, pk, return_item) for pk in schedule_ids]
+
+        for schedule_obj in pending:
+            set_booking_result(
+                results[schedule_obj.pk], schedule_obj, booking_ids.get(schedule_obj.pk)
             )
-            .only(*booking_short_fields)
-            .get()
+
+    return [
+        results.get(
+            schedule_id,
+            {"success": False, "message": "Занятие не найдено!", "item": None},
         )
+        for schedule_id in schedule_ids
+    ]
 
-    except (ValueError, ObjectDoesNotExist):
-        result["message"] = f"Запись не найдена!"
-        return result
 
+def get_cancel_error(reservation: Booking) -> str | None:
     if reservation.canceled:
-        result["message"] = f"Запись на '{reservation.schedule}' уже отменена!"
+        return f"Запись на '{reservation.schedule}' уже отменена!"
 
-    elif not reservation.schedule.is_cancellation_allowed:
-        result["message"] = f"Отменить запись на '{reservation.schedule}' уже нельзя!"
+    if not reservation.schedule.is_cancellation_allowed:
         setattr(reservation.schedule, "booking_id", reservation.pk)
+        return f"Отменить запись на '{reservation.schedule}' уже нельзя!"
 
-    else:
-        reservation.canceled = True
-        reservation.save()
+    return None
 
-        result["success"] = True
-        result["message"] = f"Вы успешно отменили запись на '{reservation.schedule}'"
 
-        count = len(getattr(reservation.schedule, "not_canceled_bookings")) - 1
-        setattr(reservation.schedule, "not_canceled_bookings_count", count)
+def set_cancel_result(result: dict, reservation: Booking) -> None:
+    result["success"] = True
+    result["message"] = f"Вы успешно отменили запись на '{reservation.schedule}'"
+    reservation.schedule.booked_count -= 1
+
+
+def cancel_booking(
+    reservation: Booking, return_item: bool = False
+) -> dict[str, bool | str | None | Schedule]:
+    result: dict[str, bool | str | None | Schedule] = {
+        "success": False,
+        "message": get_cancel_error(reservation) or "",
+        "item": None,
+    }
+
+    if not result["message"]:
+        if release_seat(reservation):
+            set_cancel_result(result, reservation)
+        else:
+            result["message"] = f"Запись на '{reservation.schedule}' уже отменена!"
 
     if return_item:
         result["item"] = reservation.schedule
@@ -233,11 +652,102 @@ def cancel(
     return result
 
 
+def cancel(
+    user_id: int, booking_id: int, return_item: bool = False
+) -> dict[str, bool | str | None | Schedule]:
+    try:
+        reservation = get_client_bookings(user_id).get(id=booking_id)
+
+    except (ValueError, ObjectDoesNotExist):
+        return {"success": False, "message": "Запись не найдена!", "item": None}
+
+    return cancel_booking(reservation, return_item)
+
+
+def cancel_many(
+    user_id: int, booking_ids: Iterable[int], return_item: bool = False
+) -> list[dict[str, bool | str | None | Schedule]]:
+    booking_ids = list(dict.fromkeys(booking_ids))
+    reservations = get_client_bookings(user_id).in_bulk(booking_ids)
+    results = {}
+
+    for booking_id, reservation in reservations.items():
+        results[booking_id] = {
+            "success": False,
+            "message": get_cancel_error(reservation) or "",
+            "item": reservation.schedule if return_item else None,
+        }
+
+    pending = [
+        reservations[booking_id]
+        for booking_id in booking_ids
+        if booking_id in results and not results[booking_id]["message"]
+    ]
+
+    if pending:
+        try:
+            release_seats(pending)
+        except IntegrityError:
+            return [cancel(user_id, pk, return_item) for pk in booking_ids]
+
+        for reservation in pending:
+            set_cancel_result(results[reservation.pk], reservation)
+
+    return [
+        results.get(
+            booking_id,
+            {"success": False, "message": "Запись не найдена!", "item": None},
+        )
+        for booking_id in booking_ids
+    ]
+
+
 def schedule_view(request: HttpRequest):
     context = {"title": "Расписание"}
     return render(request, "schedule/schedule.html", context)
 
 
+def seat_events_enabled(request: HttpRequest) -> bool:
+    return settings.ASYNC_API_VIEWS and isinstance(request, ASGIRequest)
+
+
+async def seat_events_view(request: HttpRequest):
+    if not seat_events_enabled(request):
+        return HttpResponse(status=204)
+
+    start, end = day_bounds(timezone.localdate(), len(get_schedule_days()))
+    schedule_ids = {
+        pk
+        async for pk in Schedule.objects.filter(
+            start_time__gte=start, start_time__lt=end
+        ).values_list("pk", flat=True)
+    }
+
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+
+    async def stream():
+        async with seat_events.subscribe(last_event_id) as subscription:
+            yield "retry: 3000\n\n"
+
+            while True:
+                events = await subscription.get(SEAT_EVENTS_KEEPALIVE)
+
+                if not events:
+                    yield ": keepalive\n\n"
+
+                for event_id, change in events:
+                    if change["schedule_id"] in schedule_ids:
+                        data = json.dumps(change)
+                        yield f"id: {event_id}\nevent: seats\ndata: {data}\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+
+    return response
+
+
 def booking_create_view(request: HttpRequest):
     if request.method != "POST":
         return HttpResponse(status=405)
@@ -283,10 +793,23 @@ def booking_cancel_view(request: HttpRequest, booking_id: int):
     return redirect(redirect_url)
 
 
-class BookingListView(LoginRequiredMixin, ListView):
+def serialize_results(
+    results: list[dict[str, bool | str | None | Schedule]], request: HttpRequest
+) -> list[dict]:
+    for result in results:
+        if result["item"]:
+            result["item"] = ScheduleSerializer(
+                result["item"], context={"request": request}
+            ).data
+
+    return results
+
+
+class BookingListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     template_name = "schedule/bookings.html"
     extra_context = {"title": "Мои занятия"}
     paginate_by = 25
+    position_field = "schedule__start_time"
 
     def get_queryset(self):
         return get_bookings(self.request.user.pk)
@@ -294,21 +817,15 @@ class BookingListView(LoginRequiredMixin, ListView):
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
 
-        grouped = []
-
-        for key, group in groupby(
-            context["object_list"], lambda item: getattr(item, "date")
-        ):
-            grouped.append({"date": key, "items": list(group)})
-
-        context["bookings"] = grouped
+        context["bookings"] = group_by_date(context["object_list"])
         return context
 
 
-class TrainerScheduleListView(LoginRequiredMixin, ListView):
+class TrainerScheduleListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     template_name = "schedule/trainer_schedule.html"
     extra_context = {"title": "Мои тренировки"}
     paginate_by = 25
+    position_field = "start_time"
 
     def get_queryset(self):
         if not hasattr(self.request.user, "trainer"):
@@ -320,15 +837,46 @@ class TrainerScheduleListView(LoginRequiredMixin, ListView):
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
 
-        grouped = []
+        context["schedule"] = group_by_date(context["object_list"])
+        return context
 
-        for key, group in groupby(
-            context["object_list"], lambda item: getattr(item, "date")
-        ):
-            grouped.append({"date": key, "items": list(group)})
 
-        context["schedule"] = grouped
-        return context
+def get_deadline_crossings(
+    rows: list[dict], now: datetime
+) -> tuple[datetime, datetime | None]:
+    last = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    upcoming = None
+
+    for row in rows:
+        for moment in (row["start_time"] - CANCELLATION_DEADLINE, row["start_time"]):
+            if moment <= now:
+                last = max(last, moment)
+            elif upcoming is None or moment < upcoming:
+                upcoming = moment
+
+    return last, upcoming
+
+
+def get_schedule_validators(
+    user_id: int | None, rows: list[dict], now: datetime
+) -> tuple[str, int]:
+    last_crossing, next_crossing = get_deadline_crossings(rows, now)
+    next_key = int(next_crossing.timestamp()) if next_crossing else 0
+    etag = (
+        f"{SCHEDULE_VERSION}-{get_version(SCHEDULE_VERSION)}-{user_id}-"
+        f"{timezone.localdate(now):%Y%m%d}-{next_key}"
+    )
+    last_modified = max(get_version_time(SCHEDULE_VERSION), last_crossing)
+
+    return quote_etag(etag), int(last_modified.timestamp())
+
+
+def set_schedule_validators(
+    response: HttpResponse, etag: str, last_modified: int
+) -> HttpResponse:
+    response.headers.setdefault("ETag", etag)
+    response.headers.setdefault("Last-Modified", http_date(last_modified))
+    return response
 
 
 class ScheduleListAPIView(GenericAPIView):
@@ -336,16 +884,30 @@ class ScheduleListAPIView(GenericAPIView):
     serializer_class = ScheduleSerializer
 
     def get(self, request):
-        schedule_objs, days = get_schedule(request.user.pk)
-        serializer = self.get_serializer(schedule_objs, many=True)
+        now = timezone.now()
+        days = get_schedule_days()
+        rows = get_schedule_rows(days[0], len(days))
+        etag, last_modified = get_schedule_validators(request.user.pk, rows, now)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
 
-        result = {"days": days, "items": serializer.data}
+        if response is None:
+            booking_ids = get_user_booking_ids(
+                request.user.pk, [row["id"] for row in rows]
+            )
+            serializer = ScheduleRowSerializer(
+                request.user.pk, now=now, booking_ids=booking_ids
+            )
+            result = {"days": days, "items": serializer.serialize(rows)}
+            response = Response(result, status=status.HTTP_200_OK)
 
-        return Response(result, status=status.HTTP_200_OK)
+        return set_schedule_validators(response, etag, last_modified)
 
 
 class BookingListCreateAPIView(ListCreateAPIView):
     permission_classes = (IsAuthenticated,)
+    pagination_class = BookingPagination
 
     def get_queryset(self):
         return get_bookings(self.request.user.pk)
@@ -355,6 +917,13 @@ class BookingListCreateAPIView(ListCreateAPIView):
             return CreateBookingSerializer
         return BookedScheduleSerializer
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset().values(*BookedScheduleRowSerializer.fields)
+        page = self.paginate_queryset(queryset)
+
+        serializer = BookedScheduleRowSerializer(request.user.pk)
+        return self.get_paginated_response(serializer.serialize(page))
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -370,6 +939,48 @@ class BookingListCreateAPIView(ListCreateAPIView):
         return Response(result, status=status.HTTP_200_OK)
 
 
+@async_api_view
+async def schedule_list_async_view(request: HttpRequest):
+    now = timezone.now()
+    days = get_schedule_days()
+    rows = await aget_schedule_rows(days[0], len(days))
+    etag, last_modified = get_schedule_validators(request.user.pk, rows, now)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        booking_ids = await aget_user_booking_ids(
+            request.user.pk, [row["id"] for row in rows]
+        )
+        serializer = ScheduleRowSerializer(
+            request.user.pk, now=now, booking_ids=booking_ids
+        )
+        response = api_response({"days": days, "items": serializer.serialize(rows)})
+
+    return set_schedule_validators(response, etag, last_modified)
+
+
+@async_api_view
+async def booking_list_get_async_view(request: HttpRequest):
+    queryset = get_bookings(request.user.pk).values(*BookedScheduleRowSerializer.fields)
+
+    paginator = BookingPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+
+    serializer = BookedScheduleRowSerializer(request.user.pk)
+    return api_response(paginator.get_paginated_data(serializer.serialize(page)))
+
+
+booking_list_create_api_view = BookingListCreateAPIView.as_view()
+
+
+@csrf_exempt
+async def booking_list_async_view(request: HttpRequest):
+    if request.method == "POST":
+        return await sync_to_async(booking_list_create_api_view)(request)
+
+    return await booking_list_get_async_view(request)
+
+
 class BookingCancelAPIView(GenericAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = ScheduleSerializer
@@ -385,29 +996,196 @@ class BookingCancelAPIView(GenericAPIView):
         return Response(result, status=status.HTTP_200_OK)
 
 
+class BookingBatchCreateAPIView(GenericAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BatchBookingSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = to_book_many(
+            request.user.pk, serializer.validated_data["schedule_ids"], return_item=True
+        )
+
+        return Response(serialize_results(results, request), status=status.HTTP_200_OK)
+
+
+class BookingBatchCancelAPIView(GenericAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BatchCancelSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = cancel_many(
+            request.user.pk, serializer.validated_data["booking_ids"], return_item=True
+        )
+
+        return Response(serialize_results(results, request), status=status.HTTP_200_OK)
+
+
+class WaitlistJoinAPIView(GenericAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = WaitlistEntrySerializer
+
+    def post(self, request, schedule_id):
+        result = join_waitlist(request.user.pk, schedule_id, return_item=True)
+
+        if result["item"]:
+            result["item"] = self.get_serializer(result["item"]).data
+
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class WaitlistLeaveAPIView(GenericAPIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, schedule_id):
+        result = leave_waitlist(request.user.pk, schedule_id)
+
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class WaitlistListAPIView(ListAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = WaitlistEntrySerializer
+
+    def get_queryset(self):
+        return get_waitlist(self.request.user.pk)
+
+
+class NotificationListAPIView(ListAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = NotificationSerializer
+
+    def get_queryset(self):
+        return Notification.objects.filter(
+            client_id=self.request.user.pk, is_read=False
+        ).only("booking_id", "kind", "message", "created_at")
+
+
+class NotificationReadAPIView(GenericAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = ReadNotificationsSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        updated = Notification.objects.filter(
+            client_id=request.user.pk,
+            pk__in=serializer.validated_data["notification_ids"],
+            is_read=False,
+        ).update(is_read=True)
+
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+
 class TrainerScheduleListAPIView(GenericAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = TrainerScheduleResponseSerializer
-    trainer: Trainer | None = None
+    trainer_id: int | None = None
 
     def get_queryset(self):
-        if not hasattr(self.request.user, "trainer"):
+        self.trainer_id = get_trainer_id(self.request.user)
+
+        if self.trainer_id is None:
             raise PermissionDenied()
 
-        self.trainer = getattr(self.request.user, "trainer")
-        return get_trainer_schedule(self.trainer.pk, include_bookings=False)
+        return get_trainer_schedule(self.trainer_id, include_bookings=False)
+
+    def get(self, request):
+        query = TrainerScheduleQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        synced_at = timezone.now()
+        date_from = query.validated_data["from"]
+        date_to = query.validated_data["to"]
+        start, end = day_bounds(date_from, (date_to - date_from).days + 1)
+
+        schedule = self.get_queryset().filter(start_time__gte=start, start_time__lt=end)
+        bookings = Booking.objects.filter(
+            schedule__trainer_id=self.trainer_id,
+            schedule__start_time__gte=start,
+            schedule__start_time__lt=end,
+        ).only("schedule_id", "client_id", "booked_at", "canceled")
+        canceled_bookings = []
+
+        if "since" in query.validated_data:
+            changed_after = query.validated_data["since"] - TRAINER_SYNC_OVERLAP
+
+            schedule = schedule.filter(updated_at__gt=changed_after)
+            bookings = bookings.filter(updated_at__gt=changed_after)
+            canceled_bookings = list(
+                bookings.filter(canceled=True).values_list("pk", flat=True)
+            )
 
-    def get(self, _):
-        schedule = self.get_queryset()
-        bookings = Booking.not_canceled.filter(schedule__trainer_id=self.trainer.pk)
+        bookings = bookings.filter(canceled=False)
         clients = (
             User.objects.filter(bookings__in=bookings)
-            .select_related("trainer")
             .distinct()
             .only(*user_short_fields)
         )
 
-        data = {"items": schedule, "clients": clients, "bookings": bookings}
+        data = {
+            "items": schedule,
+            "clients": clients,
+            "bookings": bookings,
+            "canceled_bookings": canceled_bookings,
+            "synced_at_ms": int(synced_at.timestamp() * 1000),
+        }
 
         serializer = self.get_serializer(data)
         return Response(serializer.data)
+
+
+def get_occupancy(date_from: date, date_to: date, group_by: list[str]) -> list[dict]:
+    fields = [field for group in group_by for field in occupancy_groups[group][0]]
+    aliases = {
+        alias: expression
+        for group in group_by
+        for alias, expression in occupancy_groups[group][1].items()
+    }
+    stats = ScheduleOccupancyDaily.objects.filter(day__range=(date_from, date_to))
+    totals = {
+        "sessions_total": Sum("sessions"),
+        "capacity_total": Sum("capacity"),
+        "booked_total": Sum("booked"),
+        "canceled_total": Sum("canceled"),
+    }
+
+    if fields:
+        rows = list(
+            stats.values(*fields, **aliases).annotate(**totals).order_by(*fields)
+        )
+    else:
+        rows = [stats.aggregate(**totals)]
+
+    for row in rows:
+        capacity, booked = row["capacity_total"], row["booked_total"]
+        row["fill_rate"] = round(booked / capacity, 4) if capacity else None
+
+    return rows
+
+
+class OccupancyAnalyticsAPIView(GenericAPIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        query = OccupancyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        date_from = query.validated_data["from"]
+        date_to = query.validated_data["to"]
+        group_by = query.validated_data["group_by"]
+
+        return Response(
+            {
+                "from": date_from,
+                "to": date_to,
+                "group_by": group_by,
+                "items": get_occupancy(date_from, date_to, group_by),
+            }
+        )
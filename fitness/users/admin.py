@@ -4,11 +4,14 @@ from django.db.models import QuerySet
 from django.http import HttpRequest
 from django.utils.safestring import mark_safe
 
+from core.admin_utils import PrefixSearchMixin
+
 from .models import User
+from .tokens import revoke_user_tokens
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(PrefixSearchMixin, UserAdmin):
     list_display = (
         "username",
         "email",
@@ -93,6 +96,9 @@ class CustomUserAdmin(UserAdmin):
         "last_name",
         "middle_name",
     )
+    search_help_text = (
+        "Поиск по началу: логина, email, телефона, имени, фамилии, отчества"
+    )
     readonly_fields = ("avatar", "date_joined", "last_login")
     actions = ("set_is_active", "set_is_inactive")
     save_on_top = True
@@ -123,7 +129,12 @@ class CustomUserAdmin(UserAdmin):
 
     @admin.action(description="Сделать неактивными")
     def set_is_inactive(self, request: HttpRequest, queryset: QuerySet) -> None:
+        user_ids = list(queryset.filter(is_active=True).values_list("pk", flat=True))
         count = queryset.update(is_active=False)
+
+        for user_id in user_ids:
+            revoke_user_tokens(user_id)
+
         self.message_user(
             request, f"Количество изменённых записей: {count}", messages.WARNING
         )
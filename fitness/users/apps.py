@@ -5,3 +5,6 @@ class UsersConfig(AppConfig):
     verbose_name = 'Пользователи'
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
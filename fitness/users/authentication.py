@@ -1,28 +1,148 @@
-from django.contrib.auth import get_user_model
-from django.contrib.auth.backends import BaseBackend
-from django.db.models import Q
-
-
-class EmailAndUsernameAuthBackend(BaseBackend):
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        user_model = get_user_model()
-        try:
-            user = user_model.objects.get(
-                Q(email=username) | Q(username=username), is_active=True
-            )
-
-            if user.check_password(password):
-                return user
-
-            return None
-
-        except (user_model.DoesNotExist, user_model.MultipleObjectsReturned):
-            return None
-
-    def get_user(self, user_id):
-        user_model = get_user_model()
-        try:
-            return user_model.objects.get(pk=user_id)
-
-        except user_model.DoesNotExist:
-            return None
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .throttling import allow_login_attempt
+from .tokens import is_token_revoked
+
+
+class EmailAndUsernameAuthBackend(BaseBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None or password is None:
+            return None
+
+        if not allow_login_attempt(request, username):
+            raise PermissionDenied
+
+        user_model = get_user_model()
+        try:
+            user = user_model.objects.get(
+                Q(email=username) | Q(username=username), is_active=True
+            )
+
+            if user.check_password(password):
+                return user
+
+            return None
+
+        except (user_model.DoesNotExist, user_model.MultipleObjectsReturned):
+            user_model().set_password(password)
+            return None
+
+    def get_user(self, user_id):
+        user_model = get_user_model()
+        try:
+            return user_model.objects.get(pk=user_id)
+
+        except user_model.DoesNotExist:
+            return None
+
+
+class ClaimsTokenUser(TokenUser):
+    @cached_property
+    def id(self) -> int:
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self) -> int:
+        return self.id
+
+    @cached_property
+    def is_active(self) -> bool:
+        return bool(self.token.get("is_active"))
+
+    @cached_property
+    def trainer_id(self) -> int | None:
+        return self.token.get("trainer_id")
+
+
+def get_trainer_id(user) -> int | None:
+    if isinstance(user, ClaimsTokenUser):
+        return user.trainer_id
+
+    trainer = getattr(user, "trainer", None)
+    return trainer.pk if trainer else None
+
+
+def get_token_user(validated_token: Token) -> ClaimsTokenUser | None:
+    if not settings.JWT_TOKEN_USER or "is_active" not in validated_token:
+        return None
+
+    try:
+        user = ClaimsTokenUser(validated_token)
+        user_id = user.id
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidToken(
+            _("Token contained no recognizable user identification")
+        ) from e
+
+    if not user.is_active or is_token_revoked(validated_token, user_id):
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    return user
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    def get_user(self, validated_token: Token):
+        return get_token_user(validated_token) or super().get_user(validated_token)
+
+
+class AsyncJWTAuthentication(TokenUserAuthentication):
+    async def aauthenticate(self, request) -> tuple[AbstractBaseUser, Token] | None:
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token: Token) -> AbstractBaseUser:
+        token_user = get_token_user(validated_token)
+
+        if token_user is not None:
+            return token_user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        try:
+            user = await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def check_token_user_cache(app_configs, **kwargs) -> list[Error]:
+    if not settings.JWT_TOKEN_USER:
+        return []
+
+    if isinstance(caches["shared"], (DummyCache, LocMemCache)):
+        return [
+            Error(
+                "JWT_TOKEN_USER requires a shared cache for token revocations.",
+                hint="Set SHARED_CACHE_URL to a Redis server that does not evict keys.",
+                id="users.E001",
+            )
+        ]
+
+    return []
@@ -0,0 +1,33 @@
+from django.core.cache import caches
+from rest_framework_simplejwt.token_blacklist.management.commands import (
+    flushexpiredtokens,
+)
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.utils import aware_utcnow
+from users.tokens import BLACKLISTED_JTI_KEY
+
+
+class Command(flushexpiredtokens.Command):
+    help = "Удаляет истёкшие JWT токены и записи чёрного списка (запускать по cron)"
+
+    def handle(self, *args, **kwargs) -> None:
+        now = aware_utcnow()
+        outstanding_count = OutstandingToken.objects.filter(expires_at__lte=now).count()
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__lte=now).values_list(
+                "token__jti", flat=True
+            )
+        )
+
+        super().handle(*args, **kwargs)
+        caches["shared"].delete_many([BLACKLISTED_JTI_KEY.format(jti) for jti in jtis])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Удалено токенов: {outstanding_count}, "
+                f"записей чёрного списка: {len(jtis)}"
+            )
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 04:54
+
+import core.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_alter_user_email_alter_user_phone_number_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="photo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="users/%Y/%m/%d/",
+                validators=[core.images.validate_image],
+                verbose_name="Фотография",
+            ),
+        ),
+    ]
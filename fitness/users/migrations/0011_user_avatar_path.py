@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 04:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+def fill_avatar_path(apps, schema_editor):
+    User = apps.get_model("users", "User")
+
+    trainer_photo = User.objects.filter(pk=OuterRef("pk")).values("trainer__photo")
+    User.objects.update(
+        avatar_path=Coalesce(
+            NullIf("photo", Value("")),
+            NullIf(Subquery(trainer_photo), Value("")),
+            Value(""),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_photo_validators"),
+        ("users", "0010_photo_validators"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar_path",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=100,
+                verbose_name="Аватар",
+            ),
+        ),
+        migrations.RunPython(fill_avatar_path, migrations.RunPython.noop),
+    ]
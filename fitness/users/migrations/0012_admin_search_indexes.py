@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0011_user_avatar_path"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["last_name", "first_name"], name="user_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["first_name"], name="user_first_name_idx"),
+        ),
+    ]
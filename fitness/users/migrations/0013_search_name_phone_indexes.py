@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0012_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["middle_name"], name="user_middle_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["phone_number"], name="user_phone_number_idx"),
+        ),
+    ]
@@ -1,8 +1,11 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils.translation import gettext_lazy as _
 
+from core.images import get_image_url, validate_image
 from fitness.settings import DEFAULT_USER_IMAGE
 
 phone_validator = RegexValidator(
@@ -19,9 +22,8 @@ user_short_fields = (
     "middle_name",
     "email",
     "phone_number",
-    "photo",
+    "avatar_path",
     "username",
-    "trainer__photo",
 )
 
 class User(AbstractUser):
@@ -33,7 +35,18 @@ class User(AbstractUser):
         },
     )
     photo = models.ImageField(
-        upload_to="users/%Y/%m/%d/", blank=True, null=True, verbose_name="Фотография"
+        upload_to="users/%Y/%m/%d/",
+        blank=True,
+        null=True,
+        validators=(validate_image,),
+        verbose_name="Фотография",
+    )
+    avatar_path = models.CharField(
+        max_length=100,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Аватар",
     )
     middle_name = models.CharField(blank=True, default="", verbose_name="Отчество")
     birth_date = models.DateField(blank=True, null=True, verbose_name="Дата рождения")
@@ -68,6 +81,21 @@ class User(AbstractUser):
                 violation_error_message=_phone_number_unique_failed_error_message,
             ),
         )
+        indexes = (
+            models.Index(fields=("last_name", "first_name"), name="user_name_idx"),
+            models.Index(fields=("first_name",), name="user_first_name_idx"),
+            models.Index(fields=("middle_name",), name="user_middle_name_idx"),
+            models.Index(fields=("phone_number",), name="user_phone_number_idx"),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        if "photo" in field_names:
+            instance.loaded_photo = values[list(field_names).index("photo")] or ""
+
+        return instance
 
     @property
     def avatar(self) -> str:
@@ -75,14 +103,8 @@ class User(AbstractUser):
 
     @property
     def avatar_or_none(self) -> str | None:
-        if self.photo and hasattr(self.photo, "url"):
-            return self.photo.url
-        if (
-            hasattr(self, "trainer")
-            and self.trainer.photo
-            and hasattr(self.trainer.photo, "url")
-        ):
-            return self.trainer.photo.url
+        if self.avatar_path:
+            return get_image_url(self.avatar_path)
         return None
 
     @property
@@ -94,3 +116,15 @@ class User(AbstractUser):
 
     def __str__(self) -> str:
         return self.full_name or self.username
+
+
+def update_avatar_paths(users: models.QuerySet) -> int:
+    trainer_photo = User.objects.filter(pk=OuterRef("pk")).values("trainer__photo")
+
+    return users.update(
+        avatar_path=Coalesce(
+            NullIf("photo", Value("")),
+            NullIf(Subquery(trainer_photo), Value("")),
+            Value(""),
+        )
+    )
@@ -7,15 +7,71 @@ from django.contrib.auth.password_validation import (
 )
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer as BaseTokenBlacklistSerializer,
+)
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 
 from .forms import error_messages
+from .tokens import UserRefreshToken, set_user_claims
 
 User = get_user_model()
 
 
 class TokenSerializer(TokenObtainPairSerializer):
     default_error_messages = error_messages["no_active_account"]
+    token_class = UserRefreshToken
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = UserRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = None
+
+        if user_id:
+            user = (
+                User.objects.select_related("trainer")
+                .only("is_staff", "is_active", "trainer__id")
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .first()
+            )
+
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(
+                    self.error_messages["no_active_account"], "no_active_account"
+                )
+
+        access = refresh.access_token
+
+        if user is not None:
+            set_user_claims(access, user)
+
+        data = {"access": str(access)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class TokenBlacklistSerializer(BaseTokenBlacklistSerializer):
+    token_class = UserRefreshToken
 
 
 class _UserBaseSerializer(serializers.ModelSerializer):
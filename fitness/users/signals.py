@@ -0,0 +1,57 @@
+from core.images import image_ingested
+from core.models import Trainer
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import update_avatar_paths
+from .tokens import revoke_user_tokens
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_deactivated(sender, instance, update_fields=None, **kwargs):
+    if instance.is_active:
+        return
+
+    if update_fields is None or "is_active" in update_fields:
+        revoke_user_tokens(instance.pk)
+
+
+def refresh_avatar_path(user_id: int) -> None:
+    update_avatar_paths(User.objects.filter(pk=user_id))
+
+
+@receiver(post_save, sender=User)
+def user_photo_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None and "photo" not in update_fields:
+        return
+
+    photo = instance.photo.name or ""
+    loaded_photo = getattr(instance, "loaded_photo", None)
+    instance.loaded_photo = photo
+
+    if photo:
+        if instance.avatar_path != photo:
+            User.objects.filter(pk=instance.pk).update(avatar_path=photo)
+            instance.avatar_path = photo
+    elif not created and loaded_photo != "":
+        refresh_avatar_path(instance.pk)
+        instance.refresh_from_db(fields=("avatar_path",))
+
+
+@receiver(post_save, sender=Trainer)
+@receiver(post_delete, sender=Trainer)
+def trainer_photo_changed(sender, instance, **kwargs):
+    refresh_avatar_path(instance.user_id)
+
+
+@receiver(image_ingested, sender=User)
+def user_photo_ingested(sender, pk, **kwargs):
+    refresh_avatar_path(pk)
+
+
+@receiver(image_ingested, sender=Trainer)
+def trainer_photo_ingested(sender, pk, **kwargs):
+    update_avatar_paths(User.objects.filter(trainer__pk=pk))
@@ -1,3 +1,218 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from core.models import Trainer
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .checks import check_token_user_cache
+from .throttling import MemoryBucketStore, get_client_ip
+from .tokens import BLACKLISTED_JTI_KEY, UserRefreshToken, is_token_revoked
+
+User = get_user_model()
+
+
+class LoginThrottleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("client", "client@example.com", "secret-pass")
+
+    def setUp(self):
+        self.store = MemoryBucketStore()
+        self.enterContext(mock.patch("users.throttling.login_throttle", self.store))
+
+    def login(self, username: str, password: str, **headers) -> int:
+        response = self.client.post(
+            reverse("tokens_obtain"),
+            {"username": username, "password": password},
+            **headers,
+        )
+        return response.status_code
+
+    def test_client_ip(self):
+        request = RequestFactory().get(
+            "/", REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR="1.1.1.1, 2.2.2.2"
+        )
+
+        self.assertEqual(get_client_ip(request), "10.0.0.2")
+
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(get_client_ip(request), "2.2.2.2")
+
+        with override_settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(get_client_ip(request), "1.1.1.1")
+
+        with override_settings(TRUSTED_PROXY_COUNT=3):
+            self.assertEqual(get_client_ip(request), "1.1.1.1")
+
+    @override_settings(LOGIN_THROTTLE_RATES={"ip": (100, 1), "account": (5, 60)})
+    def test_account_bucket(self):
+        for _ in range(5):
+            self.assertEqual(self.login("client", "wrong-pass"), 401)
+
+        self.assertEqual(self.login("client", "secret-pass"), 401)
+        self.assertEqual(self.login("CLIENT ", "secret-pass"), 401)
+        self.assertEqual(self.store.rejected()["account"], 2)
+
+    @override_settings(
+        LOGIN_THROTTLE_RATES={"ip": (3, 60), "account": (100, 1)},
+        TRUSTED_PROXY_COUNT=1,
+    )
+    def test_ip_bucket(self):
+        for i in range(3):
+            self.assertEqual(
+                self.login(f"user{i}", "wrong-pass", HTTP_X_FORWARDED_FOR="1.1.1.1"),
+                401,
+            )
+
+        self.assertEqual(
+            self.login("client", "secret-pass", HTTP_X_FORWARDED_FOR="1.1.1.1"), 401
+        )
+        self.assertEqual(
+            self.login("client", "secret-pass", HTTP_X_FORWARDED_FOR="2.2.2.2"), 200
+        )
+        self.assertEqual(self.store.rejected(), {"ip": 1, "account": 0})
+
+
+class PruneTokensTest(TestCase):
+    def test_prune_expired(self):
+        user = User.objects.create_user("client", "client@example.com")
+        expired = UserRefreshToken.for_user(user)
+        active = UserRefreshToken.for_user(user)
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        for token in (expired, active):
+            token.blacklist()
+
+        call_command("prune_tokens", stdout=StringIO())
+
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)),
+            [active["jti"]],
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertIsNone(
+            caches["shared"].get(BLACKLISTED_JTI_KEY.format(expired["jti"]))
+        )
+        self.assertTrue(caches["shared"].get(BLACKLISTED_JTI_KEY.format(active["jti"])))
+
+
+class BlacklistCacheTest(TestCase):
+    def setUp(self):
+        caches["shared"].clear()
+        self.user = User.objects.create_user("client", "client@example.com")
+
+    def test_outstanding_token_has_claims(self):
+        token = UserRefreshToken.for_user(self.user)
+        stored = OutstandingToken.objects.get(jti=token["jti"]).token
+
+        self.assertEqual(stored, str(token))
+        self.assertIs(UserRefreshToken(stored)["is_active"], True)
+
+    def test_check_result_is_cached(self):
+        token = UserRefreshToken.for_user(self.user)
+        token.check_blacklist()
+
+        with self.assertNumQueries(0):
+            token.check_blacklist()
+
+        token.blacklist()
+
+        with self.assertNumQueries(0), self.assertRaises(TokenError):
+            token.check_blacklist()
+
+        caches["shared"].clear()
+
+        with self.assertNumQueries(1), self.assertRaises(TokenError):
+            token.check_blacklist()
+
+
+@override_settings(DEBUG_TOOLBAR_CONFIG={"SHOW_TOOLBAR_CALLBACK": lambda r: False})
+class TokenRevocationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.users = [
+            User.objects.create_user(f"client{i}", f"client{i}@example.com")
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.client.force_login(self.admin)
+
+    def test_admin_deactivation_revokes_tokens(self):
+        tokens = [AccessToken.for_user(user) for user in self.users]
+
+        response = self.client.post(
+            reverse("admin:users_user_changelist"),
+            {"action": "set_is_inactive", "_selected_action": [self.users[0].pk]},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(User.objects.get(pk=self.users[0].pk).is_active)
+        self.assertTrue(is_token_revoked(tokens[0], self.users[0].pk))
+        self.assertFalse(is_token_revoked(tokens[1], self.users[1].pk))
+
+    def test_token_user_mode_requires_shared_cache(self):
+        self.assertEqual(check_token_user_cache(None), [])
+
+        with override_settings(JWT_TOKEN_USER=True):
+            errors = check_token_user_cache(None)
+
+        self.assertEqual([error.id for error in errors], ["users.E001"])
+
+
+class AvatarPathTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("client", "client@example.com")
+
+    def get_avatar_path(self) -> str:
+        return User.objects.values_list("avatar_path", flat=True).get(pk=self.user.pk)
+
+    def test_own_photo_wins(self):
+        Trainer.objects.create(
+            user=self.user, slug="client", specialization="Йога", photo="t/a.jpg"
+        )
+        self.assertEqual(self.get_avatar_path(), "t/a.jpg")
+
+        user = User.objects.get(pk=self.user.pk)
+        user.photo = "users/a.jpg"
+        user.save()
+
+        self.assertEqual(user.avatar_path, "users/a.jpg")
+        self.assertEqual(self.get_avatar_path(), "users/a.jpg")
+
+        user.photo = None
+        user.save()
+
+        self.assertEqual(user.avatar_path, "t/a.jpg")
+        self.assertEqual(self.get_avatar_path(), "t/a.jpg")
+
+    def test_unchanged_photo_skips_sync(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Иван"
+
+        with self.assertNumQueries(2):
+            user.save()
+
+        user.photo = "users/a.jpg"
+        user.save()
+
+        with self.assertNumQueries(2):
+            user.save()
+
+        self.assertEqual(self.get_avatar_path(), "users/a.jpg")
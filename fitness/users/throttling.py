@@ -0,0 +1,116 @@
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+
+LOGIN_THROTTLE_SCOPES = ("ip", "account")
+LOGIN_THROTTLE_MAX_BUCKETS = 100_000
+LOGIN_THROTTLE_KEY = "login_throttle:{}"
+LOGIN_THROTTLE_REJECTED_KEY = "login_throttle_rejected:{}"
+
+
+def get_allowed_at(allowed_at: float | None, now: float) -> float:
+    return max(allowed_at or now, now)
+
+
+def has_tokens(allowed_at: float, now: float, capacity: int, interval: float) -> bool:
+    return allowed_at - now <= (capacity - 1) * interval
+
+
+class MemoryBucketStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, float] = {}
+        self._rejected: Counter[str] = Counter()
+
+    def consume(self, key: str, capacity: int, interval: float) -> bool:
+        now = time.time()
+
+        with self._lock:
+            if len(self._buckets) >= LOGIN_THROTTLE_MAX_BUCKETS:
+                self._buckets = {k: v for k, v in self._buckets.items() if v > now}
+
+            allowed_at = get_allowed_at(self._buckets.get(key), now)
+
+            if not has_tokens(allowed_at, now, capacity, interval):
+                return False
+
+            self._buckets[key] = allowed_at + interval
+            return True
+
+    def reject(self, scope: str) -> None:
+        with self._lock:
+            self._rejected[scope] += 1
+
+    def rejected(self) -> dict[str, int]:
+        with self._lock:
+            return {scope: self._rejected[scope] for scope in LOGIN_THROTTLE_SCOPES}
+
+
+class CacheBucketStore:
+    def consume(self, key: str, capacity: int, interval: float) -> bool:
+        now = time.time()
+        cache_key = LOGIN_THROTTLE_KEY.format(key)
+        allowed_at = get_allowed_at(cache.get(cache_key), now)
+
+        if not has_tokens(allowed_at, now, capacity, interval):
+            return False
+
+        cache.set(
+            cache_key,
+            allowed_at + interval,
+            timeout=math.ceil(allowed_at + interval - now),
+        )
+        return True
+
+    def reject(self, scope: str) -> None:
+        key = LOGIN_THROTTLE_REJECTED_KEY.format(scope)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+    def rejected(self) -> dict[str, int]:
+        return {
+            scope: cache.get(LOGIN_THROTTLE_REJECTED_KEY.format(scope), 0)
+            for scope in LOGIN_THROTTLE_SCOPES
+        }
+
+
+LOGIN_THROTTLE_STORES = {
+    "memory": MemoryBucketStore,
+    "cache": CacheBucketStore,
+}
+
+login_throttle = LOGIN_THROTTLE_STORES[settings.LOGIN_THROTTLE_STORE]()
+
+
+def get_client_ip(request: HttpRequest | None) -> str | None:
+    if request is None:
+        return None
+
+    forwarded = request.META.get(settings.TRUSTED_PROXY_HEADER, "")
+    addrs = [addr.strip() for addr in forwarded.split(",") if addr.strip()]
+
+    if not settings.TRUSTED_PROXY_COUNT or not addrs:
+        return request.META.get("REMOTE_ADDR")
+
+    return addrs[-min(settings.TRUSTED_PROXY_COUNT, len(addrs))]
+
+
+def allow_login_attempt(request: HttpRequest | None, username: str) -> bool:
+    idents = {"ip": get_client_ip(request), "account": username.strip().lower()}
+
+    for scope in LOGIN_THROTTLE_SCOPES:
+        if not idents[scope]:
+            continue
+
+        capacity, interval = settings.LOGIN_THROTTLE_RATES[scope]
+
+        if not login_throttle.consume(f"{scope}:{idents[scope]}", capacity, interval):
+            login_throttle.reject(scope)
+            return False
+
+    return True
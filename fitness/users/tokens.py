@@ -0,0 +1,90 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken, Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+REVOKED_USER_KEY = "revoked_user:{}"
+BLACKLISTED_JTI_KEY = "blacklisted_jti:{}"
+
+
+def set_user_claims(token: Token, user) -> None:
+    trainer = getattr(user, "trainer", None)
+
+    token["trainer_id"] = trainer.pk if trainer else None
+    token["is_staff"] = user.is_staff
+    token["is_active"] = user.is_active
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    lifetime = settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"]
+    caches["shared"].set(
+        REVOKED_USER_KEY.format(user_id),
+        int(time.time()),
+        timeout=int(lifetime.total_seconds()) + 60,
+    )
+
+
+def is_token_revoked(token: Token, user_id: int) -> bool:
+    revoked_at = caches["shared"].get(REVOKED_USER_KEY.format(user_id))
+    return revoked_at is not None and token.get("iat", 0) <= revoked_at
+
+
+class UserRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user) -> "UserRefreshToken":
+        token = super(BlacklistMixin, cls).for_user(user)
+        set_user_claims(token, user)
+        token.outstand()
+
+        return token
+
+    def check_blacklist(self) -> None:
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = caches["shared"].get(BLACKLISTED_JTI_KEY.format(jti))
+
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            self.remember_blacklisted(blacklisted)
+
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self) -> tuple[BlacklistedToken, bool]:
+        token = OutstandingToken.objects.filter(
+            jti=self.payload[api_settings.JTI_CLAIM]
+        ).first()
+
+        if token is None:
+            result = super().blacklist()
+        else:
+            result = BlacklistedToken.objects.get_or_create(token=token)
+
+        self.remember_blacklisted(True)
+        return result
+
+    def outstand(self) -> OutstandingToken:
+        return OutstandingToken.objects.create(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload["exp"]),
+        )
+
+    def remember_blacklisted(self, blacklisted: bool) -> None:
+        key = BLACKLISTED_JTI_KEY.format(self.payload[api_settings.JTI_CLAIM])
+        timeout = max(int(self.payload["exp"] - time.time()), 1)
+
+        if blacklisted:
+            caches["shared"].set(key, True, timeout=timeout)
+        else:
+            caches["shared"].add(key, False, timeout=timeout)
@@ -12,12 +12,15 @@ from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView, TemplateView, UpdateView
 from rest_framework import status
 from rest_framework.generics import GenericAPIView, RetrieveUpdateDestroyAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from core.images import delete_image
+
 from .forms import (
     LoginForm,
     PasswordChangeForm,
@@ -27,6 +30,8 @@ from .forms import (
     UserUpdateForm,
 )
 from .serializers import CreateUserSerializer, TokenSerializer, UserSerializer
+from .throttling import login_throttle
+from .tokens import UserRefreshToken
 
 User = get_user_model()
 
@@ -144,7 +149,8 @@ def delete_user_photo(user: User) -> dict[str, bool | str]:
     result: dict[str, bool | str] = {"success": False, "message": ""}
 
     if user.photo:
-        user.photo.delete()
+        delete_image(user.photo.name)
+        user.photo = None
         user.save()
         result["message"] = "Ваша фотография была успешно удалена"
         result["success"] = True
@@ -174,6 +180,7 @@ class TokensObtainView(TokenObtainPairView):
 
 
 class UserAPIView(RetrieveUpdateDestroyAPIView):
+    authentication_classes = (JWTAuthentication, SessionAuthentication)
     permission_classes = (IsAuthenticated,)
     serializer_class = UserSerializer
 
@@ -194,7 +201,7 @@ class CreateUserAPIView(GenericAPIView):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
 
         return Response(
             {
@@ -209,6 +216,7 @@ class CreateUserAPIView(GenericAPIView):
 
 
 class DeleteUserPhotoAPIView(APIView):
+    authentication_classes = (JWTAuthentication, SessionAuthentication)
     permission_classes = (IsAuthenticated,)
 
     @staticmethod
@@ -217,3 +225,10 @@ class DeleteUserPhotoAPIView(APIView):
         result["user"] = UserSerializer(request.user).data
 
         return Response(result, status=status.HTTP_200_OK)
+
+
+class LoginThrottleAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({"rejected": login_throttle.rejected()})